@@ -0,0 +1,206 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Chroma HNSW parameter sweep
+#
+# Builds Chroma collections over the same vectors for every (metric, M, construction_ef)
+# combination, then for each search_ef measures recall@k against exact brute-force search,
+# per-query latency, build time and on-disk index size. Points that no other point beats
+# on both recall and p50 latency are marked "pareto". Vectors come from an existing Chroma
+# collection (--index-dir) or a synthetic clustered set sized like a larger corpus.
+#
+#   python -m benchmarks.hnsw_sweep --synthetic 50000 --output sweep.json
+#   python -m benchmarks.hnsw_sweep --index-dir storage/chroma_db --collection documents --m 8 16 32
+
+# Standard imports
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Third-party imports
+import chromadb
+import numpy as np
+from chromadb.api.client import SharedSystemClient
+
+# Custom imports
+from benchmarks.retrieval_benchmark import directory_bytes, latency_summary
+from services.data_processing.rag.distance import DISTANCE_METRICS, brute_force_distances
+
+# Chroma rejects add() batches above its max batch size (~5k)
+ADD_BATCH_SIZE = 4096
+COLLECTION = "sweep"
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors drawn around random cluster centers (topic-like structure, unlike uniform noise)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_collection_vectors(index_dir: str, collection: str) -> np.ndarray:
+    client = chromadb.PersistentClient(path=index_dir)
+    stored = client.get_collection(collection).get(include=["embeddings"])
+    return np.asarray(stored["embeddings"], dtype=np.float32)
+
+
+def sample_queries(vectors: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """Perturbed copies of stored vectors, so queries are near but not identical to the data"""
+    rng = np.random.default_rng(seed + 1)
+    picked = vectors[rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)]
+    queries = picked + 0.2 * rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_neighbors(queries: np.ndarray, vectors: np.ndarray, metric: str, k: int) -> List[set]:
+    neighbors = []
+    for start in range(0, len(queries), 256):
+        distances = brute_force_distances(queries[start:start + 256], vectors, metric)
+        top = np.argpartition(distances, k, axis=1)[:, :k]
+        neighbors.extend(set(row.tolist()) for row in top)
+    return neighbors
+
+
+def build_collection(directory: str, vectors: np.ndarray, metric: str, m: int, construction_ef: int) -> float:
+    client = chromadb.PersistentClient(path=directory)
+    collection = client.create_collection(COLLECTION, metadata={
+        "hnsw:space": metric,
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+    })
+    begin = time.perf_counter()
+    for start in range(0, len(vectors), ADD_BATCH_SIZE):
+        batch = vectors[start:start + ADD_BATCH_SIZE]
+        collection.add(ids=[str(i) for i in range(start, start + len(batch))], embeddings=batch.tolist())
+    elapsed = time.perf_counter() - begin
+    SharedSystemClient.clear_system_cache()
+    return elapsed
+
+
+def open_with_search_ef(directory: str, search_ef: int) -> Any:
+    """Set ef_search and reopen the collection
+
+    A loaded HNSW index keeps the ef_search it was loaded with, so the client cache is
+    cleared to make the next query load the index with the new value.
+    """
+    chromadb.PersistentClient(path=directory).get_collection(COLLECTION).modify(
+        configuration={"hnsw": {"ef_search": search_ef}}
+    )
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=directory).get_collection(COLLECTION)
+
+
+def measure_search(collection: Any, queries: np.ndarray, truth: List[set], k: int,
+                   repeat: int) -> Tuple[float, Dict[str, float]]:
+    latencies, recalls = [], []
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k, include=[])  # load the index
+    for query, expected in zip(queries.tolist(), truth):
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            result = collection.query(query_embeddings=[query], n_results=k, include=[])
+            latencies.append((time.perf_counter() - begin) * 1000)
+        retrieved = {int(doc_id) for doc_id in result["ids"][0]}
+        recalls.append(len(retrieved & expected) / k)
+    return float(np.mean(recalls)), latency_summary(latencies)
+
+
+def mark_pareto(points: List[Dict[str, Any]], k: int) -> None:
+    """Flag points not dominated in (higher recall, lower p50 latency) within each metric"""
+    recall_key = f"recall@{k}"
+    for point in points:
+        point["pareto"] = not any(
+            other is not point and other["metric"] == point["metric"]
+            and other[recall_key] >= point[recall_key]
+            and other["latency"]["p50_ms"] <= point["latency"]["p50_ms"]
+            and (other[recall_key] > point[recall_key] or other["latency"]["p50_ms"] < point["latency"]["p50_ms"])
+            for other in points
+        )
+
+
+def run_sweep(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.index_dir:
+        vectors = load_collection_vectors(args.index_dir, args.collection)
+        source = f"{args.index_dir}:{args.collection}"
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim, args.clusters, args.seed)
+        source = f"synthetic({args.synthetic}x{args.dim}, {args.clusters} clusters)"
+    if len(vectors) <= args.k:
+        raise RuntimeError(f"Need more than k={args.k} vectors, got {len(vectors)}")
+    queries = sample_queries(vectors, args.queries, args.seed)
+
+    report: Dict[str, Any] = {
+        "config": {"source": source, "vectors": int(len(vectors)), "dim": int(vectors.shape[1]),
+                   "queries": int(len(queries)), "k": args.k, "repeat": args.repeat},
+        "points": [],
+    }
+    for metric in args.metrics:
+        truth = exact_neighbors(queries, vectors, metric, args.k)
+        for m in args.m:
+            for construction_ef in args.construction_ef:
+                work_dir = tempfile.mkdtemp(prefix="hnsw_sweep_")
+                try:
+                    build_seconds = build_collection(work_dir, vectors, metric, m, construction_ef)
+                    index_bytes = directory_bytes(work_dir)
+                    for search_ef in args.search_ef:
+                        collection = open_with_search_ef(work_dir, search_ef)
+                        recall, latency = measure_search(collection, queries, truth, args.k, args.repeat)
+                        report["points"].append({
+                            "metric": metric,
+                            "M": m,
+                            "construction_ef": construction_ef,
+                            "search_ef": search_ef,
+                            f"recall@{args.k}": round(recall, 4),
+                            "latency": latency,
+                            "build_seconds": round(build_seconds, 3),
+                            "index_bytes": index_bytes,
+                        })
+                        print(f"{metric} M={m} construction_ef={construction_ef} search_ef={search_ef}: "
+                              f"recall@{args.k}={recall:.4f} p50={latency['p50_ms']}ms", file=sys.stderr)
+                finally:
+                    SharedSystemClient.clear_system_cache()
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+    mark_pareto(report["points"], args.k)
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Chroma HNSW recall/latency/size sweep")
+    parser.add_argument("--index-dir", default=None, help="Sweep over the vectors of an existing Chroma index")
+    parser.add_argument("--collection", default="documents", help="Collection name inside --index-dir")
+    parser.add_argument("--synthetic", type=int, default=20000, help="Synthetic vector count (without --index-dir)")
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic vector dimension")
+    parser.add_argument("--clusters", type=int, default=64, help="Synthetic topic clusters")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per query")
+    parser.add_argument("--metrics", nargs="+", choices=DISTANCE_METRICS, default=["cosine"])
+    parser.add_argument("--m", nargs="+", type=int, default=[8, 16, 32])
+    parser.add_argument("--construction-ef", nargs="+", type=int, default=[100, 200])
+    parser.add_argument("--search-ef", nargs="+", type=int, default=[10, 25, 50, 100, 200])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    output = json.dumps(run_sweep(args), ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Per-format document loader throughput benchmark
+#
+# Generates a synthetic corpus (UTF-8/CP949 text, Markdown, Excel) plus any files under
+# --documents, then loads every file through the native fast loaders and through the
+# TextLoader/Unstructured fallback loaders, reporting MB/s and documents/s per format as JSON.
+#
+#   python -m benchmarks.loader_benchmark --output loaders.json
+#   python -m benchmarks.loader_benchmark --documents storage/documents --rounds 1
+
+# Standard imports
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# Third-party imports
+from openpyxl import Workbook
+
+# Custom imports
+from services.data_processing.rag.document_processor import DocumentProcessor
+
+SENTENCE = "골목상권 카페업종 매출액에 영향을 미치는 요인 분석 (factors affecting cafe sales in alley markets). "
+
+
+def generate_corpus(directory: str, files_per_format: int, size_kb: int) -> List[str]:
+    """Write synthetic files of roughly size_kb each for every natively supported format"""
+    paths = []
+    repeat = max(1, size_kb * 1024 // len(SENTENCE.encode("utf-8")))
+    body = "\n".join(SENTENCE * 4 for _ in range(repeat // 4 + 1))
+
+    for i in range(files_per_format):
+        for name, encoding in ((f"utf8_{i}.txt", "utf-8"), (f"cp949_{i}.txt", "cp949")):
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding=encoding) as f:
+                f.write(body)
+            paths.append(path)
+
+        path = os.path.join(directory, f"notes_{i}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            for section in range(repeat // 20 + 1):
+                f.write(f"# 장 {section}\n\n## 소절 {section}.1\n\n{SENTENCE * 10}\n\n```python\n# not a heading\n```\n\n")
+        paths.append(path)
+
+        path = os.path.join(directory, f"sales_{i}.xlsx")
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("sales")
+        sheet.append(["store", "district", "month", "sales", "note"])
+        for row in range(repeat):
+            sheet.append([f"store_{row}", "마포구", row % 12 + 1, row * 1000, SENTENCE[:40]])
+        workbook.save(path)
+        paths.append(path)
+    return paths
+
+
+def measure(processor: DocumentProcessor, paths: List[str], rounds: int) -> Dict[str, Any]:
+    total_bytes = sum(os.path.getsize(path) for path in paths) * rounds
+    documents, characters = 0, 0
+    begin = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            for path in paths:
+                for page in processor.iter_pages(path):
+                    documents += 1
+                    characters += len(page.page_content)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    elapsed = time.perf_counter() - begin
+    return {
+        "seconds": round(elapsed, 4),
+        "mb_per_s": round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        "files_per_s": round(len(paths) * rounds / elapsed, 1) if elapsed else None,
+        "documents": documents // rounds,
+        "characters": characters // rounds,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    work_dir = tempfile.mkdtemp(prefix="loader_bench_")
+    try:
+        paths = generate_corpus(work_dir, args.files, args.size_kb)
+        if args.documents:
+            paths += [str(path) for path in sorted(Path(args.documents).rglob("*")) if path.is_file()]
+
+        processors = {
+            "fast": DocumentProcessor(fast_loaders=True),
+            "fallback": DocumentProcessor(fast_loaders=False),
+        }
+        by_format = defaultdict(list)
+        for path in paths:
+            if processors["fast"].is_supported_file(path):
+                label = Path(path).suffix.lower()
+                if label == ".txt":
+                    label = "txt-" + Path(path).name.split("_")[0]
+                by_format[label].append(path)
+
+        report: Dict[str, Any] = {
+            "config": {"files_per_format": args.files, "size_kb": args.size_kb, "rounds": args.rounds,
+                       "documents": str(args.documents) if args.documents else None},
+            "formats": {},
+        }
+        for label, format_paths in sorted(by_format.items()):
+            result = {
+                "files": len(format_paths),
+                "bytes": sum(os.path.getsize(path) for path in format_paths),
+            }
+            for name, processor in processors.items():
+                result[name] = measure(processor, format_paths, args.rounds)
+            fast, fallback = result["fast"], result["fallback"]
+            if "seconds" in fast and "seconds" in fallback and fast["seconds"]:
+                result["speedup"] = round(fallback["seconds"] / fast["seconds"], 2)
+            report["formats"][label] = result
+        return report
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Per-format document loader throughput benchmark")
+    parser.add_argument("--files", type=int, default=5, help="Synthetic files per format")
+    parser.add_argument("--size-kb", type=int, default=256, help="Approximate size of each synthetic file")
+    parser.add_argument("--rounds", type=int, default=3, help="Times each file set is loaded")
+    parser.add_argument("--documents", type=Path, default=None, help="Also benchmark the files in this directory")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    output = json.dumps(run_benchmark(args), ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Compressed vector storage benchmark for the numpy backend
+#
+# Stores the same vectors in NumpyVectorStore with each compression setting and reports the
+# resident scoring matrix size, the saving against float32, recall@k against exact float32
+# search for every rescore factor, and per-query latency. Setting names are
+# "[pca<dims>+]<float32|float16|int8>", e.g. "int8" or "pca192+float16".
+#
+#   python -m benchmarks.quantization_benchmark --synthetic 50000 --output quantization.json
+#   python -m benchmarks.quantization_benchmark --index-dir storage/chroma_db --collection documents
+
+# Standard imports
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Third-party imports
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Custom imports
+from benchmarks.hnsw_sweep import exact_neighbors, load_collection_vectors, sample_queries, synthetic_vectors
+from benchmarks.retrieval_benchmark import latency_summary
+from services.data_processing.rag.numpy_db import NumpyVectorStore
+
+
+def parse_setting(name: str) -> Tuple[Optional[str], int]:
+    """"pca192+int8" -> ("int8", 192), "float32" -> (None, 0)"""
+    pca_dims = 0
+    if name.startswith("pca"):
+        prefix, _, name = name.partition("+")
+        pca_dims = int(prefix[3:])
+    if name not in ("float32", "float16", "int8"):
+        raise ValueError(f"Unknown storage setting: {name}")
+    return (None if name == "float32" else name), pca_dims
+
+
+def build_store(directory: str, vectors: np.ndarray, quantization: Optional[str], pca_dims: int,
+                rescore_factor: int) -> Tuple[NumpyVectorStore, float]:
+    store = NumpyVectorStore(embedding=DeterministicFakeEmbedding(size=vectors.shape[1]), directory=directory,
+                             quantization=quantization, pca_dims=pca_dims, rescore_factor=rescore_factor)
+    begin = time.perf_counter()
+    store._append([""] * len(vectors), NumpyVectorStore._normalize(vectors), [{} for _ in range(len(vectors))],
+                  [str(i) for i in range(len(vectors))])
+    return store, time.perf_counter() - begin
+
+
+def measure(store: NumpyVectorStore, queries: np.ndarray, truth: List[set], k: int) -> Tuple[float, Dict[str, float]]:
+    latencies, recalls = [], []
+    for query, expected in zip(queries.tolist(), truth):
+        begin = time.perf_counter()
+        results = store.similarity_search_by_vector_with_relevance_scores(query, k=k)
+        latencies.append((time.perf_counter() - begin) * 1000)
+        recalls.append(len({int(doc.id) for doc, _ in results} & expected) / k)
+    return float(np.mean(recalls)), latency_summary(latencies)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.index_dir:
+        vectors = load_collection_vectors(args.index_dir, args.collection)
+        source = f"{args.index_dir}:{args.collection}"
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim, args.clusters, args.seed)
+        source = f"synthetic({args.synthetic}x{args.dim}, {args.clusters} clusters)"
+    vectors = NumpyVectorStore._normalize(vectors.astype(np.float32))
+    queries = sample_queries(vectors, args.queries, args.seed)
+    truth = exact_neighbors(queries, vectors, "cosine", args.k)
+
+    report: Dict[str, Any] = {
+        "config": {"source": source, "vectors": int(len(vectors)), "dim": int(vectors.shape[1]),
+                   "queries": int(len(queries)), "k": args.k},
+        "settings": [],
+    }
+    for name in args.settings:
+        quantization, pca_dims = parse_setting(name)
+        work_dir = tempfile.mkdtemp(prefix="quantization_")
+        try:
+            store, encode_seconds = build_store(work_dir, vectors, quantization, pca_dims, 1)
+            entry: Dict[str, Any] = {"setting": name, "encode_seconds": round(encode_seconds, 3),
+                                     **store.memory_stats(), "rescore": []}
+            entry["saved_bytes"] = entry["full_precision_bytes"] - entry["resident_bytes"]
+            factors = args.rescore_factors if store.codec.enabled else [1]
+            for factor in factors:
+                store.rescore_factor = factor
+                recall, latency = measure(store, queries, truth, args.k)
+                entry["rescore"].append({"rescore_factor": factor, f"recall@{args.k}": round(recall, 4),
+                                         "latency": latency})
+                print(f"{name} rescore_factor={factor}: {entry['compression_ratio']}x smaller, "
+                      f"recall@{args.k}={recall:.4f} p50={latency['p50_ms']}ms", file=sys.stderr)
+            report["settings"].append(entry)
+            store = None  # release the memory map before removing the directory
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Numpy backend compressed vector recall/memory benchmark")
+    parser.add_argument("--index-dir", default=None, help="Use the vectors of an existing Chroma index")
+    parser.add_argument("--collection", default="documents", help="Collection name inside --index-dir")
+    parser.add_argument("--synthetic", type=int, default=20000, help="Synthetic vector count (without --index-dir)")
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic vector dimension")
+    parser.add_argument("--clusters", type=int, default=64, help="Synthetic topic clusters")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--settings", nargs="+",
+                        default=["float32", "float16", "int8", "pca192+float16", "pca128+int8"])
+    parser.add_argument("--rescore-factors", nargs="+", type=int, default=[1, 2, 4, 8],
+                        help="Candidates rescored at full precision, as multiples of k (1 = no rescoring)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    output = json.dumps(run_benchmark(args), ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
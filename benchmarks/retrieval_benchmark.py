@@ -0,0 +1,238 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Offline retrieval benchmark
+#
+# Builds a fresh index from storage/documents, replays the labeled gold queries and the
+# perform_rag_analysis query templates, and writes a JSON report with index build time,
+# index size, peak memory, p50/p95 latency and recall@k per search mode.
+#
+#   python -m benchmarks.retrieval_benchmark --output bench.json
+#   python -m benchmarks.retrieval_benchmark --backend numpy --compare bench.json
+
+# Standard imports
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Never reach the network: the embedding model must already be in the local HF cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Third-party imports
+import numpy as np
+
+# Custom imports
+from services.data_processing.rag_engine import RAGEngine
+from utils.prompts import rag_analysis_queries
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DOCUMENTS = ROOT / "storage" / "documents"
+DEFAULT_GOLD = Path(__file__).resolve().parent / "retrieval_gold.json"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def directory_bytes(path: str) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(latencies_ms)
+    return {
+        "count": int(len(values)),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def recall_at_k(retrieved_files: List[str], relevant: List[str], k: int) -> float:
+    """Fraction of relevant files that appear among the top-k retrieved chunks"""
+    top_files = set(retrieved_files[:k])
+    return sum(1 for name in relevant if name in top_files) / len(relevant)
+
+
+def time_queries(search: Callable[[Any], List], queries: List[Any], repeat: int) -> Tuple[List[float], List[List]]:
+    latencies, results = [], []
+    for query in queries:
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            hits = search(query)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        results.append(hits)
+    return latencies, results
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    with open(args.gold, "r", encoding="utf-8") as f:
+        gold = json.load(f)
+
+    index_dir = args.index_dir or tempfile.mkdtemp(prefix="rag_bench_")
+    rss_before = peak_rss_mb()
+    try:
+        build_begin = time.perf_counter()
+        engine = RAGEngine(
+            collection_name="benchmark",
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            persist_directory=index_dir,
+            workers=args.workers,
+            hybrid=True,
+            vector_backend=args.backend,
+            hierarchical=args.hierarchical,
+            parsed_text_cache_dir=args.parsed_cache_dir,
+        )
+        ingestion = engine.add_documents_from_directory(str(args.documents))
+        build_seconds = time.perf_counter() - build_begin
+
+        if args.documents_required and not ingestion["success"] and not len(engine.manifest):
+            raise RuntimeError(f"No documents indexed from {args.documents}")
+
+        report: Dict[str, Any] = {
+            "config": {
+                "backend": args.backend or "config",
+                "chunk_size": args.chunk_size,
+                "chunk_overlap": args.chunk_overlap,
+                "workers": args.workers,
+                "hierarchical": args.hierarchical,
+                "parsed_text_cache": args.parsed_cache_dir,
+                "k": args.k,
+                "repeat": args.repeat,
+                "embedding_model": engine.vector_db.embedding_model,
+                "documents": str(args.documents),
+                "gold": str(args.gold),
+            },
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "index": {
+                "files": len(engine.manifest),
+                "chunks": engine.get_documents_count(),
+                "failed_files": ingestion["failed"],
+                "build_seconds": round(build_seconds, 3),
+                "index_bytes": directory_bytes(index_dir),
+            },
+            "modes": {},
+        }
+
+        labeled = gold["queries"]
+        modes = {
+            "dense": lambda q: engine.search(q, k=args.k),
+            "hybrid": lambda q: engine.hybrid_search(q, k=args.k),
+        }
+        for mode, search in modes.items():
+            search(labeled[0]["query"])  # warm-up (model load, lazy index compile)
+            latencies, results = time_queries(search, [item["query"] for item in labeled], args.repeat)
+            per_query = {}
+            for item, hits in zip(labeled, results):
+                files = [hit.metadata.get("file_name", "") for hit in hits]
+                per_query[item["id"]] = {
+                    "recall": round(recall_at_k(files, item["relevant"], args.k), 4),
+                    "top_files": list(dict.fromkeys(files))[:3],
+                }
+            report["modes"][mode] = {
+                "latency": latency_summary(latencies),
+                f"recall@{args.k}": round(float(np.mean([q["recall"] for q in per_query.values()])), 4),
+                "queries": per_query,
+            }
+
+        # perform_rag_analysis issues four templated queries per data summary (latency only)
+        analysis_sets = [rag_analysis_queries(summary) for summary in gold.get("analysis_summaries", [])]
+        if analysis_sets:
+            latencies, _ = time_queries(lambda queries: engine.multi_query_search(queries, k=args.k),
+                                        analysis_sets, args.repeat)
+            report["modes"]["rag_analysis"] = {"latency": latency_summary(latencies)}
+
+        report["memory"] = {
+            "peak_rss_mb_before": round(rss_before, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        return report
+    finally:
+        if not args.index_dir and not args.keep_index:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of recall (absolute drop) or p95 latency (relative increase) beyond tolerance"""
+    regressions = []
+    for mode, result in current["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if not previous:
+            continue
+        for key, value in result.items():
+            if key.startswith("recall@") and key in previous and value < previous[key] - tolerance:
+                regressions.append(f"{mode} {key}: {previous[key]} -> {value}")
+        p95, previous_p95 = result["latency"]["p95_ms"], previous["latency"]["p95_ms"]
+        if p95 > previous_p95 * (1 + tolerance):
+            regressions.append(f"{mode} p95: {previous_p95}ms -> {p95}ms")
+
+    build, previous_build = current["index"]["build_seconds"], baseline["index"]["build_seconds"]
+    if build > previous_build * (1 + tolerance):
+        regressions.append(f"build: {previous_build}s -> {build}s")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline RAG retrieval benchmark")
+    parser.add_argument("--documents", type=Path, default=DEFAULT_DOCUMENTS, help="Directory to index")
+    parser.add_argument("--gold", type=Path, default=DEFAULT_GOLD, help="Labeled gold query set (JSON)")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default=None,
+                        help="Vector backend (default: rag.vector_backend)")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--hierarchical", action="store_true",
+                        help="Search chunks only within the top documents picked by summary vectors")
+    parser.add_argument("--k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per query")
+    parser.add_argument("--index-dir", default=None, help="Reuse/persist the index here instead of a temp dir")
+    parser.add_argument("--parsed-cache-dir", default=None,
+                        help="Shared extracted-text cache; chunking experiments then skip PDF parsing")
+    parser.add_argument("--keep-index", action="store_true", help="Keep the temporary index directory")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed recall drop (absolute) and latency/build increase (relative)")
+    parser.add_argument("--allow-empty", dest="documents_required", action="store_false",
+                        help="Do not fail when no document could be indexed")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = run_benchmark(args)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+    for regression in report.get("regressions", []):
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
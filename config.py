@@ -2,6 +2,7 @@ __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 # Standard imports
 from pathlib import Path
+from typing import Dict, Optional
 
 # Third-party imports
 from pydantic_settings import BaseSettings
@@ -20,6 +21,43 @@ class Settings(BaseSettings):
 
     log_path: str
 
+    # RAG ingestion
+    rag_workers: int = 1
+    rag_insert_batch_size: int = 256
+    rag_stream_batch_pages: int = 16
+    rag_embedding_cache_mb: int = 512
+    rag_background_warm_up: bool = True
+    rag_hybrid_search: bool = True
+    rag_sparse_weight: float = 1.0
+    rag_retriever_k: int = 6
+    rag_vector_backend: str = "chroma"
+    rag_context_token_budget: int = 3000
+    rag_parsed_text_cache: bool = True
+    rag_fast_loaders: bool = True
+    rag_parsed_text_cache_dir: Optional[str] = None
+    rag_dedup: bool = True
+    rag_dedup_hamming_threshold: int = 3
+    rag_filter_references: bool = False
+    rag_hierarchical_search: bool = False
+    rag_hierarchical_top_documents: int = 5
+    rag_distance_metric: str = "cosine"
+    rag_hnsw_m: int = 16
+    rag_hnsw_construction_ef: int = 100
+    rag_hnsw_search_ef: int = 100
+    rag_vector_quantization: Optional[str] = None
+    rag_vector_pca_dims: int = 0
+    rag_rescore_factor: int = 4
+    rag_embedding_server_url: Optional[str] = None
+    rag_snapshot_path: Optional[str] = None
+    rag_snapshot_mount_dir: Optional[str] = None
+
+    # Agent prompt window
+    agent_context_token_budget: int = 8000
+    agent_context_model_budgets: Dict[str, int] = {}
+    agent_context_retrieved_turns: int = 2
+    agent_checkpoint_path: Optional[str] = None
+    agent_checkpoint_keep_last: int = 20
+
     @classmethod
     def load_from_yaml(cls, env: str = "development") -> "Settings":
         config_file = Path(__file__).parent / f"config-{env}.yml"
@@ -28,6 +66,9 @@ class Settings(BaseSettings):
         with open(config_file, "r", encoding="utf-8") as f:
             config = yaml.safe_load(f)
 
+        rag = config.get("rag") or {}
+        agent = config.get("agent") or {}
+
         return cls(
             version=config["version"]["server"],
             data_path=config["resource"]["data"],
@@ -36,6 +77,39 @@ class Settings(BaseSettings):
             file_path=config["path"]["file"],
             chroma_path=config["path"]["chroma"],
             log_path=config["log"]["path"],
+            rag_workers=rag.get("workers", 1),
+            rag_insert_batch_size=rag.get("insert_batch_size", 256),
+            rag_stream_batch_pages=rag.get("stream_batch_pages", 16),
+            rag_embedding_cache_mb=rag.get("embedding_cache_mb", 512),
+            rag_background_warm_up=rag.get("background_warm_up", True),
+            rag_hybrid_search=rag.get("hybrid_search", True),
+            rag_sparse_weight=rag.get("sparse_weight", 1.0),
+            rag_retriever_k=rag.get("retriever_k", 6),
+            rag_vector_backend=rag.get("vector_backend", "chroma"),
+            rag_context_token_budget=rag.get("context_token_budget", 3000),
+            rag_parsed_text_cache=rag.get("parsed_text_cache", True),
+            rag_fast_loaders=rag.get("fast_loaders", True),
+            rag_parsed_text_cache_dir=rag.get("parsed_text_cache_dir"),
+            rag_dedup=rag.get("dedup", True),
+            rag_dedup_hamming_threshold=rag.get("dedup_hamming_threshold", 3),
+            rag_filter_references=rag.get("filter_references", False),
+            rag_hierarchical_search=rag.get("hierarchical_search", False),
+            rag_hierarchical_top_documents=rag.get("hierarchical_top_documents", 5),
+            rag_distance_metric=rag.get("distance_metric", "cosine"),
+            rag_hnsw_m=rag.get("hnsw_m", 16),
+            rag_hnsw_construction_ef=rag.get("hnsw_construction_ef", 100),
+            rag_hnsw_search_ef=rag.get("hnsw_search_ef", 100),
+            rag_vector_quantization=rag.get("vector_quantization"),
+            rag_vector_pca_dims=rag.get("vector_pca_dims", 0),
+            rag_rescore_factor=rag.get("rescore_factor", 4),
+            rag_embedding_server_url=rag.get("embedding_server_url"),
+            rag_snapshot_path=rag.get("snapshot_path"),
+            rag_snapshot_mount_dir=rag.get("snapshot_mount_dir"),
+            agent_context_token_budget=agent.get("context_token_budget", 8000),
+            agent_context_model_budgets=agent.get("context_model_budgets") or {},
+            agent_context_retrieved_turns=agent.get("context_retrieved_turns", 2),
+            agent_checkpoint_path=agent.get("checkpoint_path"),
+            agent_checkpoint_keep_last=agent.get("checkpoint_keep_last", 20),
         )
 
 
@@ -325,3 +325,4 @@ class VibeCraftClient:
 
     async def cleanup(self):
         self.client = None
+        self.engine.close()
@@ -2,44 +2,54 @@ __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 # Standard imports
 import os
+import re
 import uuid
 import json
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Third-party imports
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.messages import AIMessage
 from langchain_core.tools import BaseTool
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain.tools.retriever import create_retriever_tool
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import ToolNode
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.graph import START, END, MessagesState, StateGraph
 
 # Custom imports
 from mcp_agent.schemas import ChatHistory
+from .summarizer import RollingSummarizer
+from .context_window import ContextWindowBuilder
+from .sqlite_checkpointer import SQLiteCheckpointer
 from services.data_processing import rag_engine
+from services.data_processing.rag import ContextPacker, uncached_embeddings
 from config import settings
 from utils.prompts import (
     TITLE_PROMPT,
     BASE_SYSTEM_PROMPT,
-    SUMMARY_PROMPT,
-    INITIAL_SUMMARY_PROMPT,
     RAG_PROMPT,
     RAG_ANALYSIS_PROMPT,
-    FINAL_SYNTHESIS_PROMPT
+    FINAL_SYNTHESIS_PROMPT,
+    RAG_ANALYSIS_TAGS,
+    rag_analysis_summary,
+    rag_analysis_queries
 )
 
+# The title call runs inside the agent node: keep its tokens out of stream_mode="messages"
+TITLE_CALL_CONFIG = RunnableConfig(tags=["nostream"])
+
 
 class State(MessagesState):
     """State class for data analysis"""
     summary: str
+    summary_watermark: str = ""  # Id of the last message folded into summary
     title: str = ""  # Conversation title based on first message
-    should_summarize: bool = False
     should_search_rag: bool = False
     analysis_stage: str = "initial"  # Analysis stage tracking
 
@@ -50,7 +60,9 @@ class BaseEngine:
             model_cls, model_name: str, model_kwargs: dict,
             tools: Optional[List[BaseTool]] = None,
     ):
-        # Set Rag tool
+        # Set Rag tool (index is built lazily, optionally warmed up in the background)
+        if settings.rag_background_warm_up:
+            rag_engine.warm_up()
         self.retriever = rag_engine.as_retriever()
         self.retriever_tool = create_retriever_tool(
             self.retriever,
@@ -75,6 +87,9 @@ class BaseEngine:
             Ideal for supporting data-driven causal analysis with peer-reviewed research.
             """
         )
+        self.context_packer = ContextPacker(token_budget=settings.rag_context_token_budget)
+        # First-turn title generation runs next to the answer instead of before it
+        self._title_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="title")
 
         # Essential settings
         self.thread_id = uuid.uuid4()
@@ -85,18 +100,33 @@ class BaseEngine:
         self.model_name = model_name
 
         # Set tools
+        self.chat_model = model_cls(model=model_name, **model_kwargs)
         if tools:
             all_tools = tools + [self.retriever_tool]
-            self.llm = model_cls(model=model_name, **model_kwargs).bind_tools(all_tools)
+            self.llm = self.chat_model.bind_tools(all_tools)
         else:
-            self.llm = model_cls(model=model_name, **model_kwargs).bind_tools([self.retriever_tool])
+            self.llm = self.chat_model.bind_tools([self.retriever_tool])
+
+        # Conversation summary is refreshed incrementally in the background every 10 new messages
+        self.summarizer = RollingSummarizer(self.chat_model, min_new_messages=10)
+        # Prompt = system + summary + recent turns (+ similar older turns) within the model's token budget
+        self.context_window = ContextWindowBuilder(
+            token_budget=settings.agent_context_token_budget,
+            model_budgets=settings.agent_context_model_budgets,
+            retrieved_turns=settings.agent_context_retrieved_turns
+        )
+        self._chat_embeddings = None
 
         # Create rag chain
         self.rag_chain = self.create_rag_chain()
 
         # Compile workflow
         self.workflow = None
-        self.memory = MemorySaver()
+        # Checkpoints persist across restarts, keeping the last N per thread
+        self.memory = SQLiteCheckpointer(
+            settings.agent_checkpoint_path or os.path.join(settings.chat_path, "checkpoints.sqlite"),
+            keep_last=settings.agent_checkpoint_keep_last
+        )
         self.app = self.build_graph(tools if tools else [])
 
     """Initialize Logic"""
@@ -108,19 +138,21 @@ class BaseEngine:
         all_tools = tools + [self.retriever_tool] if tools else [self.retriever_tool]
         tool_node = ToolNode(all_tools)
 
-        # Node configuration
-        self.workflow.add_node("agent", self.call_agent)
+        # Node configuration - each node has a sync and an async implementation, so app.invoke
+        # and app.ainvoke/astream (non-blocking LLM calls) both work
+        self.workflow.add_node("agent", RunnableLambda(self.call_agent, afunc=self.acall_agent))
         self.workflow.add_node("tools", tool_node)
-        self.workflow.add_node("rag_analysis", self.perform_rag_analysis)
-        self.workflow.add_node("final_synthesis", self.synthesize_final_analysis)
-        self.workflow.add_node("summarize_conversation", self.summarize_conversation)
+        self.workflow.add_node("rag_analysis",
+                               RunnableLambda(self.perform_rag_analysis, afunc=self.aperform_rag_analysis))
+        self.workflow.add_node("final_synthesis",
+                               RunnableLambda(self.synthesize_final_analysis, afunc=self.asynthesize_final_analysis))
 
         # Edge configuration - optimized flow
         self.workflow.add_edge(START, "agent")
         self.workflow.add_conditional_edges(
             "agent",
             self.route_agent_decision,
-            ["tools", "summarize_conversation", END]
+            ["tools", END]
         )
         self.workflow.add_conditional_edges(
             "tools",
@@ -129,7 +161,6 @@ class BaseEngine:
         )
         self.workflow.add_edge("rag_analysis", "final_synthesis")
         self.workflow.add_edge("final_synthesis", END)
-        self.workflow.add_edge("summarize_conversation", END)
 
         app = self.workflow.compile(checkpointer=self.memory)
         print("--- Optimized Data Analysis LangGraph ---")
@@ -166,21 +197,67 @@ class BaseEngine:
         self.app = self.workflow.compile(checkpointer=self.memory)
         print("[*] Tools updated and Data Analysis LangGraph recompiled.")
 
+    def close(self) -> None:
+        """Release the engine's background workers and checkpoint database (the engine must not be used afterwards)"""
+        self.summarizer.close()
+        self._title_executor.shutdown(wait=False, cancel_futures=True)
+        self.memory.close()
+
     """LangGraph Logic"""
 
-    def call_agent(self, state: State):
+    def call_agent(self, state: State, config: RunnableConfig):
         """Initial agent call - analysis planning"""
+        summary_update = self._merge_rolling_summary(state, config)
+        inference_messages, title, title_source = self._prepare_agent_call({**state, **summary_update})
+        if title_source is None:
+            return self._agent_result(title, self.llm.invoke(inference_messages), summary_update)
+
+        # Generate title if it's the first message - concurrently with the answer, not as an extra round trip
+        title_future = self._title_executor.submit(self._generate_title, title_source)
+        response = self.llm.invoke(inference_messages)
+
+        return self._agent_result(title_future.result(), response, summary_update)
+
+    async def acall_agent(self, state: State, config: RunnableConfig):
+        """Async call_agent - the LLM round trips do not block the event loop"""
+        summary_update = self._merge_rolling_summary(state, config)
+        # Context window assembly may embed turns (sync model calls): keep it off the event loop
+        inference_messages, title, title_source = await asyncio.to_thread(
+            self._prepare_agent_call, {**state, **summary_update}
+        )
+        if title_source is None:
+            return self._agent_result(title, await self.llm.ainvoke(inference_messages), summary_update)
+
+        title, response = await asyncio.gather(
+            self._agenerate_title(title_source),
+            self.llm.ainvoke(inference_messages)
+        )
+        return self._agent_result(title, response, summary_update)
+
+    def _merge_rolling_summary(self, state: State, config: RunnableConfig) -> dict:
+        """Take over a finished background summary and start the next refresh when enough messages piled up"""
+        thread_id = self._thread_key(config)
+        summary = state.get("summary", "")
+        watermark = state.get("summary_watermark", "")
+        update = {}
+
+        completed = self.summarizer.completed(thread_id, watermark)
+        if completed is not None and completed[1] != watermark:
+            summary, watermark = completed
+            update = {"summary": summary, "summary_watermark": watermark}
+
+        self.summarizer.schedule(thread_id, summary, watermark, self.get_conversation_messages(state["messages"]))
+        return update
+
+    def _prepare_agent_call(self, state: State) -> Tuple[List, str, Optional[str]]:
+        """-> (inference messages, current title, first message content if a title must be generated)"""
         summary = state.get("summary", "")
         title = state.get("title", "")
         messages = state["messages"]
 
         # Filter only actual Human-AI conversations (exclude Tool messages)
         conversation_messages = self.get_conversation_messages(messages)
-
-        # Generate title if it's the first message
-        if title == "" and conversation_messages:
-            first_human_message = conversation_messages[0]
-            title = self._generate_title(first_human_message.content)
+        title_source = conversation_messages[0].content if title == "" and conversation_messages else None
 
         # Use provided system prompt if available, otherwise use default prompt
         existing_system_messages = self.get_system_messages(messages)
@@ -200,29 +277,42 @@ class BaseEngine:
         if summary:
             # Combine system prompt and summary into single SystemMessage for Gemini compatibility
             combined_system_content = f"{system_message.content}\n\nConversation summary: {summary}"
-            combined_system_message = SystemMessage(content=combined_system_content)
-            inference_messages = [combined_system_message] + conversation_messages
-        else:
-            inference_messages = [system_message] + conversation_messages
-        response = self.llm.invoke(inference_messages)
+            system_message = SystemMessage(content=combined_system_content)
+
+        # Older turns beyond the token budget are left to the summary (or brought back by similarity)
+        window = self.context_window.build(
+            system_message, conversation_messages, self.model_name, embeddings=self._context_embeddings()
+        )
+        if window.dropped_turns:
+            print(f"Context window: ~{window.token_count}/{window.token_budget} tokens, "
+                  f"{window.recent_turns} recent + {window.retrieved_turns} retrieved turns "
+                  f"({window.dropped_turns} dropped)")
+        return window.messages, title, title_source
 
-        result = {
+    def _context_embeddings(self):
+        """Embedding model shared with the RAG index, only once it is loaded (never blocks a turn on indexing)
+
+        Chat turns bypass the on-disk document embedding cache so they never evict indexed chunks.
+        """
+        if self._chat_embeddings is None and rag_engine.is_ready():
+            self._chat_embeddings = uncached_embeddings(rag_engine.vector_db.embeddings)
+        return self._chat_embeddings
+
+    @staticmethod
+    def _agent_result(title: str, response, summary_update: Optional[dict] = None) -> dict:
+        return {
             "title": title,
             "messages": [response],
-            "analysis_stage": "tool_planning"
+            "analysis_stage": "tool_planning",
+            **(summary_update or {})
         }
 
-        return result
-
     def route_agent_decision(self, state: State) -> str:
         """Route based on agent decisions"""
         messages = state["messages"]
         last_message = messages[-1]
 
-        # Check summarization trigger - update summary every 10 messages
-        if (state.get("should_summarize", False)
-                or self.check_should_summarize(10)):
-            return "summarize_conversation"
+        # Summaries are refreshed in the background (see call_agent) or on demand (see trigger_summarize)
 
         # When tool calls are needed
         if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
@@ -396,33 +486,59 @@ class BaseEngine:
         """RAG analysis for data causal relationship analysis"""
         messages = state["messages"]
         data_summary = self._extract_data_summary(messages)
+        rag_queries = rag_analysis_queries(data_summary)
 
-        rag_queries = [
-            f"Causal inference methodology statistical analysis {data_summary}",
-            f"Variable correlation causation relationship {data_summary}",
-            f"Data-driven causal mechanism discovery {data_summary}",
-            f"Statistical validation causal relationships {data_summary}"
-        ]
+        # Wait for the lazily initialized RAG index before the first retrieval
+        if not rag_engine.wait_until_ready():
+            print("RAG engine is not available, continuing without academic context")
+
+        # Embed all queries in one pass, search concurrently and fuse duplicate chunks
+        results = []
+        try:
+            # data_summary is one of a finite set of tag combinations, precomputed at index time
+            results = rag_engine.multi_query_search(rag_queries, k=10, cache_key=data_summary)
+        except Exception as e:
+            print(f"RAG search failed for queries {rag_queries}: {e}")
+
+        response = self.llm.invoke(self._rag_analysis_messages(messages, data_summary, results))
+        return self._rag_analysis_result(messages, response)
+
+    async def aperform_rag_analysis(self, state: State):
+        """Async perform_rag_analysis - index wait, retrieval and LLM call run off the event loop"""
+        messages = state["messages"]
+        data_summary = self._extract_data_summary(messages)
+        rag_queries = rag_analysis_queries(data_summary)
+
+        if not await rag_engine.wait_ready():
+            print("RAG engine is not available, continuing without academic context")
 
+        results = []
+        try:
+            results = await rag_engine.amulti_query_search(rag_queries, k=10, cache_key=data_summary)
+        except Exception as e:
+            print(f"RAG search failed for queries {rag_queries}: {e}")
+
+        response = await self.llm.ainvoke(self._rag_analysis_messages(messages, data_summary, results))
+        return self._rag_analysis_result(messages, response)
+
+    def _rag_analysis_messages(self, messages: List, data_summary: str, results: List) -> List:
+        """Conversation plus the analysis prompt with the packed academic context"""
         combined_context = ""
-        for query in rag_queries:
-            try:
-                context = self.retriever.invoke(query)
-                if context:
-                    combined_context += f"\n\n=== Query: {query} ===\n{context}"
-            except Exception as e:
-                print(f"RAG search failed for query '{query}': {e}")
+        if results:
+            # Deduplicate and cite chunks, keeping the prompt within the configured token budget
+            packed = self.context_packer.pack(results)
+            combined_context = packed.text
+            print(f"RAG context: {len(packed.sources)} chunks, ~{packed.token_count} tokens "
+                  f"({packed.dropped_duplicates} duplicates, {packed.dropped_budget} over budget dropped)")
 
         analysis_prompt = RAG_ANALYSIS_PROMPT.format(
             collected_data=data_summary,
             rag_context=combined_context
         )
+        return messages + [HumanMessage(content=analysis_prompt)]
 
-        analysis_message = HumanMessage(content=analysis_prompt)
-        updated_messages = messages + [analysis_message]
-
-        response = self.llm.invoke(updated_messages)
-
+    @staticmethod
+    def _rag_analysis_result(messages: List, response) -> dict:
         return {
             "messages": messages + [response],
             "analysis_stage": "rag_complete"
@@ -431,13 +547,17 @@ class BaseEngine:
     def synthesize_final_analysis(self, state: State):
         """Final comprehensive analysis - integrate data and RAG results"""
         messages = state["messages"]
+        final_response = self.llm.invoke(messages + [HumanMessage(content=FINAL_SYNTHESIS_PROMPT)])
+        return self._synthesis_result(messages, final_response)
 
-        synthesis_prompt = FINAL_SYNTHESIS_PROMPT
-        synthesis_message = HumanMessage(content=synthesis_prompt)
-
-        updated_messages = messages + [synthesis_message]
-        final_response = self.llm.invoke(updated_messages)
+    async def asynthesize_final_analysis(self, state: State):
+        """Async synthesize_final_analysis"""
+        messages = state["messages"]
+        final_response = await self.llm.ainvoke(messages + [HumanMessage(content=FINAL_SYNTHESIS_PROMPT)])
+        return self._synthesis_result(messages, final_response)
 
+    @staticmethod
+    def _synthesis_result(messages: List, final_response) -> dict:
         return {
             "messages": messages + [final_response],
             "analysis_stage": "complete"
@@ -445,62 +565,61 @@ class BaseEngine:
 
     def _extract_data_summary(self, messages: List) -> str:
         """Extract data summary from messages for causal relationship analysis"""
-        data_elements = []
+        data_elements = set()
 
         for message in messages:
             if hasattr(message, 'content') and message.content:
                 content = message.content.lower()
 
                 # Causal relationship keywords
-                if any(keyword in content for keyword in ['correlation', '상관관계', 'relationship']):
-                    data_elements.append('correlation_analysis')
-                if any(keyword in content for keyword in ['causation', '인과관계', 'causal']):
-                    data_elements.append('causal_inference')
-                if any(keyword in content for keyword in ['variable', '변수', 'factor']):
-                    data_elements.append('variable_analysis')
-                if any(keyword in content for keyword in ['impact', '영향', 'effect']):
-                    data_elements.append('impact_analysis')
-                if any(keyword in content for keyword in ['trend', '추세', 'pattern']):
-                    data_elements.append('trend_analysis')
-                if any(keyword in content for keyword in ['prediction', '예측', 'forecast']):
-                    data_elements.append('predictive_analysis')
-
-        return " ".join(set(data_elements)) if data_elements else "general causal relationship analysis"
-
-    def summarize_conversation(self, state: State):
-        """Data analysis specialized summary"""
-        summary = state.get("summary", "")
-
-        if summary:
-            summary_message_content = f"Previous summary: {summary}\n\n{SUMMARY_PROMPT}"
-        else:
-            summary_message_content = INITIAL_SUMMARY_PROMPT
+                for tag, keywords in RAG_ANALYSIS_TAGS.items():
+                    if any(keyword in content for keyword in keywords):
+                        data_elements.add(tag)
 
-        summary_message = HumanMessage(content=summary_message_content)
+        # Sorted so that the same tag set always maps to the same (cacheable) summary
+        return rag_analysis_summary(data_elements)
 
-        messages = state["messages"] + [summary_message]
-        response = self.llm.invoke(messages)
-
-        return {
-            "summary": response.content,
-            "messages": state["messages"],
-            "should_summarize": False
-        }
+    def _thread_key(self, config: Optional[RunnableConfig] = None) -> str:
+        return str((config or self.config).get("configurable", {}).get("thread_id", self.thread_id))
 
     """Util methods"""
 
     def _generate_title(self, first_message_content: str) -> str:
-        title_prompt = TITLE_PROMPT.format(first_message_content=first_message_content)
+        try:
+            response = self.llm.invoke(self._title_messages(first_message_content), config=TITLE_CALL_CONFIG)
+            return self._clean_title(response.content, first_message_content)
+        except Exception as e:
+            print(f"Title generation failed: {e}")
+            return self._heuristic_title(first_message_content)
 
+    async def _agenerate_title(self, first_message_content: str) -> str:
         try:
-            response = self.llm.invoke([HumanMessage(content=title_prompt)])
-            title = response.content.strip()
-            # Remove unnecessary quotes or symbols
-            title = title.replace('"', '').replace("'", '').replace('제목:', '').strip()
-            return title if title else "New conversation"
+            response = await self.llm.ainvoke(self._title_messages(first_message_content), config=TITLE_CALL_CONFIG)
+            return self._clean_title(response.content, first_message_content)
         except Exception as e:
             print(f"Title generation failed: {e}")
-            return "New conversation"
+            return self._heuristic_title(first_message_content)
+
+    @staticmethod
+    def _title_messages(first_message_content: str) -> List:
+        return [HumanMessage(content=TITLE_PROMPT.format(first_message_content=first_message_content))]
+
+    @classmethod
+    def _clean_title(cls, content: str, first_message_content: str = "") -> str:
+        title = content.strip() if isinstance(content, str) else ""
+        # Remove unnecessary quotes or symbols
+        title = title.replace('"', '').replace("'", '').replace('제목:', '').strip()
+        return title if title else cls._heuristic_title(first_message_content)
+
+    @staticmethod
+    def _heuristic_title(first_message_content, max_length: int = 30) -> str:
+        """Local title from the first message - available immediately, used until/unless the LLM title arrives"""
+        text = first_message_content if isinstance(first_message_content, str) else ""
+        line = next((line for line in text.splitlines() if line.strip()), "")
+        title = re.sub(r"\s+", " ", re.sub(r"[#*`>\"']", "", line)).strip()
+        if len(title) > max_length:
+            title = title[:max_length].rstrip() + "..."
+        return title if title else "New conversation"
 
     @staticmethod
     def get_system_messages(messages: List, is_json: bool = False) -> List:
@@ -581,7 +700,14 @@ class BaseEngine:
         summary = current_state.values.get("summary", "")
         title = current_state.values.get("title", "")
 
+        # A finished background refresh is reported right away, before the next turn stores it
+        completed = self.summarizer.completed(self._thread_key(), current_state.values.get("summary_watermark", ""))
+        if completed is not None:
+            summary = completed[0]
+
         conversation_messages = self.get_conversation_messages(messages)
+        if not title and conversation_messages:
+            title = self._heuristic_title(conversation_messages[0].content)
 
         return {
             "message_count": len(conversation_messages),
@@ -603,17 +729,33 @@ class BaseEngine:
     def process_with_rag(self, question, context):
         return self.rag_chain.invoke({"question": question, "context": context})
 
+    async def asearch_with_rag(self, prompt: str):
+        context = await self.retriever.ainvoke(prompt)
+        return await self.aprocess_with_rag(prompt, context)
+
+    async def aprocess_with_rag(self, question, context):
+        return await self.rag_chain.ainvoke({"question": question, "context": context})
+
     """Summary Util methods"""
 
     def trigger_summarize(self):
-        input_message = HumanMessage(content=SUMMARY_PROMPT)
-        # ID can be added during summary trigger, but avoid duplication as it's handled in summarize_conversation
-        response = self.app.invoke(
-            {"messages": [input_message], "should_summarize": True},
-            self.config
+        """Bring the summary up to date (background result + remaining delta) and store it in the thread state"""
+        current_state = self.app.get_state(self.config)
+        values = current_state.values if current_state else {}
+        watermark = values.get("summary_watermark", "")
+
+        summary, new_watermark = self.summarizer.refresh(
+            self._thread_key(),
+            values.get("summary", ""),
+            watermark,
+            self.get_conversation_messages(values.get("messages", []))
         )
-        self.save_chat_history()
-        return response
+        if new_watermark != watermark:
+            # Written as the agent node: the thread stays finished (no pending tool calls after a turn)
+            self.app.update_state(self.config, {"summary": summary, "summary_watermark": new_watermark},
+                                  as_node="agent")
+            self.save_chat_history()
+        return self.app.get_state(self.config).values
 
     def check_should_summarize(self, message_count_threshold: int = 10) -> bool:
         current_state = self.app.get_state(self.config)
@@ -772,26 +914,27 @@ class BaseEngine:
 
         merged_messages = filtered_loaded_messages + filtered_current_messages
 
-        self.memory = MemorySaver()
-        self.app = self.workflow.compile(checkpointer=self.memory)
+        # Restart the current thread from the merged messages
+        self.memory.delete_thread(self._thread_key())
         self.app.update_state(self.config, {"messages": merged_messages})
 
     def load_chat_history(self, thread_id: str):
-        record = self.load_chat_history_file(thread_id)
-        if record is None:
+        # Threads known to the checkpointer (e.g. before a restart) resume as they are
+        resumable = self.memory.get_tuple({"configurable": {"thread_id": str(thread_id)}}) is not None
+        record = None if resumable else self.load_chat_history_file(thread_id)
+        if record is None and not resumable:
             return
 
         # Update thread_id and config to match current engine instance during load
-        self.thread_id = uuid.UUID(record.thread_id)
+        self.thread_id = uuid.UUID(str(thread_id))
         self.config['configurable']['thread_id'] = str(self.thread_id)
 
-        # Refresh memory and update state
-        self.memory = MemorySaver()
-        self.app = self.workflow.compile(checkpointer=self.memory)
-        self.app.update_state(self.config, record.values)
+        if record is not None:
+            self.app.update_state(self.config, record.values)
 
     def clear_memory(self):
-        checkpoints = list(self.app.get_state_history(self.config))
+        # Only the latest two checkpoints are needed to step back one
+        checkpoints = list(self.app.get_state_history(self.config, limit=2))
         if len(checkpoints) > 1:
             previous_state = checkpoints[1].values
             self.app.update_state(self.config, previous_state)
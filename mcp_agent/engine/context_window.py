@@ -0,0 +1,162 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Third-party imports
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+# Custom imports
+from mcp_agent.schemas import ContextWindow
+from utils.token_utils import TokenUtils
+from .summarizer import message_text
+
+# Role/formatting tokens added by chat templates per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class ContextWindowBuilder:
+    """Assemble the call_agent prompt within a per-model token budget
+
+    The system message (which carries the rolling summary) and the latest turn are always kept.
+    Earlier turns are added newest first while they fit. Turns that fell out of the window can be
+    brought back by embedding similarity to the current question, using a reserved share of the
+    budget, so prompt size stays flat over a long session without losing relevant older exchanges.
+
+    Args:
+        token_budget: Default prompt budget (estimated tokens)
+        model_budgets: Per-model budgets, matched by exact name or name prefix
+        retrieved_turns: Older turns to bring back by similarity (0 disables retrieval)
+        retrieval_share: Share of the budget reserved for retrieved turns when older turns exist
+        turn_text_tokens: Text per turn used for its embedding
+    """
+
+    MAX_CACHED_TURNS = 2048
+
+    def __init__(self, token_budget: int = 8000, model_budgets: Optional[Dict[str, int]] = None,
+                 retrieved_turns: int = 2, retrieval_share: float = 0.25, turn_text_tokens: int = 256):
+        self.token_budget = token_budget
+        self.model_budgets = model_budgets or {}
+        self.retrieved_turns = max(0, retrieved_turns)
+        self.retrieval_share = min(max(retrieval_share, 0.0), 0.9)
+        self.turn_text_tokens = turn_text_tokens
+
+        self._lock = threading.Lock()
+        # LRU of turn text hash -> embedding, shared by all threads of the engine
+        self._turn_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def budget_for(self, model_name: str) -> int:
+        if model_name in self.model_budgets:
+            return self.model_budgets[model_name]
+        for name, budget in self.model_budgets.items():
+            if model_name.startswith(name):
+                return budget
+        return self.token_budget
+
+    @staticmethod
+    def message_tokens(message: BaseMessage) -> int:
+        return TokenUtils.estimate_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+
+    @staticmethod
+    def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+        """Group messages into turns, each starting at a human message"""
+        turns: List[List[BaseMessage]] = []
+        for message in messages:
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def build(self, system_message: SystemMessage, messages: List[BaseMessage], model_name: str = "",
+              embeddings: Optional[Embeddings] = None) -> ContextWindow:
+        """[system] + similar older turns + most recent turns, in chronological order
+
+        Args:
+            system_message: System prompt including the conversation summary
+            messages: Conversation messages (Human/AI), oldest first
+            model_name: Selects the per-model budget
+            embeddings: Enables similarity retrieval of dropped turns (skipped when None)
+        """
+        budget = self.budget_for(model_name)
+        turns = self.split_turns(messages)
+        costs = [sum(self.message_tokens(message) for message in turn) for turn in turns]
+        available = budget - self.message_tokens(system_message)
+
+        retrieval = self.retrieved_turns > 0 and embeddings is not None
+        recent_limit = available - (int(available * self.retrieval_share) if retrieval else 0)
+
+        # The latest turn is kept even if it alone exceeds the budget
+        used, first_recent = 0, len(turns)
+        for index in range(len(turns) - 1, -1, -1):
+            if first_recent < len(turns) and used + costs[index] > recent_limit:
+                break
+            used += costs[index]
+            first_recent = index
+
+        selected: List[int] = []
+        if retrieval and first_recent > 0:
+            try:
+                for index in self._similar_turns(turns, first_recent, embeddings):
+                    if len(selected) >= self.retrieved_turns:
+                        break
+                    if used + costs[index] <= available:
+                        selected.append(index)
+                        used += costs[index]
+            except Exception as e:
+                print(f"Context turn retrieval failed: {e}")
+
+        included = sorted(selected) + list(range(first_recent, len(turns)))
+        return ContextWindow(
+            messages=[system_message] + [message for index in included for message in turns[index]],
+            token_count=used + self.message_tokens(system_message),
+            token_budget=budget,
+            recent_turns=len(turns) - first_recent,
+            retrieved_turns=len(selected),
+            dropped_turns=len(turns) - len(included)
+        )
+
+    def _similar_turns(self, turns: List[List[BaseMessage]], first_recent: int,
+                       embeddings: Embeddings) -> List[int]:
+        """Indices of the turns before first_recent, most similar to the latest question first"""
+        query = message_text(turns[-1][0])
+        if not query:
+            return []
+
+        keys, texts = [], []
+        for turn in turns[:first_recent]:
+            text = TokenUtils.truncate_to_tokens(
+                "\n".join(message_text(message) for message in turn), self.turn_text_tokens
+            )
+            keys.append(hashlib.sha1(text.encode("utf-8")).hexdigest())
+            texts.append(text)
+
+        # Vectors of this call are kept locally: eviction (other calls, more than MAX_CACHED_TURNS
+        # older turns) only affects the shared cache, never the matrix built below
+        vectors: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._turn_vectors.get(key)
+                if vector is not None:
+                    self._turn_vectors.move_to_end(key)
+                    vectors[key] = vector
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            embedded = embeddings.embed_documents(list(missing.values()))
+            with self._lock:
+                for key, vector in zip(missing, embedded):
+                    vectors[key] = self._turn_vectors[key] = np.asarray(vector, dtype=np.float32)
+                    self._turn_vectors.move_to_end(key)
+                while len(self._turn_vectors) > self.MAX_CACHED_TURNS:
+                    self._turn_vectors.popitem(last=False)
+
+        matrix = np.stack([vectors[key] for key in keys])
+        query_vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+        scores = matrix @ query_vector / np.maximum(norms, 1e-12)
+        return np.argsort(-scores).tolist()
@@ -0,0 +1,125 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Third-party imports
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+# Custom imports
+from utils.prompts import SUMMARY_PROMPT, INITIAL_SUMMARY_PROMPT
+
+# Summaries may run inside a graph node: keep their tokens out of stream_mode="messages"
+SUMMARY_CALL_CONFIG = RunnableConfig(tags=["nostream"])
+
+
+def message_text(message: BaseMessage) -> str:
+    """Plain text of a message (text parts only for content block lists, e.g. Anthropic)"""
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return content.strip()
+
+
+class RollingSummarizer:
+    """Incremental conversation summary kept off the request path
+
+    The summary state is (summary text, watermark), where the watermark is the id of the last
+    conversation message folded into the summary. A refresh sends the previous summary plus only
+    the messages after the watermark, so its cost grows with the delta instead of the history.
+    Background refreshes run on a worker thread; the next agent turn merges a completed result
+    into the graph state (see completed()).
+
+    Args:
+        llm: Chat model used for summaries (without bound tools)
+        min_new_messages: Conversation messages after the watermark before a background refresh starts
+    """
+
+    def __init__(self, llm: BaseChatModel, min_new_messages: int = 10):
+        self.llm = llm
+        self.min_new_messages = max(1, min_new_messages)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        self._lock = threading.Lock()
+        # thread_id -> (base watermark, future of (summary, watermark))
+        self._jobs: Dict[str, Tuple[str, Future]] = {}
+
+    """Delta helpers"""
+
+    @staticmethod
+    def pending_messages(messages: List[BaseMessage], watermark: str) -> List[BaseMessage]:
+        """Conversation messages after the watermark (all of them if the watermark is unknown, e.g. rewound history)"""
+        if watermark:
+            for index in range(len(messages) - 1, -1, -1):
+                if messages[index].id == watermark:
+                    return messages[index + 1:]
+        return list(messages)
+
+    def _summary_messages(self, summary: str, messages: List[BaseMessage]) -> List[BaseMessage]:
+        transcript = "\n".join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message_text(message)}"
+            for message in messages if message_text(message)
+        )
+        if summary:
+            content = f"Previous summary: {summary}\n\nNew conversation:\n{transcript}\n\n{SUMMARY_PROMPT}"
+        else:
+            content = f"Conversation:\n{transcript}\n\n{INITIAL_SUMMARY_PROMPT}"
+        return [HumanMessage(content=content)]
+
+    """Foreground folding"""
+
+    def fold(self, summary: str, watermark: str, messages: List[BaseMessage]) -> Tuple[str, str]:
+        """Fold the messages after the watermark into the summary -> (summary, watermark)"""
+        pending = self.pending_messages(messages, watermark)
+        if not pending:
+            return summary, watermark
+        response = self.llm.invoke(self._summary_messages(summary, pending), config=SUMMARY_CALL_CONFIG)
+        return message_text(response) or summary, pending[-1].id or watermark
+
+    """Background refresh"""
+
+    def schedule(self, thread_id: str, summary: str, watermark: str, messages: List[BaseMessage]) -> bool:
+        """Start a background refresh if enough messages accumulated and none is running for the thread"""
+        if len(self.pending_messages(messages, watermark)) < self.min_new_messages:
+            return False
+
+        with self._lock:
+            job = self._jobs.get(thread_id)
+            if job is not None and not job[1].done():
+                return False
+            self._jobs[thread_id] = (watermark, self._executor.submit(self.fold, summary, watermark, list(messages)))
+        return True
+
+    def completed(self, thread_id: str, watermark: str) -> Optional[Tuple[str, str]]:
+        """Finished background result that extends the summary at this watermark, without waiting"""
+        with self._lock:
+            job = self._jobs.get(thread_id)
+        if job is None or job[0] != watermark or not job[1].done():
+            return None
+        try:
+            return job[1].result()
+        except Exception as e:
+            print(f"Background summarization failed: {e}")
+            with self._lock:
+                if self._jobs.get(thread_id) is job:
+                    del self._jobs[thread_id]
+            return None
+
+    def refresh(self, thread_id: str, summary: str, watermark: str, messages: List[BaseMessage],
+                timeout: Optional[float] = None) -> Tuple[str, str]:
+        """Up-to-date summary: reuse the running/finished background refresh, then fold only what is left"""
+        with self._lock:
+            job = self._jobs.get(thread_id)
+        if job is not None and job[0] == watermark:
+            try:
+                summary, watermark = job[1].result(timeout=timeout)
+            except Exception as e:
+                print(f"Background summarization failed, folding in the foreground: {e}")
+        return self.fold(summary, watermark, messages)
+
+    def close(self) -> None:
+        """Stop the worker thread; a refresh already running finishes, queued ones are dropped"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,5 @@
 from .chat_history_schemas import ChatHistory
+from .context_window_schemas import ContextWindow
 from .prompt_parser_schemas import (
     VisualizationType,
     VisualizationRecommendation,
@@ -0,0 +1,18 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+from typing import List
+from dataclasses import dataclass
+
+# Third-party imports
+from langchain_core.messages import BaseMessage
+
+
+@dataclass
+class ContextWindow:
+    messages: List[BaseMessage]       # [system] + 검색된 이전 턴 + 최근 턴 (시간순)
+    token_count: int                  # 프롬프트 추정 토큰 수
+    token_budget: int                 # 적용된 모델별 예산
+    recent_turns: int = 0             # 포함된 최근 턴 수
+    retrieved_turns: int = 0          # 유사도로 다시 포함된 이전 턴 수
+    dropped_turns: int = 0            # 예산 밖으로 제외된 턴 수
@@ -2,7 +2,11 @@ __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 # Document schemas
 from .document_schemas import (
-    DocumentSearchResult
+    DocumentSearchResult,
+    IngestionResult,
+    IngestionProgress,
+    IndexStatistics,
+    PackedContext
 )
 
 # Data schemas
@@ -13,6 +17,10 @@ from .data_schemas import (
 __all__ = [
     # Document schemas
     "DocumentSearchResult",
+    "IngestionResult",
+    "IngestionProgress",
+    "IndexStatistics",
+    "PackedContext",
 
     # Data schemas
     "DatasetMetadata",
@@ -1,8 +1,8 @@
 __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 # Standard imports
-from typing import Dict, Any
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -12,3 +12,53 @@ class DocumentSearchResult:
     content: str
     score: float
     metadata: Dict[str, Any]
+
+
+@dataclass
+class IngestionResult:
+    """문서 인덱싱 결과 데이터 클래스"""
+    file_path: str
+    success: bool
+    chunk_count: int = 0
+    elapsed: float = 0.0  # 파싱 + 청킹 소요 시간 (초)
+    skipped: bool = False  # 변경 없음으로 건너뛴 경우
+    error: Optional[str] = None
+    dropped_chunks: int = 0  # 중복/참고문헌으로 제외된 청크 수
+
+
+@dataclass
+class IngestionProgress:
+    """스트리밍 인덱싱 배치 진행 상황 (배치가 벡터 DB에 저장될 때마다 전달)"""
+    file_path: str
+    batch_index: int
+    batch_chunks: int  # 이번 배치에서 저장된 청크 수
+    chunks: int  # 지금까지 저장된 청크 수
+    pages: Optional[int] = None  # 지금까지 읽은 페이지 수
+    elapsed: float = 0.0
+
+
+@dataclass
+class PackedContext:
+    """토큰 예산 내로 압축한 RAG 컨텍스트"""
+    text: str
+    token_count: int
+    sources: List[DocumentSearchResult] = field(default_factory=list)  # 포함된 청크 (점수순)
+    dropped_duplicates: int = 0  # 중복/중첩으로 제외된 청크 수
+    dropped_budget: int = 0  # 예산 초과로 제외된 청크 수
+
+
+@dataclass
+class IndexStatistics:
+    """인덱스 통계 (벡터 DB 네이티브 count와 매니페스트 기반, 청크 전체 조회 없음)"""
+    collection_name: str
+    vector_backend: str
+    chunk_count: int  # 벡터 DB에 저장된 청크 수
+    file_count: int  # 매니페스트에 기록된 파일 수
+    manifest_chunk_count: int  # 매니페스트의 파일별 청크 수 합계
+    dropped_chunks: int = 0  # 인덱싱 시 중복/참고문헌으로 제외된 청크 수 합계
+    files: Dict[str, int] = field(default_factory=dict)  # 파일 경로 -> 청크 수
+
+    @property
+    def in_sync(self) -> bool:
+        """벡터 DB와 매니페스트의 청크 수가 일치하는지 여부"""
+        return self.chunk_count == self.manifest_chunk_count
@@ -3,13 +3,15 @@ __author__ = "Se Hoon Kim (sehoon787@korea.ac.kr)"
 # Document RAG system
 from .rag_engine import (
     rag_engine,
-    RAGEngine
+    RAGEngine,
+    LazyRAGEngine
 )
 
 __all__ = [
     # Document RAG System
     'rag_engine',
     'RAGEngine',
+    'LazyRAGEngine',
 ]
 
 __version__ = "1.0.0"
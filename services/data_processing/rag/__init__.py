@@ -1,9 +1,57 @@
 __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 from .chroma_db import ChromaDB
+from .chunk_dedup import ChunkDeduplicator, ReferenceSectionFilter
+from .context_packer import ContextPacker
+from .distance import DISTANCE_METRICS, distance_to_similarity
+from .numpy_db import NumpyDB, NumpyVectorStore
+from .quantization import QUANTIZATION_TYPES, VectorCodec
+from .vector_backends import create_vector_db
 from .document_processor import DocumentProcessor
+from .document_summary import build_document_summary, summary_source
+from .embedding_cache import EmbeddingCache, CachedEmbeddings, LazyEmbeddings, build_embeddings, uncached_embeddings
+from .embedding_server import EmbeddingServer, EmbeddingClient, MicroBatcher
+from .parsed_text_cache import ParsedTextCache
+from .index_manifest import IndexManifest, ManifestEntry, file_content_hash
+from .index_snapshot import SnapshotInfo, export_snapshot, mount_snapshot, read_snapshot_info
+from .fusion import reciprocal_rank_fusion, document_key
+from .retrieval_cache import RetrievalCache
+from .sparse_index import SparseIndex, tokenize
 
 __all__ = [
     "ChromaDB",
+    "ChunkDeduplicator",
+    "ReferenceSectionFilter",
+    "ContextPacker",
+    "DISTANCE_METRICS",
+    "distance_to_similarity",
+    "NumpyDB",
+    "NumpyVectorStore",
+    "QUANTIZATION_TYPES",
+    "VectorCodec",
+    "create_vector_db",
     "DocumentProcessor",
+    "build_document_summary",
+    "summary_source",
+    "EmbeddingCache",
+    "CachedEmbeddings",
+    "LazyEmbeddings",
+    "build_embeddings",
+    "uncached_embeddings",
+    "EmbeddingServer",
+    "EmbeddingClient",
+    "MicroBatcher",
+    "ParsedTextCache",
+    "IndexManifest",
+    "ManifestEntry",
+    "file_content_hash",
+    "SnapshotInfo",
+    "export_snapshot",
+    "mount_snapshot",
+    "read_snapshot_info",
+    "reciprocal_rank_fusion",
+    "document_key",
+    "RetrievalCache",
+    "SparseIndex",
+    "tokenize",
 ]
@@ -2,35 +2,66 @@ __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 # Standard imports
 import logging
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
 
 # Third-party imports
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
 
 # Custom imports
 from config import settings
+from .distance import distance_to_similarity, validate_metric
+from .embedding_cache import build_embeddings
 
 logger = logging.getLogger(__name__)
 
 
 class ChromaDB:
-    """Chroma vector database wrapper"""
+    """Chroma vector database wrapper
+
+    The distance metric and HNSW parameters are fixed when a collection is created; only
+    search_ef can be changed on an existing collection. Opening a collection created with
+    other settings keeps (and reports) its stored metric until reset_collection().
+    """
 
     def __init__(self,
                  persist_directory: Optional[str] = None,
                  embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
-                 collection_name: str = "documents"):
+                 collection_name: str = "documents",
+                 embedding_cache_dir: Optional[str] = None,
+                 embedding_cache_mb: Optional[int] = None,
+                 embeddings: Optional[Embeddings] = None,
+                 distance_metric: Optional[str] = None,
+                 hnsw_m: Optional[int] = None,
+                 hnsw_construction_ef: Optional[int] = None,
+                 hnsw_search_ef: Optional[int] = None,
+                 embedding_server_url: Optional[str] = None):
 
         self.persist_directory = persist_directory or settings.chroma_path
         self.embedding_model = embedding_model
         self.collection_name = collection_name
+        self.configured_metric = validate_metric(distance_metric or settings.rag_distance_metric)
+        self.distance_metric = self.configured_metric  # metric of the open collection
+        self.hnsw_m = hnsw_m or settings.rag_hnsw_m
+        self.hnsw_construction_ef = hnsw_construction_ef or settings.rag_hnsw_construction_ef
+        self.hnsw_search_ef = hnsw_search_ef or settings.rag_hnsw_search_ef
 
-        self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
+        # Collections using the same model (e.g. document summaries) can share one embedding instance
+        self.embeddings = embeddings or self._initialize_embeddings(embedding_cache_dir, embedding_cache_mb,
+                                                                    embedding_server_url)
         self.vectorstore = self._initialize_vectorstore()
+        self._sync_index_settings()
+        self._search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chroma-search")
+
+        logger.info(f"ChromaDB initialized with collection: {collection_name} "
+                    f"(space={self.distance_metric}, M={self.hnsw_m}, search_ef={self.hnsw_search_ef})")
 
-        logger.info(f"ChromaDB initialized with collection: {collection_name}")
+    def _initialize_embeddings(self, cache_dir: Optional[str], cache_mb: Optional[int],
+                               server_url: Optional[str] = None):
+        """Initialize embedding model (cached), or a client of the shared embedding server when configured"""
+        return build_embeddings(self.embedding_model, self.persist_directory, cache_dir, cache_mb, server_url)
 
     def _initialize_vectorstore(self) -> Chroma:
         """Initialize Chroma vectorstore"""
@@ -38,12 +69,59 @@ class ChromaDB:
             return Chroma(
                 persist_directory=self.persist_directory,
                 embedding_function=self.embeddings,
-                collection_name=self.collection_name
+                collection_name=self.collection_name,
+                collection_metadata=self.collection_metadata()
             )
         except Exception as e:
             logger.error(f"Failed to initialize vectorstore: {e}")
             raise
 
+    def collection_metadata(self) -> Dict[str, Any]:
+        """HNSW settings applied when the collection is created"""
+        return {
+            "hnsw:space": self.configured_metric,
+            "hnsw:M": self.hnsw_m,
+            "hnsw:construction_ef": self.hnsw_construction_ef,
+            "hnsw:search_ef": self.hnsw_search_ef,
+        }
+
+    def index_settings(self) -> Dict[str, Any]:
+        """Effective HNSW settings of the open collection (space, ef_construction, ef_search, max_neighbors)"""
+        configuration = getattr(self.vectorstore._collection, "configuration", None) or {}
+        if configuration.get("hnsw"):
+            return dict(configuration["hnsw"])
+        metadata = self.vectorstore._collection.metadata or {}
+        return {
+            "space": metadata.get("hnsw:space", "l2"),
+            "ef_construction": metadata.get("hnsw:construction_ef"),
+            "ef_search": metadata.get("hnsw:search_ef"),
+            "max_neighbors": metadata.get("hnsw:M"),
+        }
+
+    def _sync_index_settings(self) -> None:
+        """Adopt the stored metric of an existing collection and apply the configured search_ef"""
+        try:
+            stored = self.index_settings()
+        except Exception as e:
+            logger.warning(f"Could not read index settings of {self.collection_name}: {e}")
+            return
+
+        space = stored.get("space") or "l2"
+        if space != self.distance_metric:
+            logger.warning(f"Collection {self.collection_name} was created with space={space}, "
+                           f"configured {self.distance_metric}; using {space} until reset_collection()")
+            self.distance_metric = space
+
+        if stored.get("ef_search") not in (None, self.hnsw_search_ef):
+            try:
+                self.vectorstore._collection.modify(configuration={"hnsw": {"ef_search": self.hnsw_search_ef}})
+            except Exception as e:
+                logger.warning(f"Could not update search_ef of {self.collection_name}: {e}")
+
+    def relevance_score(self, distance: float) -> float:
+        """Convert a search distance to cosine similarity for the collection's metric"""
+        return float(distance_to_similarity(distance, self.distance_metric))
+
     def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> None:
         """Add documents to the vector database"""
         try:
@@ -69,6 +147,38 @@ class ChromaDB:
             logger.error(f"Similarity search with score failed: {e}")
             return []
 
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed all queries in one forward pass"""
+        if hasattr(self.embeddings, "embed_queries"):
+            return self.embeddings.embed_queries(queries)
+        return self.embeddings.embed_documents(queries)
+
+    def similarity_search_batch(self, queries: List[str], k: int = 10,
+                                filter_dict: Optional[Dict] = None) -> List[List[Tuple[Document, float]]]:
+        """Embed queries in a single batch and run the vector searches concurrently
+
+        Returns one list of (document, distance) per query, in query order.
+        """
+        if not queries:
+            return []
+
+        try:
+            query_embeddings = self.embed_queries(queries)
+        except Exception as e:
+            logger.error(f"Batch query embedding failed: {e}")
+            return [[] for _ in queries]
+
+        def search(embedding: List[float]) -> List[Tuple[Document, float]]:
+            try:
+                return self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+                    embedding, k=k, filter=filter_dict
+                )
+            except Exception as e:
+                logger.error(f"Similarity search by vector failed: {e}")
+                return []
+
+        return list(self._search_executor.map(search, query_embeddings))
+
     def delete_documents(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> None:
         """Delete documents from vectorstore"""
         try:
@@ -86,23 +196,33 @@ class ChromaDB:
             logger.error(f"Failed to get documents: {e}")
             return {}
 
+    def count(self) -> int:
+        """Number of stored chunks from the collection's native count (no documents fetched)"""
+        try:
+            return self.vectorstore._collection.count()
+        except Exception as e:
+            logger.error(f"Failed to count documents: {e}")
+            return 0
+
     def as_retriever(self, search_kwargs: Optional[Dict] = None):
         """Convert to retriever for use in chains"""
         search_kwargs = search_kwargs or {"k": 10}
         return self.vectorstore.as_retriever(search_kwargs=search_kwargs)
 
     def reset_collection(self) -> None:
-        """Reset the entire collection"""
+        """Reset the entire collection by dropping it and recreating an empty one"""
         try:
-            all_docs = self.vectorstore.get()
-            if all_docs and 'ids' in all_docs and all_docs['ids']:
-                self.vectorstore.delete(ids=all_docs['ids'])
+            self.vectorstore.delete_collection()
+            self.distance_metric = self.configured_metric
+            self.vectorstore = self._initialize_vectorstore()
+            self._sync_index_settings()
             logger.info("Collection reset successfully")
         except Exception as e:
             logger.error(f"Failed to reset collection: {e}")
             raise
 
     def close(self):
+        self._search_executor.shutdown(wait=False)
         self.vectorstore = None
 
 
@@ -0,0 +1,228 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import re
+import hashlib
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+
+# Custom imports
+from .sparse_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_REFERENCE_HEADING = re.compile(
+    r"^\s*(?:[ivx\d]+\.?\s*)?(?:참\s*고\s*문\s*헌|references?|bibliography|literature\s+cited)\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+_AFTER_REFERENCES = re.compile(r"^\s*<?\s*(?:abstract|부\s*록|appendix)\b", re.IGNORECASE | re.MULTILINE)
+_CITATION_LINE = re.compile(r"\(\s*(?:19|20)\d{2}[a-z]?\s*\)|(?:19|20)\d{2}[a-z]?\s*[.,]\s")
+
+
+def simhash(text: str) -> Tuple[int, int]:
+    """64-bit SimHash over token bigram shingles -> (hash, feature count)"""
+    tokens = tokenize(text)
+    features = Counter(f"{a} {b}" for a, b in zip(tokens, tokens[1:])) if len(tokens) > 1 else Counter(tokens)
+    if not features:
+        return 0, 0
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+         for feature in features),
+        dtype=np.uint64, count=len(features)
+    )
+    weights = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(bool)
+    votes = np.where(bits, weights[:, None], -weights[:, None]).sum(axis=0)
+    return sum(1 << int(bit) for bit in np.flatnonzero(votes > 0)), len(features)
+
+
+def exact_hash(text: str) -> str:
+    """Whitespace/case-insensitive content hash"""
+    normalized = _WHITESPACE_PATTERN.sub(" ", text).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class ChunkDeduplicator:
+    """Collection-wide exact and near-duplicate chunk detector
+
+    Exact duplicates are found by normalized content hash. Near duplicates use 64-bit SimHash
+    with LSH banding: the hash is split into hamming_threshold + 1 bands, so any two hashes
+    within the threshold share at least one identical band, and only chunks in the same band
+    bucket are compared. The index is persisted next to the collection as a single .npz.
+    """
+
+    def __init__(self, index_path: str, hamming_threshold: int = 3, min_features: int = 8):
+        self.index_path = index_path
+        self.hamming_threshold = hamming_threshold
+        self.min_features = min_features
+        self.bands = hamming_threshold + 1
+        self.band_bits = 64 // self.bands
+        self.manifest_fingerprint: Optional[str] = None
+
+        self.chunk_ids: List[str] = []
+        self.file_ids: List[str] = []
+        self.exact: List[str] = []
+        self.simhashes: List[int] = []  # 0 for chunks too short for near-duplicate matching
+
+        self._exact_map: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                if int(data["hamming_threshold"]) != self.hamming_threshold:
+                    logger.info("Dedup threshold changed, rebuilding dedup index")
+                    return
+                self.chunk_ids = data["chunk_ids"].tolist()
+                self.file_ids = data["file_ids"].tolist()
+                self.exact = data["exact"].tolist()
+                self.simhashes = [int(value) for value in data["simhashes"]]
+                self.manifest_fingerprint = str(data["manifest_fingerprint"]) or None
+            self._rebuild_maps()
+            logger.debug(f"Loaded dedup index with {len(self.chunk_ids)} chunks")
+        except Exception as e:
+            logger.warning(f"Failed to load dedup index {self.index_path}: {e}")
+            self.clear()
+
+    def save(self, manifest_fingerprint: Optional[str] = None) -> None:
+        if manifest_fingerprint is not None and manifest_fingerprint != self.manifest_fingerprint:
+            self.manifest_fingerprint = manifest_fingerprint
+            self._dirty = True
+        if not self._dirty:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            chunk_ids=np.array(self.chunk_ids, dtype=str),
+            file_ids=np.array(self.file_ids, dtype=str),
+            exact=np.array(self.exact, dtype=str),
+            simhashes=np.array(self.simhashes, dtype=np.uint64),
+            hamming_threshold=np.array(self.hamming_threshold),
+            manifest_fingerprint=np.array(self.manifest_fingerprint or ""),
+        )
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def _band_keys(self, value: int) -> List[Tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [(band, (value >> (band * self.band_bits)) & mask) for band in range(self.bands)]
+
+    def _rebuild_maps(self) -> None:
+        self._exact_map = {}
+        self._buckets = defaultdict(list)
+        for row, (content_hash, value) in enumerate(zip(self.exact, self.simhashes)):
+            self._exact_map.setdefault(content_hash, row)
+            if value:
+                for key in self._band_keys(value):
+                    self._buckets[key].append(row)
+
+    def _append(self, chunk_id: str, file_id: str, content_hash: str, value: int) -> None:
+        row = len(self.chunk_ids)
+        self.chunk_ids.append(chunk_id)
+        self.file_ids.append(file_id)
+        self.exact.append(content_hash)
+        self.simhashes.append(value)
+        self._exact_map.setdefault(content_hash, row)
+        if value:
+            for key in self._band_keys(value):
+                self._buckets[key].append(row)
+        self._dirty = True
+
+    def find_duplicate(self, text: str) -> Tuple[Optional[str], str, int]:
+        """-> (matching chunk_id or None, exact hash, simhash) for an incoming chunk"""
+        content_hash = exact_hash(text)
+        row = self._exact_map.get(content_hash)
+        if row is not None:
+            return self.chunk_ids[row], content_hash, 0
+
+        value, feature_count = simhash(text)
+        if feature_count < self.min_features:
+            return None, content_hash, 0
+
+        for key in self._band_keys(value):
+            for row in self._buckets.get(key, ()):
+                if bin(self.simhashes[row] ^ value).count("1") <= self.hamming_threshold:
+                    return self.chunk_ids[row], content_hash, value
+        return None, content_hash, value
+
+    def add_if_unique(self, chunk_id: str, file_id: str, text: str) -> Optional[str]:
+        """Register the chunk unless it duplicates an indexed one; returns the duplicate's chunk_id"""
+        duplicate_of, content_hash, value = self.find_duplicate(text)
+        if duplicate_of is None:
+            self._append(chunk_id, file_id, content_hash, value)
+        return duplicate_of
+
+    def add(self, chunk_id: str, file_id: str, text: str) -> None:
+        """Register a chunk unconditionally (used when rebuilding from the vector store)"""
+        value, feature_count = simhash(text)
+        self._append(chunk_id, file_id, exact_hash(text), value if feature_count >= self.min_features else 0)
+
+    def remove_file(self, file_id: str) -> int:
+        keep = [row for row, fid in enumerate(self.file_ids) if fid != file_id]
+        removed = len(self.file_ids) - len(keep)
+        if removed:
+            self.chunk_ids = [self.chunk_ids[row] for row in keep]
+            self.file_ids = [self.file_ids[row] for row in keep]
+            self.exact = [self.exact[row] for row in keep]
+            self.simhashes = [self.simhashes[row] for row in keep]
+            self._rebuild_maps()
+            self._dirty = True
+        return removed
+
+    def clear(self) -> None:
+        self.chunk_ids, self.file_ids, self.exact, self.simhashes = [], [], [], []
+        self._exact_map, self._buckets = {}, defaultdict(list)
+        self.manifest_fingerprint = None
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+
+class ReferenceSectionFilter:
+    """Per-document detector for reference-list chunks (feed chunks in document order)
+
+    A chunk is treated as references once a "참고문헌"/"References" heading has been seen,
+    until an English abstract or appendix starts (common after the references in Korean
+    papers), or when most of its lines look like citations.
+    """
+
+    def __init__(self, citation_ratio: float = 0.6, min_lines: int = 4):
+        self.citation_ratio = citation_ratio
+        self.min_lines = min_lines
+        self.in_references = False
+
+    def is_reference(self, text: str) -> bool:
+        if self.in_references:
+            if _AFTER_REFERENCES.search(text):
+                self.in_references = False
+                return False
+            return True
+
+        heading = _REFERENCE_HEADING.search(text)
+        if heading:
+            self.in_references = True
+            # Drop the heading chunk only if it is mostly the reference list itself
+            return heading.start() < len(text) / 2
+
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) < self.min_lines:
+            return False
+        citations = sum(1 for line in lines if _CITATION_LINE.search(line))
+        return citations / len(lines) >= self.citation_ratio
@@ -0,0 +1,109 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import re
+import hashlib
+import logging
+from typing import List, Optional, Sequence, Set
+
+# Custom imports
+from schemas.data_schemas import DocumentSearchResult, PackedContext
+from utils.token_utils import TokenUtils
+from .sparse_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+_SPACE_PATTERN = re.compile(r"[ \t ]+")
+_NEWLINE_PATTERN = re.compile(r"\s*\n\s*")
+
+
+def compact_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines"""
+    text = _SPACE_PATTERN.sub(" ", text)
+    return _NEWLINE_PATTERN.sub("\n", text).strip()
+
+
+def strip_overlap(previous: str, current: str, min_overlap: int = 20, max_overlap: int = 400) -> str:
+    """Remove the prefix of current that repeats the tail of previous (splitter chunk_overlap)"""
+    for size in range(min(len(previous), len(current), max_overlap), min_overlap - 1, -1):
+        if previous.endswith(current[:size]):
+            return current[size:].lstrip()
+    return current
+
+
+def format_citation(result: DocumentSearchResult, index: int) -> str:
+    metadata = result.metadata or {}
+    source = metadata.get("file_name") or result.file_path or "unknown"
+    page = metadata.get("page")
+    return f"[{index}] {source}" + (f" p.{int(page) + 1}" if isinstance(page, (int, float)) else "")
+
+
+class ContextPacker:
+    """Pack retrieved chunks into a citation-formatted context under a token budget
+
+    Chunks are taken best score first. Exact duplicates (normalized content hash) and
+    near duplicates (token-set containment against already packed chunks) are dropped,
+    the splitter overlap between neighbouring chunks of the same file is trimmed, and
+    packing stops once the budget is spent, truncating the last chunk if enough room is left.
+    """
+
+    def __init__(self, token_budget: int = 3000, near_duplicate_threshold: float = 0.8,
+                 min_chunk_tokens: int = 64):
+        self.token_budget = token_budget
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.min_chunk_tokens = min_chunk_tokens
+
+    def pack(self, results: Sequence[DocumentSearchResult], token_budget: Optional[int] = None) -> PackedContext:
+        budget = self.token_budget if token_budget is None else token_budget
+        ordered = sorted(results, key=lambda result: result.score, reverse=True)
+
+        seen_hashes: Set[str] = set()
+        packed_tokens: List[Set[str]] = []
+        last_text_by_file = {}
+        blocks, sources = [], []
+        used = dropped_duplicates = dropped_budget = 0
+
+        for position, result in enumerate(ordered):
+            text = compact_text(result.content)
+            content_hash = hashlib.sha1(text.lower().encode("utf-8")).hexdigest()
+            if not text or content_hash in seen_hashes:
+                dropped_duplicates += 1
+                continue
+
+            terms = set(tokenize(text))
+            if terms and any(len(terms & other) / len(terms) >= self.near_duplicate_threshold
+                             for other in packed_tokens):
+                dropped_duplicates += 1
+                continue
+
+            file_key = result.metadata.get("file_id") or result.file_path
+            if file_key in last_text_by_file:
+                text = strip_overlap(last_text_by_file[file_key], text)
+
+            header = format_citation(result, len(blocks) + 1)
+            cost = TokenUtils.estimate_tokens(header) + TokenUtils.estimate_tokens(text) + 2
+            remaining = budget - used
+            if cost > remaining:
+                room = remaining - TokenUtils.estimate_tokens(header) - 2
+                if room < self.min_chunk_tokens:
+                    dropped_budget += len(ordered) - position
+                    break
+                text = TokenUtils.truncate_to_tokens(text, room - 1) + " …"
+                cost = TokenUtils.estimate_tokens(header) + TokenUtils.estimate_tokens(text) + 2
+
+            seen_hashes.add(content_hash)
+            packed_tokens.append(terms)
+            last_text_by_file[file_key] = compact_text(result.content)
+            blocks.append(f"{header}\n{text}")
+            sources.append(result)
+            used += cost
+
+        logger.debug(f"Packed {len(blocks)}/{len(ordered)} chunks into ~{used} tokens "
+                     f"(dropped {dropped_duplicates} duplicates, {dropped_budget} over budget)")
+        return PackedContext(
+            text="\n\n".join(blocks),
+            token_count=used,
+            sources=sources,
+            dropped_duplicates=dropped_duplicates,
+            dropped_budget=dropped_budget
+        )
@@ -0,0 +1,43 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+from typing import Union
+
+# Third-party imports
+import numpy as np
+
+# Chroma HNSW spaces: cosine (1 - cos), l2 (squared euclidean), ip (1 - dot product)
+DISTANCE_METRICS = ("cosine", "l2", "ip")
+
+
+def validate_metric(metric: str) -> str:
+    if metric not in DISTANCE_METRICS:
+        raise ValueError(f"Unsupported distance metric: {metric} (expected one of {list(DISTANCE_METRICS)})")
+    return metric
+
+
+def distance_to_similarity(distance: Union[float, np.ndarray], metric: str) -> Union[float, np.ndarray]:
+    """Convert a Chroma distance to cosine similarity (exact for unit-length embeddings)
+
+    cosine and ip distances are 1 - similarity. l2 is the squared euclidean distance,
+    which for unit vectors equals 2 - 2 * cos, so similarity is 1 - d / 2.
+    """
+    if metric == "l2":
+        return 1.0 - distance / 2.0
+    if metric in ("cosine", "ip"):
+        return 1.0 - distance
+    raise ValueError(f"Unsupported distance metric: {metric}")
+
+
+def brute_force_distances(queries: np.ndarray, vectors: np.ndarray, metric: str) -> np.ndarray:
+    """Exact (n_queries, n_vectors) distances in Chroma's convention for the metric"""
+    dots = queries @ vectors.T
+    if metric == "ip":
+        return 1.0 - dots
+    if metric == "cosine":
+        query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        vector_norms = np.linalg.norm(vectors, axis=1)
+        return 1.0 - dots / np.maximum(query_norms * vector_norms, 1e-12)
+    if metric == "l2":
+        return (queries ** 2).sum(axis=1, keepdims=True) - 2.0 * dots + (vectors ** 2).sum(axis=1)
+    raise ValueError(f"Unsupported distance metric: {metric}")
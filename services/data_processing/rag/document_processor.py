@@ -3,7 +3,7 @@ __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 # Standard imports
 import logging
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, Iterator, List, Optional, Tuple, Union
 
 # Third-party imports
 from langchain_community.document_loaders import (
@@ -15,6 +15,11 @@ from langchain_community.document_loaders import (
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
+# Custom imports
+from .fast_loaders import fast_loader_for, sniff_encoding
+from .index_manifest import file_content_hash
+from .parsed_text_cache import ParsedTextCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,14 +27,20 @@ class DocumentProcessor:
     """Document processing and text chunking utility"""
 
     SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.xlsx', '.xls', '.md', '.markdown')
+    # Bytes read to sniff the encoding of plain text files on the fallback path
+    ENCODING_SAMPLE_BYTES = 64 * 1024
 
     def __init__(self,
                  chunk_size: int = 600,
                  chunk_overlap: int = 0,
-                 separators: Optional[List[str]] = None):
+                 separators: Optional[List[str]] = None,
+                 parsed_text_cache: Optional[ParsedTextCache] = None,
+                 fast_loaders: bool = True):
 
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.parsed_text_cache = parsed_text_cache
+        self.fast_loaders = fast_loaders
 
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
@@ -44,11 +55,20 @@ class DocumentProcessor:
         file_path = Path(file_path)
         return file_path.suffix.lower() in self.SUPPORTED_EXTENSIONS
 
-    def get_loader_for_file(self, file_path: Union[str, Path]):
-        """Get appropriate document loader for file type"""
+    def get_loader_for_file(self, file_path: Union[str, Path], fallback: bool = False):
+        """Get appropriate document loader for file type
+
+        Native fast loaders (single-pass text, Markdown sections, read-only Excel rows) are
+        preferred; fallback=True forces the original TextLoader/Unstructured loaders.
+        """
         file_path = Path(file_path)
         suffix = file_path.suffix.lower()
 
+        if self.fast_loaders and not fallback:
+            loader = fast_loader_for(str(file_path))
+            if loader is not None:
+                return loader
+
         try:
             if suffix == '.pdf':
                 return PyPDFLoader(str(file_path))
@@ -65,31 +85,29 @@ class DocumentProcessor:
             raise
 
     def _create_text_loader(self, file_path: str):
-        """Create TextLoader with proper encoding handling"""
-        # 시도할 인코딩 순서
-        encodings = ['utf-8', 'utf-8-sig', 'cp949', 'euc-kr', 'latin-1']
-
-        for encoding in encodings:
-            try:
-                # 파일을 해당 인코딩으로 읽어보기 테스트
-                with open(file_path, 'r', encoding=encoding) as f:
-                    f.read(100)  # 처음 100자만 읽어서 테스트
-
-                # 성공하면 해당 인코딩으로 TextLoader 생성
-                return TextLoader(file_path, encoding=encoding)
-
-            except (UnicodeDecodeError, UnicodeError):
-                continue
-            except Exception as e:
-                logger.warning(f"Error testing encoding {encoding} for {file_path}: {e}")
-                continue
-
-        # 모든 인코딩 실패 시 기본값으로 시도
-        logger.warning(f"Could not detect encoding for {file_path}, using utf-8 with error handling")
-        return TextLoader(file_path, encoding='utf-8', autodetect_encoding=True)
+        """Create TextLoader with the encoding sniffed from the start of the file"""
+        with open(file_path, "rb") as f:
+            sample = f.read(self.ENCODING_SAMPLE_BYTES)
+        # 샘플 이후에서 디코딩이 실패하면 TextLoader가 인코딩을 다시 감지
+        return TextLoader(file_path, encoding=sniff_encoding(sample), autodetect_encoding=True)
+
+    def load_document(self, file_path: Union[str, Path], content_hash: Optional[str] = None) -> List[Document]:
+        """Load document from file, reusing cached extracted text when available
+
+        Args:
+            file_path: Document path
+            content_hash: sha256 of the file contents if already known (computed on demand)
+        """
+        try:
+            documents = list(self.iter_pages(file_path, content_hash))
+            logger.debug(f"Loaded {len(documents)} documents from {file_path}")
+            return documents
+        except Exception as e:
+            logger.error(f"Failed to load document {file_path}: {e}")
+            raise
 
-    def load_document(self, file_path: Union[str, Path]) -> List[Document]:
-        """Load document from file"""
+    def iter_pages(self, file_path: Union[str, Path], content_hash: Optional[str] = None) -> Iterator[Document]:
+        """Stream pages one at a time via loader.lazy_load(), teeing them into the parsed text cache"""
         file_path = Path(file_path)
 
         if not file_path.exists():
@@ -98,14 +116,62 @@ class DocumentProcessor:
         if not self.is_supported_file(file_path):
             raise ValueError(f"Unsupported file type: {file_path.suffix}")
 
+        if self.parsed_text_cache is None:
+            yield from self._lazy_load(file_path)
+            return
+
+        content_hash = content_hash or file_content_hash(str(file_path))
+        if content_hash in self.parsed_text_cache:
+            logger.debug(f"Parsed text cache hit: {file_path}")
+            yielded = 0
+            try:
+                for page in self.parsed_text_cache.iter_pages(content_hash, str(file_path)):
+                    yielded += 1
+                    yield page
+                return
+            except (OSError, EOFError, ValueError, KeyError):
+                if yielded:
+                    raise
+                # Unreadable entry was dropped before any page was consumed - parse the file instead
+
+        with self.parsed_text_cache.writer(content_hash) as writer:
+            for page in self._lazy_load(file_path):
+                writer.write(page)
+                yield page
+
+    def _lazy_load(self, file_path: Path) -> Iterator[Document]:
+        """Stream pages from the preferred loader, falling back if it fails before the first page"""
+        loader = self.get_loader_for_file(file_path)
+        yielded = 0
         try:
-            loader = self.get_loader_for_file(file_path)
-            documents = loader.load()
-            logger.debug(f"Loaded {len(documents)} documents from {file_path}")
-            return documents
+            for page in loader.lazy_load():
+                yielded += 1
+                yield page
+            return
         except Exception as e:
-            logger.error(f"Failed to load document {file_path}: {e}")
-            raise
+            fallback = self.get_loader_for_file(file_path, fallback=True)
+            if yielded or type(fallback) is type(loader):
+                raise
+            logger.warning(f"{type(loader).__name__} failed for {file_path} ({e}), "
+                           f"falling back to {type(fallback).__name__}")
+        yield from fallback.lazy_load()
+
+    def iter_chunk_batches(self, file_path: Union[str, Path], content_hash: Optional[str] = None,
+                           pages_per_batch: int = 16) -> Iterator[Tuple[int, List[Document]]]:
+        """Stream (page count, chunks) per batch of pages
+
+        Pages are only read when the caller asks for the next batch, so memory stays bounded
+        by one batch regardless of document size. The splitter works per page, so the chunks
+        are identical to process_document().
+        """
+        pages = []
+        for page in self.iter_pages(file_path, content_hash):
+            pages.append(page)
+            if len(pages) >= pages_per_batch:
+                yield len(pages), self.text_splitter.split_documents(pages)
+                pages = []
+        if pages:
+            yield len(pages), self.text_splitter.split_documents(pages)
 
     def split_documents(self, documents: List[Document]) -> List[Document]:
         """Split documents into chunks"""
@@ -117,10 +183,10 @@ class DocumentProcessor:
             logger.error(f"Failed to split documents: {e}")
             raise
 
-    def process_document(self, file_path: Union[str, Path]) -> List[Document]:
+    def process_document(self, file_path: Union[str, Path], content_hash: Optional[str] = None) -> List[Document]:
         """Load and process document into chunks"""
         try:
-            documents = self.load_document(file_path)
+            documents = self.load_document(file_path, content_hash)
             chunks = self.split_documents(documents)
             logger.info(f"Processed {file_path}: {len(documents)} docs -> {len(chunks)} chunks")
             return chunks
@@ -147,6 +213,39 @@ class DocumentProcessor:
         return all_chunks
 
 
+# Process pool worker state (one DocumentProcessor per worker process)
+_worker_processor: Optional[DocumentProcessor] = None
+_worker_queue: Optional[Any] = None  # multiprocessing queue shared with the main process
+
+
+def init_document_worker(chunk_size: int, chunk_overlap: int, parsed_text_cache_dir: Optional[str] = None,
+                         fast_loaders: bool = True, batch_queue: Optional[Any] = None) -> None:
+    """ProcessPoolExecutor initializer - build the worker's DocumentProcessor once"""
+    global _worker_processor, _worker_queue
+    _worker_processor = DocumentProcessor(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        parsed_text_cache=ParsedTextCache(parsed_text_cache_dir) if parsed_text_cache_dir else None,
+        fast_loaders=fast_loaders
+    )
+    _worker_queue = batch_queue
+
+
+def stream_document_task(file_path: str, content_hash: Optional[str] = None, pages_per_batch: int = 16) -> None:
+    """Parse and chunk a single file inside a worker process, streaming page batches to the worker queue
+
+    Puts (file_path, page count, chunks, False, None) per batch of pages, then
+    (file_path, 0, [], True, error message or None) once the file is done. The queue is bounded,
+    so the worker blocks while the main process is behind on storing batches.
+    """
+    try:
+        for page_count, chunks in _worker_processor.iter_chunk_batches(file_path, content_hash, pages_per_batch):
+            _worker_queue.put((file_path, page_count, chunks, False, None))
+        _worker_queue.put((file_path, 0, [], True, None))
+    except Exception as e:
+        _worker_queue.put((file_path, 0, [], True, str(e)))
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
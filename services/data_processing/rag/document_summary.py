@@ -0,0 +1,66 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import re
+from pathlib import Path
+from typing import Iterable, List
+
+# Custom imports
+from .context_packer import compact_text
+
+# Text from the start of the document scanned for the abstract and keywords (theses put
+# the abstract after the license page and table of contents)
+SUMMARY_SOURCE_CHARS = 20000
+
+_ABSTRACT_HEADING = re.compile(
+    r"^\s*[<\[]?\s*(?:국\s*문\s*초\s*록|초\s*록|요\s*약|abstract)\s*[>\]]?\s*[:：]?",
+    re.IGNORECASE | re.MULTILINE
+)
+# Table-of-contents dot leaders ("요약 ········ i")
+_LEADER_PATTERN = re.compile(r"(?:[·.…‥․ㆍ]\s*){4,}")
+_BOILERPLATE_PATTERN = re.compile(r"저작자표시|이용허락|copyright|all rights reserved", re.IGNORECASE)
+_KEYWORDS_LINE = re.compile(
+    r"(?:주\s*제\s*어|핵\s*심\s*어|키\s*워\s*드|key\s*words?)\s*[:：]\s*([^\n]+)",
+    re.IGNORECASE
+)
+
+
+def _is_front_matter(text: str) -> bool:
+    """License notices and table-of-contents pages"""
+    return bool(_LEADER_PATTERN.search(text) or _BOILERPLATE_PATTERN.search(text))
+
+
+def summary_source(texts: Iterable[str], max_chars: int = SUMMARY_SOURCE_CHARS) -> List[str]:
+    """Leading texts of a document (in order) up to max_chars, the input of build_document_summary"""
+    head, total = [], 0
+    for text in texts:
+        if total >= max_chars:
+            break
+        head.append(text)
+        total += len(text)
+    return head
+
+
+def build_document_summary(file_path: str, texts: Iterable[str], abstract_chars: int = 1200) -> str:
+    """Document-level text for the summary vector: title, keywords and abstract
+
+    The title is the file name (papers are stored under their titles). Keywords come from a
+    "주제어"/"Keywords" line, and the abstract from the text following a "국문초록"/"요약"/
+    "Abstract" heading, falling back to the opening text without license and contents pages.
+    """
+    texts = summary_source(texts)
+    head = "\n".join(texts)
+    parts = [Path(file_path).stem]
+
+    keywords = _KEYWORDS_LINE.search(head)
+    if keywords:
+        parts.append(compact_text(keywords.group(1))[:200])
+
+    abstract = "\n".join(text for text in texts if not _is_front_matter(text)) or head
+    for heading in _ABSTRACT_HEADING.finditer(head):
+        # Skip table-of-contents entries, whose heading is followed by dot leaders
+        if not _LEADER_PATTERN.search(head[heading.end():heading.end() + 80]):
+            abstract = head[heading.end():]
+            break
+    parts.append(compact_text(_LEADER_PATTERN.sub(" ", abstract))[:abstract_chars])
+    return "\n".join(part for part in parts if part)
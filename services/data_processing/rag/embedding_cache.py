@@ -0,0 +1,386 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Callable, Dict, List, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Third-party imports
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+# Custom imports
+from config import settings
+from .embedding_server import EmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text so that trivially different copies share a cache key"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, held across processes (re-entrant within one thread is not supported)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self._file = open(self.path, "a+b")
+        if os.name == "nt":
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s
+                    continue
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class EmbeddingCache:
+    """Memory-mapped embedding store keyed by (model name, normalized text hash)
+
+    Layout (one directory per model):
+        vectors.f32  - float32 matrix of shape (capacity, dim), memory mapped
+        keys.bin     - 20-byte sha1 digest per slot (empty slot = all zeros)
+        ticks.bin    - int64 last-access counter per slot, used for LRU eviction
+        meta.json    - model name, dim, capacity, access counter, write counter
+        cache.lock   - inter-process write lock
+
+    Several processes (e.g. document workers) may share a directory. Writes hold the file lock
+    and first reload the slot table if meta.json shows another process wrote since; reads check
+    the key stored in the slot, so a slot that was evicted or reused elsewhere counts as a miss.
+    """
+
+    KEY_SIZE = 20
+    INITIAL_CAPACITY = 1024
+    EVICT_RATIO = 0.1
+
+    def __init__(self, cache_dir: str, model_name: str, max_bytes: int = 512 * 1024 * 1024):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.cache_dir = os.path.join(cache_dir, re.sub(r"[^\w.-]+", "_", model_name))
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(self._path("cache.lock"))
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.counter = 0
+        self.writes = 0  # write counter of the slot table this process has loaded
+        self.hits = 0
+        self.misses = 0
+
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._ticks: Optional[np.memmap] = None
+        self._slots: Dict[bytes, int] = {}
+        self._free: List[int] = []
+
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path("meta.json")):
+            return
+
+        try:
+            with self._file_lock:
+                self._sync()
+            logger.info(f"Embedding cache loaded: {len(self._slots)} vectors ({self.cache_dir})")
+        except Exception as e:
+            logger.warning(f"Discarding unreadable embedding cache {self.cache_dir}: {e}")
+            self._reset_state()
+
+    def _sync(self) -> None:
+        """Reload the slot table if another process wrote since it was loaded (call under the file lock)"""
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model_name") != self.model_name:
+            raise ValueError(f"cache belongs to {meta.get('model_name')}")
+        if self._vectors is not None and meta.get("writes", 0) == self.writes:
+            return
+
+        self._vectors = self._keys = self._ticks = None
+        self.dim = meta["dim"]
+        self.capacity = meta["capacity"]
+        self.counter = max(self.counter, meta.get("counter", 0))
+        self.writes = meta.get("writes", 0)
+        self._open_arrays("r+")
+
+        occupied = self._keys.any(axis=1)
+        self._slots = {self._keys[slot].tobytes(): slot for slot in np.flatnonzero(occupied).tolist()}
+        self._free = np.flatnonzero(~occupied).tolist()
+
+    def _reset_state(self) -> None:
+        self._vectors = self._keys = self._ticks = None
+        self.dim, self.capacity, self.counter, self.writes = None, 0, 0, 0
+        self._slots, self._free = {}, []
+
+    def _open_arrays(self, mode: str) -> None:
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode=mode,
+                                  shape=(self.capacity, self.dim))
+        self._keys = np.memmap(self._path("keys.bin"), dtype=np.uint8, mode=mode,
+                               shape=(self.capacity, self.KEY_SIZE))
+        self._ticks = np.memmap(self._path("ticks.bin"), dtype=np.int64, mode=mode,
+                                shape=(self.capacity,))
+
+    @property
+    def max_slots(self) -> int:
+        return max(1, self.max_bytes // (self.dim * 4 + self.KEY_SIZE + 8))
+
+    def _grow(self) -> None:
+        """Double capacity (bounded by max_bytes) by extending the backing files"""
+        new_capacity = min(max(self.capacity * 2, self.INITIAL_CAPACITY), self.max_slots)
+        if self._vectors is not None:
+            self._flush()
+            self._vectors = self._keys = self._ticks = None
+
+        for name, row_bytes in (("vectors.f32", self.dim * 4), ("keys.bin", self.KEY_SIZE), ("ticks.bin", 8)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+
+        self._free.extend(range(self.capacity, new_capacity))
+        self.capacity = new_capacity
+        self._open_arrays("r+")
+
+    def _evict(self) -> None:
+        """Free the least recently used slots (keys are cleared first so readers stop trusting them)"""
+        n_evict = max(1, int(self.capacity * self.EVICT_RATIO))
+        victims = np.argpartition(self._ticks, n_evict - 1)[:n_evict]
+        for slot in victims.tolist():
+            self._slots.pop(self._keys[slot].tobytes(), None)
+            self._keys[slot] = 0
+            self._free.append(slot)
+        logger.debug(f"Evicted {n_evict} cached embeddings")
+
+    def _allocate(self) -> int:
+        if not self._free:
+            if self.capacity < self.max_slots:
+                self._grow()
+            else:
+                self._evict()
+        return self._free.pop()
+
+    def key(self, text: str, namespace: str = "doc") -> bytes:
+        payload = f"{self.model_name}\x00{namespace}\x00{normalize_text(text)}"
+        return hashlib.sha1(payload.encode("utf-8")).digest()
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[List[float]]]:
+        with self._lock:
+            results = []
+            for key in keys:
+                vector = self._read_slot(key)
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                results.append(vector)
+            return results
+
+    def _read_slot(self, key: bytes) -> Optional[List[float]]:
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        key_row = np.frombuffer(key, dtype=np.uint8)
+        # Another process may have evicted or reused the slot since the table was loaded
+        if not np.array_equal(self._keys[slot], key_row):
+            del self._slots[key]
+            return None
+        vector = self._vectors[slot].tolist()
+        if not np.array_equal(self._keys[slot], key_row):
+            return None
+        self.counter += 1
+        self._ticks[slot] = self.counter
+        return vector
+
+    def put_many(self, keys: List[bytes], vectors: List[List[float]]) -> None:
+        if not keys:
+            return
+
+        with self._lock, self._file_lock:
+            self._sync()
+            if self.dim is None:
+                self.dim = len(vectors[0])
+            for key, vector in zip(keys, vectors):
+                slot = self._slots.get(key)
+                self.counter += 1
+                if slot is None:
+                    slot = self._allocate()
+                    # Vector before key: a concurrent reader never pairs the key with a stale vector
+                    self._vectors[slot] = vector
+                    self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                    self._slots[key] = slot
+                else:
+                    self._vectors[slot] = vector
+                self._ticks[slot] = self.counter
+            self.writes += 1
+            self._flush()
+
+    def _flush(self) -> None:
+        """Persist the arrays and meta.json (call under the file lock)"""
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        self._keys.flush()
+        self._ticks.flush()
+
+        meta = {
+            "model_name": self.model_name,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "counter": self.counter,
+            "writes": self.writes,
+        }
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only runs the model for texts missing from the cache"""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def _embed(self, texts: List[str], namespace: str) -> List[List[float]]:
+        keys = [self.cache.key(text, namespace) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Duplicate texts within a batch are embedded once
+        missing: Dict[bytes, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+
+        if missing:
+            if namespace == "query" and len(missing) == 1:
+                computed = [self.embeddings.embed_query(text) for text in missing.values()]
+            else:
+                computed = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(list(missing.keys()), computed)
+            computed_by_key = dict(zip(missing.keys(), computed))
+            vectors = [vector if vector is not None else computed_by_key[key]
+                       for key, vector in zip(keys, vectors)]
+
+        logger.debug(f"Embedded {len(texts)} texts ({len(missing)} computed, {len(texts) - len(missing)} cached)")
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "doc")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries with a single model forward pass"""
+        return self._embed(texts, "query")
+
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings that create the underlying model on first use (e.g. first query after startup)"""
+
+    def __init__(self, factory: Callable[[], Embeddings]):
+        self._factory = factory
+        self._embeddings: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    self._embeddings = self._factory()
+        return self._embeddings
+
+    def is_loaded(self) -> bool:
+        return self._embeddings is not None
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        if hasattr(self.embeddings, "embed_queries"):
+            return self.embeddings.embed_queries(texts)
+        return self.embeddings.embed_documents(texts)
+
+
+def uncached_embeddings(embeddings: Embeddings) -> Embeddings:
+    """Same model without the on-disk cache, for transient text (e.g. chat turns) that should not evict chunks"""
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embeddings
+    if isinstance(embeddings, LazyEmbeddings):
+        return LazyEmbeddings(lambda: uncached_embeddings(embeddings.embeddings))
+    if isinstance(embeddings, EmbeddingClient):
+        return EmbeddingClient(embeddings.url, timeout=embeddings.timeout, cache=False,
+                               model_name=embeddings.model_name)
+    return embeddings
+
+
+def build_embeddings(embedding_model: str, persist_directory: str,
+                     cache_dir: Optional[str] = None, cache_mb: Optional[int] = None,
+                     server_url: Optional[str] = None) -> Embeddings:
+    """Create the embedding model, wrapped with the on-disk cache unless cache_mb is 0
+
+    With an embedding server url (argument or rag.embedding_server_url) this returns an
+    EmbeddingClient instead: the model and its cache live in the server process only. The client
+    refuses to embed if the server reports a different model than embedding_model.
+    """
+    server_url = settings.rag_embedding_server_url if server_url is None else server_url
+    if server_url:
+        logger.info(f"Using embedding server {server_url} for {embedding_model}")
+        return EmbeddingClient(server_url, model_name=embedding_model)
+
+    embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
+
+    cache_mb = settings.rag_embedding_cache_mb if cache_mb is None else cache_mb
+    if cache_mb <= 0:
+        return embeddings
+
+    cache = EmbeddingCache(
+        cache_dir=cache_dir or os.path.join(persist_directory, "embedding_cache"),
+        model_name=embedding_model,
+        max_bytes=cache_mb * 1024 * 1024
+    )
+    return CachedEmbeddings(embeddings, cache)
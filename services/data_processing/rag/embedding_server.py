@@ -0,0 +1,377 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Local embedding server shared by RAG worker processes
+#
+# One process loads the sentence-transformers model (behind the on-disk embedding cache)
+# and serves it over localhost HTTP; workers embed through EmbeddingClient instead of
+# loading their own copy. Concurrent requests are merged by a micro-batcher: the first
+# request opens a short window (window_ms) and everything that arrives within it, up to
+# max_batch texts, goes through the model in one forward pass.
+#
+#   python -m services.data_processing.rag.embedding_server --port 8765
+#   # config-*.yml: rag.embedding_server_url: "http://127.0.0.1:8765"
+
+# Standard imports
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+from typing import Any, Dict, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Third-party imports
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_KINDS = ("doc", "query")
+
+
+class _PendingRequest:
+    __slots__ = ("texts", "kind", "cache", "done", "vectors", "error")
+
+    def __init__(self, texts: List[str], kind: str, cache: bool = True):
+        self.texts = texts
+        self.kind = kind
+        self.cache = cache
+        self.done = threading.Event()
+        self.vectors: Optional[np.ndarray] = None
+        self.error: Optional[Exception] = None
+
+
+class MicroBatcher:
+    """Merges concurrent embed requests into shared model calls on a single worker thread
+
+    uncached_embeddings is the same model without the on-disk cache, used for requests that
+    opt out of caching (transient text such as chat turns); defaults to embeddings.
+    """
+
+    def __init__(self, embeddings: Embeddings, window_ms: float = 5.0, max_batch: int = 256,
+                 uncached_embeddings: Optional[Embeddings] = None):
+        self.embeddings = embeddings
+        self.uncached_embeddings = uncached_embeddings or embeddings
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+        self._queue: "queue.Queue[Optional[_PendingRequest]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str], kind: str = "doc", cache: bool = True) -> np.ndarray:
+        """Block until the texts are embedded -> (len(texts), dim) float32"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        request = _PendingRequest(texts, kind, cache)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.vectors
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "texts_per_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _collect(self, first: _PendingRequest) -> List[_PendingRequest]:
+        """Gather requests arriving within the window after the first one, up to max_batch texts"""
+        pending, count = [first], len(first.texts)
+        deadline = time.monotonic() + self.window
+        while count < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # leave the stop signal for the run loop
+                break
+            pending.append(request)
+            count += len(request.texts)
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = self._collect(first)
+            for kind in EMBEDDING_KINDS:
+                for cache in (True, False):
+                    group = [request for request in pending if request.kind == kind and request.cache == cache]
+                    if group:
+                        self._embed_group(group, kind, cache)
+
+    def _embed_group(self, group: List[_PendingRequest], kind: str, cache: bool = True) -> None:
+        texts = [text for request in group for text in request.texts]
+        model = self.embeddings if cache else self.uncached_embeddings
+        try:
+            if kind == "query" and hasattr(model, "embed_queries"):
+                vectors = model.embed_queries(texts)
+            elif kind == "query" and len(texts) == 1:
+                vectors = [model.embed_query(texts[0])]
+            else:
+                vectors = model.embed_documents(texts)
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+            for request in group:
+                request.error = e
+                request.done.set()
+            return
+
+        self.requests += len(group)
+        self.batches += 1
+        self.texts += len(texts)
+        offset = 0
+        for request in group:
+            request.vectors = matrix[offset:offset + len(request.texts)]
+            offset += len(request.texts)
+            request.done.set()
+
+
+class _EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    """POST /embed {"texts": [...], "kind": "doc" | "query", "cache": true} -> raw little-endian float32 rows
+
+    The row count and dimension are returned in the X-Embedding-Shape header; binary rows
+    avoid JSON-encoding hundreds of floats per text. GET /health returns model and batch stats.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive, clients reuse one connection per thread
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid delayed-ACK stalls
+    server: "_EmbeddingHTTPServer"
+
+    def do_POST(self) -> None:
+        if self.path != "/embed":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            texts, kind, cache = payload["texts"], payload.get("kind", "doc"), payload.get("cache", True)
+            if kind not in EMBEDDING_KINDS or not all(isinstance(text, str) for text in texts):
+                raise ValueError("expected a list of strings and kind 'doc' or 'query'")
+            if not isinstance(cache, bool):
+                raise ValueError("cache must be a boolean")
+        except Exception as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        try:
+            vectors = self.server.batcher.submit(texts, kind, cache)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        body = np.ascontiguousarray(vectors, dtype="<f4").tobytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Embedding-Shape", f"{vectors.shape[0]},{vectors.shape[1]}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self._send_json(200, {"model": self.server.model_name, **self.server.batcher.stats()})
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class _EmbeddingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, batcher: MicroBatcher, model_name: str):
+        super().__init__(address, _EmbeddingRequestHandler)
+        self.batcher = batcher
+        self.model_name = model_name
+
+
+class EmbeddingServer:
+    """Localhost HTTP embedding server around one Embeddings instance
+
+    Args:
+        embeddings: Model shared by all clients (typically CachedEmbeddings from build_embeddings)
+        model_name: Reported by /health
+        host: Bind address, localhost only by default
+        port: 0 picks a free port (see .url)
+        window_ms: Micro-batching window opened by the first request of a batch
+        max_batch: Texts per model call before the window closes early
+        uncached_embeddings: Same model without the on-disk cache, for requests with "cache": false
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str = "", host: str = "127.0.0.1",
+                 port: int = 0, window_ms: float = 5.0, max_batch: int = 256,
+                 uncached_embeddings: Optional[Embeddings] = None):
+        self.batcher = MicroBatcher(embeddings, window_ms=window_ms, max_batch=max_batch,
+                                    uncached_embeddings=uncached_embeddings)
+        self.httpd = _EmbeddingHTTPServer((host, port), self.batcher, model_name)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "EmbeddingServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="embedding-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Embedding server listening on {self.url}")
+        return self
+
+    def serve_forever(self) -> None:
+        logger.info(f"Embedding server listening on {self.url}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.httpd.server_close()
+        self.batcher.close()
+
+
+class EmbeddingClient(Embeddings):
+    """Embeddings backed by an EmbeddingServer, so the worker process never loads the model
+
+    With cache=False the server embeds without reading or writing its on-disk cache. With a
+    model_name, the first request checks GET /health and raises if the server runs another
+    model: vectors from a different model would silently mix into the index.
+    """
+
+    def __init__(self, url: str, timeout: float = 120.0, cache: bool = True, model_name: Optional[str] = None):
+        parsed = urlsplit(url)
+        if parsed.scheme != "http" or not parsed.hostname:
+            raise ValueError(f"Unsupported embedding server url: {url}")
+        self.url = url
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.cache = cache
+        self.model_name = model_name
+        self._verified = not model_name
+        self._verify_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _drop_connection(self, connection: http.client.HTTPConnection) -> None:
+        connection.close()
+        self._local.connection = None
+
+    def _send(self, method: str, path: str, body: Optional[bytes] = None,
+              headers: Optional[Dict[str, str]] = None) -> Tuple[http.client.HTTPResponse, bytes]:
+        while True:
+            reused = getattr(self._local, "connection", None) is not None
+            connection = self._connection()
+            try:
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+                payload = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closes idle keep-alive connections: retry once on a new one, never a fresh one
+                self._drop_connection(connection)
+                if not reused:
+                    raise
+            except Exception:
+                # Timeouts are not retried: the request may still be running on the server
+                self._drop_connection(connection)
+                raise
+        if response.status != 200:
+            raise RuntimeError(f"Embedding server {self.url} returned {response.status}: {payload[:200]!r}")
+        return response, payload
+
+    def _verify_model(self) -> None:
+        """Raise ValueError if the server does not run the expected model (checked once per client)"""
+        with self._verify_lock:
+            if self._verified:
+                return
+            _, payload = self._send("GET", "/health")
+            server_model = json.loads(payload).get("model")
+            if server_model != self.model_name:
+                raise ValueError(
+                    f"Embedding server {self.url} runs model {server_model!r}, expected {self.model_name!r}"
+                )
+            self._verified = True
+
+    def _request(self, texts: List[str], kind: str) -> List[List[float]]:
+        if not texts:
+            return []
+        if not self._verified:
+            self._verify_model()
+        body = json.dumps({"texts": texts, "kind": kind, "cache": self.cache}, ensure_ascii=False).encode("utf-8")
+        response, payload = self._send("POST", "/embed", body, {"Content-Type": "application/json"})
+        rows, dim = (int(value) for value in response.getheader("X-Embedding-Shape").split(","))
+        return np.frombuffer(payload, dtype="<f4").reshape(rows, dim).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._request(list(texts), "doc")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._request([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries with a single request"""
+        return self._request(list(texts), "query")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shared local embedding server for RAG workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--persist-directory", default=None, help="Embedding cache location (default: chroma path)")
+    parser.add_argument("--cache-mb", type=int, default=None, help="Embedding cache size, 0 disables it")
+    parser.add_argument("--window-ms", type=float, default=5.0, help="Micro-batching window")
+    parser.add_argument("--max-batch", type=int, default=256, help="Texts per model call")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from config import settings
+    from .embedding_cache import build_embeddings, uncached_embeddings
+
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    # server_url="" keeps the server on the local model even when embedding_server_url is configured
+    model = build_embeddings(args.model, args.persist_directory or settings.chroma_path,
+                             cache_mb=args.cache_mb, server_url="")
+    EmbeddingServer(model, model_name=args.model, host=args.host, port=args.port,
+                    window_ms=args.window_ms, max_batch=args.max_batch,
+                    uncached_embeddings=uncached_embeddings(model)).serve_forever()
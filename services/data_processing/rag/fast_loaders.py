@@ -0,0 +1,207 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import re
+import codecs
+import logging
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Third-party imports
+import chardet
+from langchain_core.document_loaders import BaseLoader
+from langchain.schema import Document
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# Strict C-codec decodes are far cheaper than chardet; Korean CP949 is the common non-UTF-8 input
+_STRICT_ENCODINGS = ("utf-8", "cp949")
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+
+
+def _bom_encoding(data: bytes) -> Optional[str]:
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding
+    return None
+
+
+def _chardet_encoding(data: bytes, sample_size: int) -> str:
+    detected = chardet.detect(data[:sample_size])
+    encoding = (detected.get("encoding") or "").lower()
+    # chardet reports Korean ANSI files as EUC-KR; CP949 is its superset and decodes the extra syllables
+    if encoding in ("euc-kr", "iso-2022-kr", ""):
+        encoding = "cp949"
+    return encoding
+
+
+def sniff_encoding(data: bytes, sample_size: int = 64 * 1024) -> str:
+    """Detect the encoding of already-read bytes (BOM, strict UTF-8, strict CP949, then chardet on a sample)
+
+    data may be a prefix of the file: a multi-byte character cut at the end does not fail the strict decode.
+    """
+    encoding = _bom_encoding(data)
+    if encoding:
+        return encoding
+    for encoding in _STRICT_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(data, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return _chardet_encoding(data, sample_size)
+
+
+def read_text(file_path: str, sample_size: int = 64 * 1024) -> Tuple[str, str]:
+    """Read a text file once and decode it with the sniffed encoding -> (text, encoding)
+
+    The strict decode attempts double as the sniff, so UTF-8 and CP949 files are decoded
+    exactly once; chardet only runs for anything else.
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+
+    encoding = _bom_encoding(data)
+    if encoding is None:
+        for candidate in _STRICT_ENCODINGS:
+            try:
+                return data.decode(candidate), candidate
+            except UnicodeDecodeError:
+                continue
+        encoding = _chardet_encoding(data, sample_size)
+    try:
+        return data.decode(encoding), encoding
+    except (UnicodeDecodeError, LookupError):
+        logger.warning(f"Decoding {file_path} as {encoding} failed, replacing invalid bytes")
+        return data.decode("utf-8", errors="replace"), "utf-8"
+
+
+class SniffingTextLoader(BaseLoader):
+    """Plain text loader that reads the file once instead of probing encodings one by one"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[Document]:
+        text, encoding = read_text(self.file_path)
+        yield Document(page_content=text, metadata={"source": self.file_path, "encoding": encoding})
+
+
+class MarkdownSectionLoader(BaseLoader):
+    """Markdown loader emitting one document per heading section
+
+    Headings inside fenced code blocks are ignored. Each section carries its heading path
+    ("Intro > Setup") so chunks keep their context after splitting.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[Document]:
+        text, encoding = read_text(self.file_path)
+        headings: List[str] = []
+        lines: List[str] = []
+        in_fence = False
+        index = 0
+
+        for line in text.splitlines():
+            if _FENCE_PATTERN.match(line):
+                in_fence = not in_fence
+            match = None if in_fence else _HEADING_PATTERN.match(line)
+            if match:
+                section = self._section(lines, headings, index, encoding)
+                if section:
+                    yield section
+                    index += 1
+                level = len(match.group(1))
+                headings = headings[:level - 1] + [match.group(2)]
+                lines = [line]
+            else:
+                lines.append(line)
+
+        section = self._section(lines, headings, index, encoding)
+        if section:
+            yield section
+
+    def _section(self, lines: List[str], headings: List[str], index: int, encoding: str) -> Optional[Document]:
+        content = "\n".join(lines).strip()
+        if not content:
+            return None
+        return Document(page_content=content, metadata={
+            "source": self.file_path,
+            "section": " > ".join(headings),
+            "section_index": index,
+            "encoding": encoding,
+        })
+
+
+class ExcelRowLoader(BaseLoader):
+    """Read-only, row-streaming .xlsx loader
+
+    Rows are read with openpyxl in read-only mode and emitted in blocks of rows_per_document
+    per sheet, each block prefixed with the sheet's header row, so a large workbook is never
+    materialized in memory.
+    """
+
+    def __init__(self, file_path: str, rows_per_document: int = 50):
+        self.file_path = file_path
+        self.rows_per_document = rows_per_document
+
+    @staticmethod
+    def _format_row(row: tuple) -> str:
+        """Cells joined with " | ", without the empty trailing cells of the sheet's used range"""
+        cells = ["" if value is None else str(value) for value in row]
+        while cells and not cells[-1].strip():
+            cells.pop()
+        return " | ".join(cells)
+
+    def lazy_load(self) -> Iterator[Document]:
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                header, rows, first_row, last_row, emitted = None, [], 1, 1, False
+                for row_number, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+                    line = self._format_row(row)
+                    if not line:
+                        continue
+                    if header is None:
+                        header, first_row = line, row_number + 1
+                        continue
+                    rows.append(line)
+                    last_row = row_number
+                    if len(rows) >= self.rows_per_document:
+                        yield self._document(sheet.title, header, rows, first_row, row_number)
+                        rows, first_row, emitted = [], row_number + 1, True
+
+                if rows or (header is not None and not emitted):
+                    yield self._document(sheet.title, header, rows, first_row, last_row)
+        finally:
+            workbook.close()
+
+    def _document(self, sheet: str, header: Optional[str], rows: List[str], first_row: int, last_row: int) -> Document:
+        content = "\n".join([header] + rows) if header else "\n".join(rows)
+        return Document(page_content=content, metadata={
+            "source": self.file_path,
+            "sheet": sheet,
+            "row_start": first_row,
+            "row_end": max(first_row, last_row),
+        })
+
+
+def fast_loader_for(file_path: str) -> Optional[BaseLoader]:
+    """Lightweight native loader for the file, or None if the format needs the fallback path"""
+    suffix = Path(file_path).suffix.lower()
+    if suffix == ".txt":
+        return SniffingTextLoader(file_path)
+    if suffix in (".md", ".markdown"):
+        return MarkdownSectionLoader(file_path)
+    if suffix == ".xlsx":
+        return ExcelRowLoader(file_path)
+    return None
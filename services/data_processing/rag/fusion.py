@@ -0,0 +1,50 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import hashlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Third-party imports
+from langchain.schema import Document
+
+
+def document_key(doc: Document) -> str:
+    """Stable identity for a retrieved chunk (chunk_id, falling back to a content hash)"""
+    chunk_id = doc.metadata.get("chunk_id") if doc.metadata else None
+    if chunk_id:
+        return chunk_id
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(
+        ranked_lists: Sequence[Sequence[Tuple[Document, float]]],
+        k: int = 60,
+        weights: Optional[Sequence[float]] = None,
+        key_fn: Callable[[Document], str] = document_key,
+) -> List[Tuple[Document, float]]:
+    """Merge ranked result lists with reciprocal-rank fusion
+
+    Each hit contributes weight / (k + rank) to its chunk's fused score, so chunks
+    returned by several queries rise to the top and appear only once.
+
+    Args:
+        ranked_lists: Per-query lists of (document, score), best first
+        k: RRF smoothing constant
+        weights: Optional per-list weights (default 1.0 each)
+        key_fn: Function mapping a document to its dedup key
+
+    Returns:
+        (document, fused score) sorted by fused score descending
+    """
+    weights = weights or [1.0] * len(ranked_lists)
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, (doc, _) in enumerate(ranked, start=1):
+            key = key_fn(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            documents.setdefault(key, doc)
+
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(documents[key], score) for key, score in fused]
@@ -0,0 +1,159 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def file_content_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """Compute sha256 of file contents in fixed-size blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    """Indexed file record"""
+    file_id: str
+    file_path: str
+    content_hash: str
+    mtime: float
+    size: int
+    chunk_count: int = 0
+    chunking: str = ""  # splitter parameters the chunks were produced with
+    dropped_chunks: int = 0  # duplicate/reference chunks skipped at index time
+    duplicate_owners: List[str] = field(default_factory=list)  # other files holding the kept copies of dropped chunks
+    stale: bool = False  # re-index on the next sync even if the file itself is unchanged
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        """True if mtime and size are unchanged since indexing"""
+        return self.mtime == stat.st_mtime and self.size == stat.st_size
+
+
+class IndexManifest:
+    """Persistent manifest of indexed files keyed by file_id
+
+    Stored as JSON next to the Chroma collection so that unchanged files can be
+    skipped across process restarts with a single stat() call.
+    """
+
+    VERSION = 1
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.entries: Dict[str, ManifestEntry] = {}
+        self._dirty = False
+        self._fingerprint: Optional[str] = None
+        self.load()
+
+    def load(self) -> None:
+        """Load manifest from disk (missing or corrupt files start empty)"""
+        self.entries = {}
+        self._fingerprint = None
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                logger.warning(f"Manifest version mismatch, rebuilding: {self.manifest_path}")
+                return
+            self.entries = {
+                file_id: ManifestEntry(**entry)
+                for file_id, entry in data.get("files", {}).items()
+            }
+            logger.debug(f"Loaded manifest with {len(self.entries)} files")
+        except Exception as e:
+            logger.warning(f"Failed to load manifest {self.manifest_path}: {e}")
+            self.entries = {}
+
+    def save(self) -> None:
+        """Atomically write manifest to disk if it changed"""
+        if not self._dirty:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "files": {file_id: asdict(entry) for file_id, entry in self.entries.items()},
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+
+    def get(self, file_id: str) -> Optional[ManifestEntry]:
+        return self.entries.get(file_id)
+
+    def update(self, entry: ManifestEntry) -> None:
+        self.entries[entry.file_id] = entry
+        self._dirty = True
+        self._fingerprint = None
+
+    def remove(self, file_id: str) -> Optional[ManifestEntry]:
+        entry = self.entries.pop(file_id, None)
+        if entry is not None:
+            self._dirty = True
+            self._fingerprint = None
+        return entry
+
+    def mark_dependents_stale(self, file_ids: Iterable[str]) -> List[ManifestEntry]:
+        """Flag entries whose dropped duplicates were kept in one of file_ids, returning them
+
+        Those chunks exist only as the owner's copy, so removing or re-indexing an owner
+        requires the dependent files to be indexed again.
+        """
+        owners = set(file_ids)
+        marked = []
+        for entry in self.entries.values():
+            if entry.file_id not in owners and not entry.stale and owners.intersection(entry.duplicate_owners):
+                entry.stale = True
+                marked.append(entry)
+        if marked:
+            self._dirty = True
+        return marked
+
+    def clear(self) -> None:
+        if self.entries:
+            self.entries = {}
+            self._dirty = True
+            self._fingerprint = None
+
+    def fingerprint(self) -> str:
+        """Hash of indexed contents - changes whenever a file is added, modified or removed"""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for file_id in sorted(self.entries):
+                entry = self.entries[file_id]
+                digest.update(f"{file_id}:{entry.content_hash}:{entry.chunk_count}:{entry.chunking}\n".encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def total_chunks(self) -> int:
+        """Sum of per-file chunk counts"""
+        return sum(entry.chunk_count for entry in self.entries.values())
+
+    def files_under(self, directory_path: str) -> List[ManifestEntry]:
+        """Entries whose file lives inside the given directory"""
+        root = os.path.join(os.path.abspath(directory_path), "")
+        return [
+            entry for entry in self.entries.values()
+            if os.path.abspath(entry.file_path).startswith(root)
+        ]
+
+    def __contains__(self, file_id: str) -> bool:
+        return file_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
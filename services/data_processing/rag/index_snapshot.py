@@ -0,0 +1,165 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import io
+import json
+import shutil
+import tarfile
+import logging
+import hashlib
+from datetime import datetime, timezone
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Tuple
+
+# Custom imports
+from .index_manifest import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_METADATA = "snapshot.json"
+SNAPSHOT_INDEX_DIR = "index"
+# Rebuildable caches that are not part of the index itself
+EXCLUDED_DIRS = ("embedding_cache", "parsed_text", "snapshots")
+
+
+@dataclass
+class SnapshotInfo:
+    """snapshot.json - what the archive contains and how it was built"""
+    version: str
+    collection_name: str
+    vector_backend: str
+    embedding_model: str
+    chunking: str = ""
+    hybrid: bool = True
+    hierarchical: bool = False
+    manifest_fingerprint: str = ""
+    file_count: int = 0
+    chunk_count: int = 0
+    created_at: str = ""
+    format_version: int = SNAPSHOT_FORMAT_VERSION
+    files: Dict[str, Dict] = field(default_factory=dict)  # relative path -> {"sha256", "size"}
+
+    def to_json(self) -> bytes:
+        return json.dumps(asdict(self), ensure_ascii=False, indent=2).encode("utf-8")
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "SnapshotInfo":
+        payload = json.loads(data)
+        if payload.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {payload.get('format_version')}")
+        return cls(**payload)
+
+
+def _index_files(source_dir: str) -> Dict[str, str]:
+    """Relative archive path -> absolute path for every index file under source_dir"""
+    files = {}
+    for root, dirs, names in os.walk(source_dir):
+        dirs[:] = sorted(name for name in dirs if name not in EXCLUDED_DIRS)
+        for name in sorted(names):
+            if ".tmp" in name:
+                continue
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, source_dir).replace(os.sep, "/")] = path
+    return files
+
+
+def export_snapshot(source_dir: str, archive_path: str, info: SnapshotInfo, compress: bool = False) -> SnapshotInfo:
+    """Write the index files under source_dir and a checksummed snapshot.json into one tar archive
+
+    Uncompressed by default: the vectors barely compress and deployments are bounded by copy speed.
+    """
+    files = _index_files(source_dir)
+    info.files = {
+        relative: {"sha256": file_content_hash(path), "size": os.path.getsize(path)}
+        for relative, path in files.items()
+    }
+    info.created_at = info.created_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+    tmp_path = f"{archive_path}.tmp"
+    metadata = info.to_json()
+    with tarfile.open(tmp_path, "w:gz" if compress else "w") as archive:
+        member = tarfile.TarInfo(SNAPSHOT_METADATA)
+        member.size = len(metadata)
+        archive.addfile(member, io.BytesIO(metadata))
+        for relative, path in files.items():
+            archive.add(path, arcname=f"{SNAPSHOT_INDEX_DIR}/{relative}", recursive=False)
+    os.replace(tmp_path, archive_path)
+
+    total = sum(entry["size"] for entry in info.files.values())
+    logger.info(f"Exported snapshot {info.version} ({len(files)} files, {total / 1e6:.1f}MB) to {archive_path}")
+    return info
+
+
+def read_snapshot_info(archive_path: str) -> SnapshotInfo:
+    with tarfile.open(archive_path, "r:*") as archive:
+        return SnapshotInfo.from_json(archive.extractfile(SNAPSHOT_METADATA).read())
+
+
+def verify_snapshot(index_dir: str, info: SnapshotInfo) -> None:
+    """Raise ValueError if any index file is missing or differs from its recorded checksum"""
+    for relative, expected in info.files.items():
+        path = os.path.join(index_dir, *relative.split("/"))
+        if not os.path.isfile(path):
+            raise ValueError(f"Snapshot file missing: {relative}")
+        if os.path.getsize(path) != expected["size"] or file_content_hash(path) != expected["sha256"]:
+            raise ValueError(f"Snapshot checksum mismatch: {relative}")
+
+
+def _safe_members(archive: tarfile.TarFile, target_dir: str):
+    """Regular files and directories that stay inside target_dir"""
+    root = os.path.realpath(target_dir)
+    for member in archive.getmembers():
+        destination = os.path.realpath(os.path.join(root, member.name))
+        if not (member.isfile() or member.isdir()) or os.path.commonpath([root, destination]) != root:
+            raise ValueError(f"Unsafe snapshot member: {member.name}")
+        yield member
+
+
+def mount_snapshot(snapshot_path: str, mount_root: str) -> Tuple[str, SnapshotInfo]:
+    """Make a snapshot available as a persist directory -> (index directory, info)
+
+    snapshot_path is an archive written by export_snapshot or an already extracted directory
+    (containing snapshot.json). Archives are extracted once into mount_root/<collection>-<version>-<hash>
+    and verified against their checksums; later mounts of the same archive reuse that directory.
+    """
+    if os.path.isdir(snapshot_path):
+        with open(os.path.join(snapshot_path, SNAPSHOT_METADATA), "rb") as f:
+            info = SnapshotInfo.from_json(f.read())
+        index_dir = os.path.join(snapshot_path, SNAPSHOT_INDEX_DIR)
+        verify_snapshot(index_dir, info)
+        return index_dir, info
+
+    with tarfile.open(snapshot_path, "r:*") as archive:
+        metadata = archive.extractfile(SNAPSHOT_METADATA).read()
+        info = SnapshotInfo.from_json(metadata)
+        snapshot_id = f"{info.collection_name}-{info.version}-{hashlib.sha256(metadata).hexdigest()[:12]}"
+        target_dir = os.path.join(mount_root, snapshot_id)
+        index_dir = os.path.join(target_dir, SNAPSHOT_INDEX_DIR)
+        if os.path.exists(os.path.join(target_dir, SNAPSHOT_METADATA)):
+            logger.info(f"Snapshot {snapshot_id} already mounted at {target_dir}")
+            return index_dir, info
+
+        tmp_dir = f"{target_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            extract_options = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+            archive.extractall(tmp_dir, members=_safe_members(archive, tmp_dir), **extract_options)
+            verify_snapshot(os.path.join(tmp_dir, SNAPSHOT_INDEX_DIR), info)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    try:
+        os.replace(tmp_dir, target_dir)  # snapshot.json is present only in verified mounts
+    except OSError:
+        # Another process mounted the same snapshot first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(target_dir, SNAPSHOT_METADATA)):
+            raise
+
+    logger.info(f"Mounted snapshot {snapshot_id} ({info.chunk_count} chunks, {info.file_count} files)")
+    return index_dir, info
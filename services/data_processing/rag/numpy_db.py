@@ -0,0 +1,751 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import json
+import uuid
+import shutil
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Custom imports
+from config import settings
+from .distance import distance_to_similarity
+from .embedding_cache import build_embeddings
+from .quantization import VectorCodec
+
+logger = logging.getLogger(__name__)
+
+
+def match_where(metadata: Dict[str, Any], where: Optional[Dict]) -> bool:
+    """Evaluate a Chroma-style metadata filter ($and/$or, $eq/$ne/$in/$nin)"""
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(match_where(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(match_where(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force cosine search over a normalized float32 matrix
+
+    A query is a single matrix-vector product followed by argpartition, which for tens of
+    thousands of chunks beats HNSW client overhead. Scores are cosine distances
+    (1 - cosine similarity), matching Chroma's convention.
+
+    Storage is append-only, so a write costs O(rows written) instead of rewriting the corpus:
+    - `embeddings.<generation>.f32`: raw float32 rows, memory-mapped with spare capacity
+    - `segments.<generation>/<start row>.json`: ids, texts and metadata of the rows one write appended
+    - `tombstones.<generation>.i64`: rows removed by delete or replaced by an upsert
+    - `manifest.json`: generation, dimension and committed row/tombstone counts, replaced last so
+      an interrupted write leaves the previous state
+    Tombstoned rows are skipped at query time; compact() rewrites the live rows into a new
+    generation, and runs automatically once tombstones or segments pile up.
+
+    With quantization ("float16"/"int8") and/or pca_dims, a compressed copy of the matrix is held
+    in memory for first-pass scoring, and only the top k * rescore_factor candidates are rescored
+    against the memory-mapped float32 rows. The codec is fitted on the first write of a generation
+    (`codec.<generation>.npz`) and later writes only append their own codes (`codes.<generation>.bin`).
+    It is refitted by compaction, which is triggered once the corpus outgrew the fit
+    (codec_refit_growth) or too many int8 codes of new rows saturate.
+    """
+
+    # Rows the matrix file is first sized for; capacity doubles when it fills up
+    MIN_CAPACITY_ROWS = 1024
+    # Rows copied at a time while compacting
+    COMPACT_BLOCK_ROWS = 65536
+    # Share of clipped int8 codes in newly encoded rows that marks the codec as drifted
+    MAX_CODE_SATURATION = 0.01
+
+    def __init__(self, embedding: Embeddings, directory: str, quantization: Optional[str] = None,
+                 pca_dims: Optional[int] = None, rescore_factor: int = 4,
+                 compact_dead_ratio: float = 0.3, max_segments: int = 512, codec_refit_growth: float = 4.0):
+        self.embedding = embedding
+        self.directory = directory
+        self.codec = VectorCodec(quantization, pca_dims)
+        self.rescore_factor = max(1, rescore_factor)
+        self.compact_dead_ratio = compact_dead_ratio
+        self.max_segments = max(1, max_segments)
+        self.codec_refit_growth = codec_refit_growth
+        self._lock = threading.Lock()
+
+        # Per physical row, including tombstoned rows until the next compaction
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._id_index: Dict[str, int] = {}  # live rows only
+        self._value_rows: Dict[str, Dict[Any, np.ndarray]] = {}  # metadata key -> value -> rows
+        self._generation = 0
+        self._dim = 0
+        self._deleted = 0
+        self._segments = 0
+        self._buffer: Optional[np.memmap] = None  # (capacity, dim)
+        self._live = np.zeros(0, dtype=bool)      # (capacity,)
+        self._codes_buffer: Optional[np.ndarray] = None  # (code capacity, width), in memory
+        self._codes: Optional[np.ndarray] = None         # view of the encoded rows
+        self._codec_drifted = False
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def _matrix(self) -> np.ndarray:
+        if self._buffer is None:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        return self._buffer[:len(self.ids)]
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def _matrix_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"embeddings.{generation}.f32")
+
+    def _segments_dir(self, generation: int) -> str:
+        return os.path.join(self.directory, f"segments.{generation}")
+
+    def _tombstones_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"tombstones.{generation}.i64")
+
+    def _codec_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"codec.{generation}.npz")
+
+    def _codes_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"codes.{generation}.bin")
+
+    @staticmethod
+    def _write_json(path: str, payload: Dict[str, Any]) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    """Loading"""
+
+    def _load(self) -> None:
+        if not os.path.exists(self._manifest_path):
+            self._import_legacy()
+            return
+
+        with open(self._manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._generation, self._dim = manifest["generation"], manifest["dim"]
+        rows, self._deleted = manifest["rows"], manifest["deleted"]
+        self._remove_other_generations()
+
+        # Segments at or beyond the committed row count come from an interrupted write
+        segments_dir = self._segments_dir(self._generation)
+        names = sorted(os.listdir(segments_dir)) if os.path.isdir(segments_dir) else []
+        for name in names:
+            path = os.path.join(segments_dir, name)
+            if not name.endswith(".json") or int(name[:-5]) >= rows:
+                os.remove(path)
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                segment = json.load(f)
+            self.ids.extend(segment["ids"])
+            self.texts.extend(segment["documents"])
+            self.metadatas.extend(segment["metadatas"])
+            self._segments += 1
+
+        if rows:
+            self._map_matrix(os.path.getsize(self._matrix_path(self._generation)) // (self._dim * 4))
+            self._live[:rows] = True
+            tombstones_path = self._tombstones_path(self._generation)
+            if os.path.exists(tombstones_path):
+                self._live[np.fromfile(tombstones_path, dtype=np.int64, count=self._deleted)] = False
+                with open(tombstones_path, "r+b") as f:
+                    f.truncate(self._deleted * 8)
+        self._id_index = {doc_id: row for row, doc_id in enumerate(self.ids) if self._live[row]}
+
+        if self.codec.enabled and self.ids:
+            self._load_codes()
+
+    def _load_codes(self) -> None:
+        """Compressed rows of this generation, refitted when missing, short or written with other settings"""
+        rows, path = len(self.ids), self._codes_path(self._generation)
+        if self.codec.load(self._codec_path(self._generation)) and os.path.exists(path):
+            width = self.codec.width(self._dim)
+            codes = np.fromfile(path, dtype=self.codec.dtype, count=rows * width)
+            if codes.size == rows * width:
+                with open(path, "r+b") as f:
+                    f.truncate(codes.nbytes)  # drop codes of an interrupted write
+                self._codes_buffer = codes.reshape(rows, width)
+                self._codes = self._codes_buffer
+                return
+        self._fit_codes()
+
+    def _remove_other_generations(self) -> None:
+        """Files of older generations left by an interrupted compaction"""
+        current = {os.path.basename(path) for path in (
+            self._matrix_path(self._generation), self._segments_dir(self._generation),
+            self._tombstones_path(self._generation), self._codec_path(self._generation),
+            self._codes_path(self._generation))}
+        for name in os.listdir(self.directory):
+            if name.split(".")[0] in ("embeddings", "segments", "tombstones", "codec", "codes") \
+                    and name not in current and name.split(".")[1].isdigit():
+                path = os.path.join(self.directory, name)
+                shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+
+    def _import_legacy(self) -> None:
+        """Convert a store written as a single embeddings.npy + metadata.json"""
+        matrix_path = os.path.join(self.directory, "embeddings.npy")
+        metadata_path = os.path.join(self.directory, "metadata.json")
+        if not (os.path.exists(matrix_path) and os.path.exists(metadata_path)):
+            return
+
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar["ids"]:
+            self._append(sidecar["documents"], np.load(matrix_path, mmap_mode="r"),
+                         sidecar["metadatas"], sidecar["ids"])
+        for path in (matrix_path, metadata_path, os.path.join(self.directory, "embeddings.codes.npz")):
+            if os.path.exists(path):
+                os.remove(path)
+
+    """Writing"""
+
+    def _map_matrix(self, capacity: int) -> None:
+        """(Re)map the matrix file of the current generation with room for capacity rows"""
+        path = self._matrix_path(self._generation)
+        self._buffer = None  # release the old mapping before resizing the file
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.truncate(capacity * self._dim * 4)
+        self._buffer = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        live = np.zeros(capacity, dtype=bool)
+        live[:min(len(self._live), capacity)] = self._live[:capacity]
+        self._live = live
+
+    def _fit_codes(self) -> None:
+        """Fit the codec on the current rows and rewrite the compressed copy of this generation"""
+        self._codes_buffer, self._codes, self._codec_drifted = None, None, False
+        for path in (self._codec_path(self._generation), self._codes_path(self._generation)):
+            if os.path.exists(path):
+                os.remove(path)
+        if not self.ids:
+            return
+        self.codec.fit(self._matrix)
+        codes = self.codec.encode(self._matrix)
+        codes.tofile(self._codes_path(self._generation))
+        self.codec.save(self._codec_path(self._generation))
+        self._codes_buffer = self._codes = codes
+
+    def _append_codes(self, start: int, vectors: np.ndarray) -> None:
+        """Encode only the new rows with the fitted codec"""
+        codes = self.codec.encode(vectors)
+        with open(self._codes_path(self._generation), "ab") as f:
+            f.write(codes.tobytes())
+
+        end = start + len(codes)
+        if len(self._codes_buffer) < end:
+            buffer = np.empty((max(end, len(self._codes_buffer) * 2), codes.shape[1]), dtype=codes.dtype)
+            buffer[:start] = self._codes_buffer[:start]
+            self._codes_buffer = buffer
+        self._codes_buffer[start:end] = codes
+        self._codes = self._codes_buffer[:end]
+        if self.codec.saturation(codes) > self.MAX_CODE_SATURATION:
+            self._codec_drifted = True
+
+    def _commit(self) -> None:
+        """Publish the written rows and tombstones"""
+        self._write_json(self._manifest_path, {"generation": self._generation, "dim": self._dim,
+                                               "rows": len(self.ids), "deleted": self._deleted})
+        self._value_rows = {}
+
+    def _append(self, texts: List[str], vectors: np.ndarray, metadatas: List[dict], ids: List[str]) -> None:
+        """Append normalized vectors; an existing id is tombstoned and re-appended (upsert)"""
+        if not self.ids:
+            self._dim = vectors.shape[1]
+        start, end = len(self.ids), len(self.ids) + len(vectors)
+        replaced, rows = [], {}
+        for offset, doc_id in enumerate(ids):
+            previous = rows.get(doc_id, self._id_index.get(doc_id))
+            if previous is not None:
+                replaced.append(previous)
+            rows[doc_id] = start + offset
+
+        os.makedirs(self._segments_dir(self._generation), exist_ok=True)
+        capacity = len(self._buffer) if self._buffer is not None else 0
+        if end > capacity:
+            self._map_matrix(max(end, capacity * 2, self.MIN_CAPACITY_ROWS))
+        self._buffer[start:end] = vectors
+        self._buffer.flush()
+        self._write_json(os.path.join(self._segments_dir(self._generation), f"{start:012d}.json"),
+                         {"ids": ids, "documents": texts, "metadatas": metadatas})
+
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas)
+        self._live[start:end] = True
+        self._id_index.update(rows)
+        self._segments += 1
+        self._tombstone(replaced)
+        if self.codec.enabled:
+            if self._codes is None:
+                self._fit_codes()
+            else:
+                self._append_codes(start, vectors)
+        self._commit()
+        self._maybe_compact()
+
+    def _tombstone(self, rows: List[int]) -> None:
+        if not rows:
+            return
+        with open(self._tombstones_path(self._generation), "ab") as f:
+            f.write(np.asarray(rows, dtype=np.int64).tobytes())
+        self._live[rows] = False
+        self._deleted += len(rows)
+
+    def _codec_stale(self) -> bool:
+        if self._codes is None:
+            return False
+        return self._codec_drifted or len(self.ids) >= self.codec_refit_growth * max(1, self.codec.fitted_rows)
+
+    def _maybe_compact(self) -> None:
+        if self._deleted > self.compact_dead_ratio * len(self.ids) or self._segments > self.max_segments \
+                or self._codec_stale():
+            self._compact()
+
+    def compact(self) -> None:
+        """Drop tombstoned rows, merge segments and refit the codec into a new generation"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        live = np.flatnonzero(self._live[:len(self.ids)])
+        previous, generation = self._generation, self._generation + 1
+
+        if len(live):
+            os.makedirs(self._segments_dir(generation), exist_ok=True)
+            matrix = np.memmap(self._matrix_path(generation), dtype=np.float32, mode="w+",
+                               shape=(max(len(live), self.MIN_CAPACITY_ROWS), self._dim))
+            for begin in range(0, len(live), self.COMPACT_BLOCK_ROWS):
+                block = live[begin:begin + self.COMPACT_BLOCK_ROWS]
+                matrix[begin:begin + len(block)] = self._buffer[block]
+            matrix.flush()
+            del matrix
+
+        self.ids = [self.ids[row] for row in live]
+        self.texts = [self.texts[row] for row in live]
+        self.metadatas = [self.metadatas[row] for row in live]
+        if len(live):
+            self._write_json(os.path.join(self._segments_dir(generation), f"{0:012d}.json"),
+                             {"ids": self.ids, "documents": self.texts, "metadatas": self.metadatas})
+
+        self._buffer, self._live = None, np.zeros(0, dtype=bool)
+        self._generation, self._deleted, self._segments = generation, 0, 1 if len(live) else 0
+        if len(live):
+            self._map_matrix(max(len(live), self.MIN_CAPACITY_ROWS))
+            self._live[:len(live)] = True
+        self._id_index = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        if self.codec.enabled:
+            self._fit_codes()
+        self._commit()
+        self._remove_other_generations()
+        logger.debug(f"Compacted {self.directory} to generation {generation} ({len(live)} rows)")
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = self._normalize(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32))
+
+        with self._lock:
+            self._append(texts, vectors, list(metadatas), list(ids))
+        return ids
+
+    """Searching"""
+
+    def _live_mask(self) -> Optional[np.ndarray]:
+        """Mask of non-tombstoned rows, None when every row is live"""
+        if len(self._id_index) == len(self.ids):
+            return None
+        return self._live[:len(self.ids)]
+
+    def _candidate_rows(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """Rows for a single-key $eq/$in filter (e.g. file_id) via a cached value index, else None
+
+        Lets filtered searches score only the matching rows instead of the whole matrix.
+        """
+        if not where or len(where) != 1:
+            return None
+        key, condition = next(iter(where.items()))
+        if key.startswith("$"):
+            return None
+        if isinstance(condition, dict):
+            if len(condition) != 1 or next(iter(condition)) not in ("$eq", "$in"):
+                return None
+            op, operand = next(iter(condition.items()))
+            values = operand if op == "$in" else [operand]
+        else:
+            values = [condition]
+
+        if key not in self._value_rows:
+            grouped: Dict[Any, List[int]] = {}
+            for row in sorted(self._id_index.values()):
+                value = self.metadatas[row].get(key)
+                if isinstance(value, (str, int, float, bool)):
+                    grouped.setdefault(value, []).append(row)
+            self._value_rows[key] = {value: np.asarray(rows, dtype=np.int64) for value, rows in grouped.items()}
+        index = self._value_rows[key]
+        parts = [index[value] for value in dict.fromkeys(values) if value in index]
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def _filter_mask(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        live = self._live_mask()
+        if not where:
+            return live
+        mask = np.fromiter((match_where(metadata, where) for metadata in self.metadatas),
+                           dtype=bool, count=len(self.metadatas))
+        return mask & live if live is not None else mask
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        if len(scores) > k:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(scores[top])[::-1]]
+
+    def _results(self, scores: np.ndarray, k: int, mask: Optional[np.ndarray],
+                 rows: Optional[np.ndarray] = None) -> List[Tuple[Document, float]]:
+        """Top-k documents for one score vector (rows maps positions to matrix rows when scoring a subset)"""
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        results = []
+        for position in self._top_k(scores, k).tolist():
+            if scores[position] == -np.inf:
+                continue
+            row = int(rows[position]) if rows is not None else position
+            doc = Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]), id=self.ids[row])
+            results.append((doc, float(1.0 - scores[position])))
+        return results
+
+    def _rescored_results(self, query: np.ndarray, approximate: np.ndarray, k: int,
+                          mask: Optional[np.ndarray], rows: Optional[np.ndarray]) -> List[Tuple[Document, float]]:
+        """Pick k * rescore_factor candidates by compressed score, rank them by exact float32 score"""
+        if mask is not None:
+            approximate = np.where(mask, approximate, -np.inf)
+        candidates = self._top_k(approximate, k * self.rescore_factor)
+        candidates = np.sort(candidates[approximate[candidates] > -np.inf])
+        matrix_rows = rows[candidates] if rows is not None else candidates
+        exact = np.asarray(self._matrix[matrix_rows], dtype=np.float32) @ query
+        return self._results(exact, k, None, matrix_rows)
+
+    def similarity_search_by_vector_with_relevance_scores(
+            self, embedding: List[float], k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.batch_search_by_vectors([embedding], k=k, filter=filter)[0]
+
+    def batch_search_by_vectors(self, embeddings: List[List[float]], k: int = 4,
+                                filter: Optional[Dict] = None) -> List[List[Tuple[Document, float]]]:
+        """Score every query against the matrix with a single matrix-matrix product"""
+        with self._lock:
+            if not self._id_index:
+                return [[] for _ in embeddings]
+            queries = self._normalize(np.asarray(embeddings, dtype=np.float32))
+            rows = self._candidate_rows(filter)
+            if rows is not None and not len(rows):
+                return [[] for _ in embeddings]
+            mask = self._filter_mask(filter) if rows is None else None
+
+            if self._codes is not None:
+                codes = self._codes[rows] if rows is not None else self._codes
+                approximate = self.codec.scores(codes, queries)
+                return [self._rescored_results(query, row_scores, k, mask, rows)
+                        for query, row_scores in zip(queries, approximate)]
+
+            matrix = self._matrix[rows] if rows is not None else self._matrix
+            scores = queries @ matrix.T
+            return [self._results(row_scores, k, mask, rows) for row_scores in scores]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(
+            self.embedding.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, **kwargs: Any) -> Dict:
+        """Chroma-compatible get returning ids, documents and metadatas"""
+        with self._lock:
+            if ids is not None:
+                rows = [self._id_index[doc_id] for doc_id in ids if doc_id in self._id_index]
+            else:
+                rows = sorted(self._id_index.values())
+            rows = [row for row in rows if match_where(self.metadatas[row], where)]
+            return {
+                "ids": [self.ids[row] for row in rows],
+                "documents": [self.texts[row] for row in rows],
+                "metadatas": [self.metadatas[row] for row in rows],
+            }
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, **kwargs: Any) -> None:
+        """Tombstone the matching rows (the files are rewritten only by compaction)"""
+        with self._lock:
+            drop = {self._id_index[doc_id] for doc_id in ids or [] if doc_id in self._id_index}
+            if where:
+                drop.update(row for row in self._id_index.values() if match_where(self.metadatas[row], where))
+            if not drop:
+                return
+
+            rows = sorted(drop)
+            self._tombstone(rows)
+            for row in rows:
+                del self._id_index[self.ids[row]]
+            self._commit()
+            self._maybe_compact()
+
+    def count(self) -> int:
+        return len(self._id_index)
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Bytes of the float32 matrix vs. the copy kept in memory for scoring"""
+        full_bytes = int(len(self.ids) * self._dim * 4)
+        resident = self.codec.nbytes(self._codes) if self._codes is not None else full_bytes
+        return {
+            "vectors": self.count(),
+            "tombstoned": len(self.ids) - self.count(),
+            "quantization": self.codec.quantization,
+            "pca_dims": self.codec.pca_dims,
+            "full_precision_bytes": full_bytes,
+            "resident_bytes": resident,
+            "compression_ratio": round(full_bytes / resident, 2) if resident else 1.0,
+        }
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   *, directory: Optional[str] = None, ids: Optional[List[str]] = None,
+                   **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding=embedding, directory=directory or os.path.join(settings.chroma_path, "numpy"))
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+
+class NumpyDB:
+    """NumPy brute-force vector database with the same surface as ChromaDB"""
+
+    def __init__(self,
+                 persist_directory: Optional[str] = None,
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 collection_name: str = "documents",
+                 embedding_cache_dir: Optional[str] = None,
+                 embedding_cache_mb: Optional[int] = None,
+                 embeddings: Optional[Embeddings] = None,
+                 quantization: Optional[str] = None,
+                 pca_dims: Optional[int] = None,
+                 rescore_factor: Optional[int] = None,
+                 embedding_server_url: Optional[str] = None):
+
+        self.persist_directory = persist_directory or settings.chroma_path
+        self.embedding_model = embedding_model
+        self.collection_name = collection_name
+        self.quantization = quantization if quantization is not None else settings.rag_vector_quantization
+        self.pca_dims = pca_dims if pca_dims is not None else settings.rag_vector_pca_dims
+        self.rescore_factor = rescore_factor or settings.rag_rescore_factor
+
+        self.embeddings = embeddings or build_embeddings(embedding_model, self.persist_directory,
+                                                         embedding_cache_dir, embedding_cache_mb,
+                                                         embedding_server_url)
+        self.vectorstore = self._initialize_vectorstore()
+
+        logger.info(f"NumpyDB initialized with collection: {collection_name} ({self.vectorstore.count()} vectors)")
+
+    def _initialize_vectorstore(self) -> NumpyVectorStore:
+        return NumpyVectorStore(
+            embedding=self.embeddings,
+            directory=os.path.join(self.persist_directory, f"{self.collection_name}_numpy"),
+            quantization=self.quantization,
+            pca_dims=self.pca_dims,
+            rescore_factor=self.rescore_factor
+        )
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> None:
+        """Add documents to the vector database"""
+        try:
+            self.vectorstore.add_documents(documents, ids=ids)
+            logger.debug(f"Added {len(documents)} documents to vectorstore")
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            raise
+
+    def similarity_search(self, query: str, k: int = 10, filter_dict: Optional[Dict] = None) -> List[Document]:
+        """Perform similarity search"""
+        try:
+            return self.vectorstore.similarity_search(query, k=k, filter=filter_dict)
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}")
+            return []
+
+    def similarity_search_with_score(self, query: str, k: int = 10, filter_dict: Optional[Dict] = None) -> List[tuple]:
+        """Perform similarity search with cosine distances"""
+        try:
+            return self.vectorstore.similarity_search_with_score(query, k=k, filter=filter_dict)
+        except Exception as e:
+            logger.error(f"Similarity search with score failed: {e}")
+            return []
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed all queries in one forward pass"""
+        if hasattr(self.embeddings, "embed_queries"):
+            return self.embeddings.embed_queries(queries)
+        return self.embeddings.embed_documents(queries)
+
+    def similarity_search_batch(self, queries: List[str], k: int = 10,
+                                filter_dict: Optional[Dict] = None) -> List[List[Tuple[Document, float]]]:
+        """Embed queries in a single batch and score them with one matrix product"""
+        if not queries:
+            return []
+
+        try:
+            return self.vectorstore.batch_search_by_vectors(self.embed_queries(queries), k=k, filter=filter_dict)
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}")
+            return [[] for _ in queries]
+
+    def delete_documents(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> None:
+        """Delete documents from vectorstore"""
+        try:
+            self.vectorstore.delete(ids=ids, where=where)
+            logger.debug(f"Deleted documents with ids={ids}, where={where}")
+        except Exception as e:
+            logger.error(f"Failed to delete documents: {e}")
+            raise
+
+    def get_documents(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> Dict:
+        """Get documents from vectorstore"""
+        try:
+            return self.vectorstore.get(ids=ids, where=where)
+        except Exception as e:
+            logger.error(f"Failed to get documents: {e}")
+            return {}
+
+    def count(self) -> int:
+        """Number of stored chunks"""
+        return self.vectorstore.count()
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Full-precision vs. resident vector bytes (see NumpyVectorStore.memory_stats)"""
+        return self.vectorstore.memory_stats()
+
+    @staticmethod
+    def relevance_score(distance: float) -> float:
+        """Convert a cosine distance to cosine similarity"""
+        return float(distance_to_similarity(distance, "cosine"))
+
+    def as_retriever(self, search_kwargs: Optional[Dict] = None):
+        """Convert to retriever for use in chains"""
+        search_kwargs = search_kwargs or {"k": 10}
+        return self.vectorstore.as_retriever(search_kwargs=search_kwargs)
+
+    def reset_collection(self) -> None:
+        """Reset the entire collection by removing its files and starting an empty store"""
+        try:
+            directory = self.vectorstore.directory
+            self.vectorstore = None  # release the memory-mapped matrix before removing it
+            shutil.rmtree(directory, ignore_errors=True)
+            self.vectorstore = self._initialize_vectorstore()
+            logger.info("Collection reset successfully")
+        except Exception as e:
+            logger.error(f"Failed to reset collection: {e}")
+            raise
+
+    def close(self):
+        self.vectorstore = None
+
+
+if __name__ == "__main__":
+    # Latency comparison against Chroma on synthetic vectors (no model download required)
+    import time
+    import shutil
+    import tempfile
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    logging.basicConfig(level=logging.WARNING)
+    print("=== NumpyVectorStore vs Chroma latency ===")
+
+    embedding = DeterministicFakeEmbedding(size=384)
+    n_docs, n_queries, k = 20000, 200, 10
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n_docs, 384)).astype(np.float32)
+    queries = rng.standard_normal((n_queries, 384)).astype(np.float32).tolist()
+    ids = [f"doc_{i}" for i in range(n_docs)]
+    texts = [f"document {i}" for i in range(n_docs)]
+    metadatas = [{"file_id": f"file_{i % 50}"} for i in range(n_docs)]
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        numpy_store = NumpyVectorStore(embedding=embedding, directory=os.path.join(work_dir, "numpy"))
+        numpy_store._append(texts, NumpyVectorStore._normalize(vectors), metadatas, ids)
+
+        chroma_store = Chroma(persist_directory=os.path.join(work_dir, "chroma"), embedding_function=embedding,
+                              collection_metadata={"hnsw:space": "cosine"})
+        for start in range(0, n_docs, 5000):
+            end = start + 5000
+            chroma_store._collection.add(ids=ids[start:end], embeddings=vectors[start:end].tolist(),
+                                         documents=texts[start:end], metadatas=metadatas[start:end])
+
+        def measure(search) -> List[float]:
+            latencies = []
+            for query in queries:
+                begin = time.perf_counter()
+                search(query)
+                latencies.append((time.perf_counter() - begin) * 1000)
+            return latencies
+
+        results = {
+            "numpy": measure(lambda q: numpy_store.similarity_search_by_vector_with_relevance_scores(q, k=k)),
+            "chroma": measure(lambda q: chroma_store.similarity_search_by_vector_with_relevance_scores(q, k=k)),
+        }
+        begin = time.perf_counter()
+        numpy_store.batch_search_by_vectors(queries, k=k)
+        batch_ms = (time.perf_counter() - begin) * 1000 / n_queries
+
+        print(f"{n_docs} vectors x 384 dims, {n_queries} queries, k={k}")
+        for name, latencies in results.items():
+            print(f"  {name:7s} p50={np.percentile(latencies, 50):.2f}ms p95={np.percentile(latencies, 95):.2f}ms")
+        print(f"  numpy batched: {batch_ms:.3f}ms per query")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,126 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import gzip
+import json
+import shutil
+import logging
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+# Third-party imports
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+
+class ParsedTextCache:
+    """Extracted page text keyed by file content hash
+
+    Each parsed file is stored as gzip-compressed JSON lines, one page per line with its
+    loader metadata, so changing chunk_size/chunk_overlap re-chunks from the cache without
+    re-running PDF extraction. Path-dependent metadata ("source") is not stored and is
+    restored from the current file path on read, so renamed or copied files still hit.
+    """
+
+    # Bump when loader output changes so stale extractions are not reused
+    VERSION = 2
+    PATH_METADATA_KEYS = ("source", "file_path")
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.v{self.VERSION}.jsonl.gz")
+
+    def __contains__(self, content_hash: str) -> bool:
+        return os.path.exists(self._path(content_hash))
+
+    def iter_pages(self, content_hash: str, source: str) -> Iterator[Document]:
+        """Stream cached pages one at a time (a corrupt entry is dropped, then the error re-raised)"""
+        path = self._path(content_hash)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    yield Document(page_content=record["text"], metadata={**record["metadata"], "source": source})
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            logger.warning(f"Dropping corrupt parsed text cache entry {path}: {e}")
+            self.remove(content_hash)
+            raise
+
+    def load(self, content_hash: str, source: str) -> Optional[List[Document]]:
+        """Cached pages for content_hash, or None on a miss (corrupt entries are dropped)"""
+        if content_hash not in self:
+            return None
+
+        try:
+            pages = list(self.iter_pages(content_hash, source))
+            logger.debug(f"Parsed text cache hit: {source} ({len(pages)} pages)")
+            return pages
+        except (OSError, EOFError, ValueError, KeyError):
+            return None
+
+    def writer(self, content_hash: str) -> "ParsedTextWriter":
+        """Context manager that streams pages into the cache, committed only on a clean exit"""
+        return ParsedTextWriter(self._path(content_hash), self.PATH_METADATA_KEYS)
+
+    def store(self, content_hash: str, pages: Iterable[Document]) -> None:
+        """Write pages atomically (tmp file + rename, safe across worker processes)"""
+        try:
+            with self.writer(content_hash) as writer:
+                for page in pages:
+                    writer.write(page)
+        except OSError as e:
+            logger.warning(f"Failed to write parsed text cache for {content_hash}: {e}")
+
+    def remove(self, content_hash: str) -> None:
+        path = self._path(content_hash)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def size_bytes(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+
+class ParsedTextWriter:
+    """Streaming page writer - pages go to a per-writer tmp file renamed into place on success
+
+    If the block exits with an exception (or a consuming generator is closed early) the
+    partial file is discarded, so readers never see a truncated extraction.
+    """
+
+    def __init__(self, path: str, path_metadata_keys: Iterable[str]):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.path_metadata_keys = set(path_metadata_keys)
+        self._file = None
+        self.pages = 0
+
+    def __enter__(self) -> "ParsedTextWriter":
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8", compresslevel=6)
+        return self
+
+    def write(self, page: Document) -> None:
+        metadata = {key: value for key, value in page.metadata.items() if key not in self.path_metadata_keys}
+        self._file.write(json.dumps({"text": page.page_content, "metadata": metadata}, ensure_ascii=False))
+        self._file.write("\n")
+        self.pages += 1
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        return False
@@ -0,0 +1,138 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import logging
+from typing import Dict, Optional
+
+# Third-party imports
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_TYPES = ("float16", "int8")
+
+# Rows converted to float32 at a time while scoring, bounds the temporary copy (~25MB at 384 dims)
+_SCORE_BLOCK_ROWS = 16384
+# Rows sampled to fit PCA, the covariance of a larger corpus barely changes
+_PCA_SAMPLE_ROWS = 20000
+
+
+class VectorCodec:
+    """Compressed copy of a float32 embedding matrix used for first-pass scoring
+
+    Optionally projects vectors onto the top pca_dims principal components fitted on the
+    corpus, then stores them as float16 or as int8 with a symmetric per-dimension scale.
+    Dot products in the compressed space approximate the full-precision scores up to a
+    per-query constant, so the ranking is preserved closely enough to pick candidates
+    that are rescored against the original vectors.
+    """
+
+    def __init__(self, quantization: Optional[str] = None, pca_dims: Optional[int] = None):
+        if quantization and quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"Unsupported quantization: {quantization} (expected one of {list(QUANTIZATION_TYPES)})")
+        self.quantization = quantization or None
+        self.pca_dims = pca_dims or None
+        self.components: Optional[np.ndarray] = None  # (pca_dims, dim)
+        self.scale: Optional[np.ndarray] = None       # int8 step per (projected) dimension
+        self.fitted_rows = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.quantization or self.pca_dims)
+
+    @property
+    def params(self) -> Dict[str, str]:
+        return {"quantization": self.quantization or "", "pca_dims": str(self.pca_dims or 0)}
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype({"int8": np.int8, "float16": np.float16}.get(self.quantization, np.float32))
+
+    def width(self, dim: int) -> int:
+        """Values per encoded row"""
+        return len(self.components) if self.components is not None else dim
+
+    def fit(self, matrix: np.ndarray) -> None:
+        self.components, self.scale = None, None
+        self.fitted_rows = len(matrix)
+        dim = matrix.shape[1]
+        if self.pca_dims and self.pca_dims < dim and len(matrix) > 1:
+            sample = matrix
+            if len(matrix) > _PCA_SAMPLE_ROWS:
+                picked = np.random.default_rng(0).choice(len(matrix), size=_PCA_SAMPLE_ROWS, replace=False)
+                sample = matrix[np.sort(picked)]
+            sample = np.asarray(sample, dtype=np.float32)
+            # Right singular vectors of the centered sample are the principal axes
+            _, _, vt = np.linalg.svd(sample - sample.mean(axis=0), full_matrices=False)
+            self.components = np.ascontiguousarray(vt[:self.pca_dims], dtype=np.float32)
+
+        if self.quantization == "int8":
+            projected = self._project(matrix)
+            max_abs = np.abs(projected).max(axis=0) if len(projected) else np.ones(projected.shape[1])
+            self.scale = (np.maximum(max_abs, 1e-12) / 127.0).astype(np.float32)
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors @ self.components.T if self.components is not None else vectors
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        projected = self._project(matrix)
+        if self.quantization == "int8":
+            return np.clip(np.rint(projected / self.scale), -127, 127).astype(np.int8)
+        if self.quantization == "float16":
+            return projected.astype(np.float16)
+        return np.ascontiguousarray(projected, dtype=np.float32)
+
+    def saturation(self, codes: np.ndarray) -> float:
+        """Share of int8 codes clipped at the range limit, grows when new rows drift past the fitted scale"""
+        if self.quantization != "int8" or not codes.size:
+            return 0.0
+        return float(np.mean(np.abs(codes) == 127))
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """(n_queries, n_rows) approximate dot products between queries and encoded rows"""
+        projected = self._project(queries)
+        if self.scale is not None:
+            projected = projected * self.scale  # codes * scale @ q == codes @ (q * scale)
+        if codes.dtype == np.float32:
+            return projected @ codes.T
+
+        scores = np.empty((len(projected), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), _SCORE_BLOCK_ROWS):
+            block = codes[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = projected @ block.T
+        return scores
+
+    def nbytes(self, codes: np.ndarray) -> int:
+        extra = sum(array.nbytes for array in (self.components, self.scale) if array is not None)
+        return int(codes.nbytes + extra)
+
+    def save(self, path: str) -> None:
+        """Write the fitted projection and scale (the codes themselves are stored by the caller)"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            components=self.components if self.components is not None else np.zeros((0, 0), np.float32),
+            scale=self.scale if self.scale is not None else np.zeros(0, np.float32),
+            fitted_rows=np.array(self.fitted_rows),
+            **{key: np.array(value) for key, value in self.params.items()},
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """Restore a fit saved with the same parameters, else False (caller refits)"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if any(str(data[key]) != value for key, value in self.params.items()):
+                    logger.info("Vector compression settings changed, re-encoding")
+                    return False
+                self.components = data["components"] if data["components"].size else None
+                self.scale = data["scale"] if data["scale"].size else None
+                self.fitted_rows = int(data["fitted_rows"])
+                return True
+        except Exception as e:
+            logger.warning(f"Failed to load vector codec {path}: {e}")
+            return False
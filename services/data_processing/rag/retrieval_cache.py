@@ -0,0 +1,98 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+# Third-party imports
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCache:
+    """Persisted retrieval results for a finite set of query keys
+
+    Results are only served while both fingerprints match: the manifest fingerprint
+    (collection contents) and the params fingerprint (registered queries, k, top_n and the
+    retrieval settings). Keys are expected to encode the request (queries, k) they were computed for.
+    """
+
+    VERSION = 2
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.manifest_fingerprint: Optional[str] = None
+        self.params_fingerprint: Optional[str] = None
+        self.entries: Dict[str, List[Tuple[Document, float]]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.cache_path):
+            return
+
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                return
+            self.manifest_fingerprint = data["manifest_fingerprint"]
+            self.params_fingerprint = data["params_fingerprint"]
+            self.entries = {
+                key: [
+                    (Document(page_content=hit["content"], metadata=hit["metadata"]), hit["score"])
+                    for hit in hits
+                ]
+                for key, hits in data["entries"].items()
+            }
+            logger.debug(f"Loaded retrieval cache with {len(self.entries)} keys")
+        except Exception as e:
+            logger.warning(f"Failed to load retrieval cache {self.cache_path}: {e}")
+            self.invalidate()
+
+    def is_valid(self, manifest_fingerprint: str, params_fingerprint: Optional[str] = None) -> bool:
+        if self.manifest_fingerprint != manifest_fingerprint:
+            return False
+        return params_fingerprint is None or self.params_fingerprint == params_fingerprint
+
+    def get(self, key: str, manifest_fingerprint: str,
+            params_fingerprint: Optional[str] = None) -> Optional[List[Tuple[Document, float]]]:
+        """Cached (document, score) list for key, or None if missing or stale"""
+        if not self.is_valid(manifest_fingerprint, params_fingerprint):
+            return None
+        return self.entries.get(key)
+
+    def replace(self, manifest_fingerprint: str, params_fingerprint: str,
+                entries: Dict[str, List[Tuple[Document, float]]]) -> None:
+        """Replace all entries and persist atomically"""
+        self.manifest_fingerprint = manifest_fingerprint
+        self.params_fingerprint = params_fingerprint
+        self.entries = entries
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "manifest_fingerprint": manifest_fingerprint,
+            "params_fingerprint": params_fingerprint,
+            "entries": {
+                key: [
+                    {"content": doc.page_content, "metadata": doc.metadata, "score": score}
+                    for doc, score in hits
+                ]
+                for key, hits in entries.items()
+            },
+        }
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def invalidate(self) -> None:
+        self.manifest_fingerprint = None
+        self.params_fingerprint = None
+        self.entries = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
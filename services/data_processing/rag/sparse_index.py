@@ -0,0 +1,230 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import os
+import re
+import math
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[가-힣]+|[぀-ヿ一-鿿]+")
+_HANGUL_PATTERN = re.compile(r"[가-힣぀-ヿ一-鿿]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize into latin words and character bigrams of Korean/CJK runs
+
+    Korean is agglutinative ("매출에", "매출액이"), so overlapping character bigrams
+    match stems without a morphological analyzer.
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if _HANGUL_PATTERN.match(token):
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif len(token) > 1 or token.isdigit():
+            tokens.append(token)
+    return tokens
+
+
+class SparseIndex:
+    """In-process BM25 index persisted as flat numpy arrays
+
+    The forward index (doc -> term ids, term frequencies) is the source of truth and is
+    stored in a single .npz file. An inverted CSR index (term -> doc ids) is compiled
+    lazily on the first search after a change, so keyword lookups are array slices.
+
+    Changes and compilation hold a lock; a compiled index is published as one immutable
+    snapshot, so concurrent searches never mix arrays from different builds.
+    """
+
+    def __init__(self, index_path: str, k1: float = 1.5, b: float = 0.75):
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.manifest_fingerprint: Optional[str] = None
+
+        self.vocab: Dict[str, int] = {}
+        self.chunk_ids: List[str] = []
+        self.file_ids: List[str] = []
+        self._doc_terms: List[np.ndarray] = []
+        self._doc_tfs: List[np.ndarray] = []
+
+        self._lock = threading.RLock()
+        self._dirty = False
+        # (vocab, term count, chunk ids, postings indptr, postings docs, postings tfs, doc lengths, doc file ids)
+        self._postings: Optional[Tuple] = None
+
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+
+        with self._lock:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                terms = data["terms"].tolist()
+                doc_indptr = data["doc_indptr"]
+                doc_terms = data["doc_terms"]
+                doc_tfs = data["doc_tfs"]
+                self.chunk_ids = data["chunk_ids"].tolist()
+                self.file_ids = data["file_ids"].tolist()
+                self.manifest_fingerprint = str(data["manifest_fingerprint"]) or None
+
+            self.vocab = {term: term_id for term_id, term in enumerate(terms)}
+            self._doc_terms = [doc_terms[doc_indptr[i]:doc_indptr[i + 1]] for i in range(len(self.chunk_ids))]
+            self._doc_tfs = [doc_tfs[doc_indptr[i]:doc_indptr[i + 1]] for i in range(len(self.chunk_ids))]
+            self._postings = None
+            logger.debug(f"Loaded sparse index with {len(self.chunk_ids)} chunks, {len(self.vocab)} terms")
+        except Exception as e:
+            logger.warning(f"Failed to load sparse index {self.index_path}: {e}")
+            self.clear()
+            self._dirty = False
+
+    def save(self, manifest_fingerprint: Optional[str] = None) -> None:
+        """Write the forward index to disk if it changed"""
+        with self._lock:
+            self._save(manifest_fingerprint)
+
+    def _save(self, manifest_fingerprint: Optional[str]) -> None:
+        if manifest_fingerprint is not None and manifest_fingerprint != self.manifest_fingerprint:
+            self.manifest_fingerprint = manifest_fingerprint
+            self._dirty = True
+        if not self._dirty:
+            return
+
+        lengths = np.fromiter((len(terms) for terms in self._doc_terms), dtype=np.int64, count=len(self._doc_terms))
+        doc_indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=doc_indptr[1:])
+        terms = sorted(self.vocab, key=self.vocab.get)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            terms=np.array(terms, dtype=str),
+            doc_indptr=doc_indptr,
+            doc_terms=np.concatenate(self._doc_terms) if self._doc_terms else np.zeros(0, dtype=np.int32),
+            doc_tfs=np.concatenate(self._doc_tfs) if self._doc_tfs else np.zeros(0, dtype=np.int32),
+            chunk_ids=np.array(self.chunk_ids, dtype=str),
+            file_ids=np.array(self.file_ids, dtype=str),
+            manifest_fingerprint=np.array(self.manifest_fingerprint or ""),
+        )
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def add(self, chunk_ids: Iterable[str], file_ids: Iterable[str], texts: Iterable[str]) -> None:
+        # Tokenize outside the lock, searches keep running meanwhile
+        counted = [(chunk_id, file_id, Counter(tokenize(text)))
+                   for chunk_id, file_id, text in zip(chunk_ids, file_ids, texts)]
+        with self._lock:
+            for chunk_id, file_id, counts in counted:
+                term_ids = np.fromiter(
+                    (self.vocab.setdefault(term, len(self.vocab)) for term in counts),
+                    dtype=np.int32, count=len(counts)
+                )
+                self.chunk_ids.append(chunk_id)
+                self.file_ids.append(file_id)
+                self._doc_terms.append(term_ids)
+                self._doc_tfs.append(np.fromiter(counts.values(), dtype=np.int32, count=len(counts)))
+            self._dirty = True
+            self._postings = None
+
+    def remove_file(self, file_id: str) -> int:
+        """Remove every chunk of a file, returning the number removed"""
+        with self._lock:
+            keep = [i for i, fid in enumerate(self.file_ids) if fid != file_id]
+            removed = len(self.file_ids) - len(keep)
+            if removed:
+                self.chunk_ids = [self.chunk_ids[i] for i in keep]
+                self.file_ids = [self.file_ids[i] for i in keep]
+                self._doc_terms = [self._doc_terms[i] for i in keep]
+                self._doc_tfs = [self._doc_tfs[i] for i in keep]
+                self._dirty = True
+                self._postings = None
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.vocab, self.chunk_ids, self.file_ids = {}, [], []
+            self._doc_terms, self._doc_tfs = [], []
+            self.manifest_fingerprint = None
+            self._dirty = True
+            self._postings = None
+
+    def _compile(self) -> Tuple:
+        """Build the inverted CSR arrays from the forward index (caller holds the lock)"""
+        n_docs, n_terms = len(self.chunk_ids), len(self.vocab)
+        if n_docs:
+            lengths = np.fromiter((len(terms) for terms in self._doc_terms), dtype=np.int64, count=n_docs)
+            terms = np.concatenate(self._doc_terms)
+            tfs = np.concatenate(self._doc_tfs).astype(np.float32)
+            docs = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+            order = np.argsort(terms, kind="stable")
+            post_docs = docs[order]
+            post_tfs = tfs[order]
+            counts = np.bincount(terms, minlength=n_terms)
+            doc_len = np.fromiter((tf.sum() for tf in self._doc_tfs), dtype=np.float32, count=n_docs)
+            doc_files = np.array(self.file_ids, dtype=str)
+        else:
+            counts = np.zeros(n_terms, dtype=np.int64)
+            post_docs = np.zeros(0, dtype=np.int32)
+            post_tfs = np.zeros(0, dtype=np.float32)
+            doc_len = np.zeros(0, dtype=np.float32)
+            doc_files = np.zeros(0, dtype=str)
+
+        post_indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(counts, out=post_indptr[1:])
+        # Term ids are only appended to this vocab (clear() swaps in a new dict), so ids < n_terms stay valid
+        self._postings = (self.vocab, n_terms, list(self.chunk_ids), post_indptr, post_docs, post_tfs,
+                          doc_len, doc_files)
+        return self._postings
+
+    def search(self, query: str, k: int = 10,
+               file_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """BM25 search returning (chunk_id, score), best first (optionally only within file_ids)"""
+        with self._lock:
+            postings = self._postings or self._compile()
+        vocab, n_terms, chunk_ids, post_indptr, post_docs, post_tfs, doc_len, doc_files = postings
+
+        n_docs = len(chunk_ids)
+        term_ids = {term_id for term_id in (vocab.get(term) for term in tokenize(query))
+                    if term_id is not None and term_id < n_terms}
+        if not n_docs or not term_ids:
+            return []
+
+        avg_len = float(doc_len.mean()) or 1.0
+        norm = self.k1 * (1.0 - self.b + self.b * doc_len / avg_len)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = post_indptr[term_id], post_indptr[term_id + 1]
+            if start == end:
+                continue
+            docs, tfs = post_docs[start:end], post_tfs[start:end]
+            df = end - start
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norm[docs])
+
+        if file_ids is not None:
+            scores[~np.isin(doc_files, list(file_ids))] = 0.0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(scores[candidates])[::-1]]
+        return [(chunk_ids[i], float(scores[i])) for i in candidates]
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
@@ -0,0 +1,31 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+from typing import Optional
+
+# Custom imports
+from config import settings
+from .chroma_db import ChromaDB
+from .numpy_db import NumpyDB
+
+VECTOR_BACKENDS = {
+    "chroma": ChromaDB,
+    "numpy": NumpyDB,
+}
+
+
+def create_vector_db(backend: Optional[str] = None, **kwargs):
+    """Create the configured vector database backend
+
+    Args:
+        backend: "chroma" (HNSW, default) or "numpy" (memory-mapped brute force).
+            Defaults to settings.rag_vector_backend
+        **kwargs: Passed through to the backend constructor
+
+    Returns:
+        ChromaDB or NumpyDB instance
+    """
+    backend = backend or settings.rag_vector_backend
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unsupported vector backend: {backend} (expected one of {list(VECTOR_BACKENDS)})")
+    return VECTOR_BACKENDS[backend](**kwargs)
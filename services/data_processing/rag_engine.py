@@ -2,18 +2,74 @@ __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 # Standard imports
 import os
+import json
+import time
+import queue
+import asyncio
 import logging
 import hashlib
-from typing import List, Dict, Optional
+import threading
+import multiprocessing
+from typing import Any, Callable, List, Dict, Optional, Set, Tuple
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party imports
+from langchain.schema import Document
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun
+)
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
 
 # Custom imports
-from services.data_processing.rag import ChromaDB, DocumentProcessor
-from schemas.data_schemas import DocumentSearchResult
+from services.data_processing.rag import (
+    ChunkDeduplicator,
+    ReferenceSectionFilter,
+    create_vector_db,
+    DocumentProcessor,
+    build_document_summary,
+    summary_source,
+    ParsedTextCache,
+    IndexManifest,
+    ManifestEntry,
+    file_content_hash,
+    reciprocal_rank_fusion,
+    document_key,
+    RetrievalCache,
+    SparseIndex,
+    LazyEmbeddings,
+    build_embeddings,
+    SnapshotInfo,
+    export_snapshot,
+    mount_snapshot
+)
+from services.data_processing.rag.document_processor import (
+    init_document_worker,
+    stream_document_task
+)
+from schemas.data_schemas import DocumentSearchResult, IndexStatistics, IngestionProgress, IngestionResult
+from config import settings
+from utils.prompts import rag_analysis_query_sets
 
 logger = logging.getLogger(__name__)
 
 
+class _FileStream:
+    """병렬 인덱싱에서 워커가 스트리밍 중인 파일의 상태 (메인 프로세스)"""
+
+    def __init__(self, pending: Tuple, filter_references: bool):
+        self.pending = pending  # (file_id, stat, content_hash, 기존 항목)
+        self.future = None
+        self.start = time.perf_counter()
+        self.reference_filter = ReferenceSectionFilter() if filter_references else None
+        self.head: List[str] = []  # 문서 요약 벡터용 앞부분 텍스트
+        self.produced = self.stored = self.pages = self.batch_index = 0
+        self.duplicate_owners: Set[str] = set()  # 제외된 중복 청크의 원본을 가진 파일
+        self.error: Optional[str] = None
+
+
 class RAGEngine:
     """간소화된 RAG 엔진 - 새로운 컴포넌트 사용"""
 
@@ -21,73 +77,534 @@ class RAGEngine:
                  collection_name: str = "documents",
                  chunk_size: int = 800,
                  chunk_overlap: int = 100,
-                 persist_directory: Optional[str] = None):
+                 persist_directory: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 insert_batch_size: Optional[int] = None,
+                 hybrid: Optional[bool] = None,
+                 vector_backend: Optional[str] = None,
+                 parsed_text_cache_dir: Optional[str] = None,
+                 hierarchical: Optional[bool] = None,
+                 vector_db_options: Optional[Dict[str, Any]] = None,
+                 snapshot_path: Optional[str] = None):
 
         self.persist_directory = persist_directory or settings.chroma_path
+        self.workers = workers or settings.rag_workers
+        self.insert_batch_size = insert_batch_size or settings.rag_insert_batch_size
+        self.stream_batch_pages = settings.rag_stream_batch_pages
+        self.collection_name = collection_name
+        self.vector_backend = vector_backend or settings.rag_vector_backend
+        self.chunking = f"{chunk_size}:{chunk_overlap}"
+
+        # 배포용 인덱스 스냅샷: 오프라인에서 만든 인덱스를 읽기 전용으로 마운트
+        # (문서 인덱싱 없이 시작하며, 임베딩 모델은 첫 질의 시점에 로드)
+        self.snapshot: Optional[SnapshotInfo] = None
+        snapshot_options: Dict[str, Any] = {}
+        snapshot_path = settings.rag_snapshot_path if snapshot_path is None else snapshot_path
+        if snapshot_path:
+            index_dir, self.snapshot = mount_snapshot(
+                snapshot_path,
+                settings.rag_snapshot_mount_dir or os.path.join(self.persist_directory, "snapshots")
+            )
+            # 질의 임베딩 캐시는 스냅샷이 아닌 원래 저장 경로에 둠
+            cache_directory, embedding_model = self.persist_directory, self.snapshot.embedding_model
+            snapshot_options = {
+                "embedding_model": embedding_model,
+                "embeddings": LazyEmbeddings(lambda: build_embeddings(embedding_model, cache_directory)),
+            }
+            self.persist_directory = index_dir
+            self.collection_name = collection_name = self.snapshot.collection_name
+            self.vector_backend = self.snapshot.vector_backend
+            self.chunking = self.snapshot.chunking
+            hybrid = self.snapshot.hybrid if hybrid is None else hybrid
+            hierarchical = self.snapshot.hierarchical if hierarchical is None else hierarchical
+        self.read_only = self.snapshot is not None
 
         # 새로운 컴포넌트 초기화
-        self.chroma_db = ChromaDB(
-            persist_directory=persist_directory,
-            collection_name=collection_name
+        # vector_db_options: 백엔드별 옵션 (chroma: distance_metric, hnsw_m, hnsw_construction_ef, hnsw_search_ef,
+        #                    numpy: quantization, pca_dims, rescore_factor)
+        self.vector_db_options = vector_db_options or {}
+        self.vector_db = create_vector_db(
+            self.vector_backend,
+            persist_directory=self.persist_directory,
+            collection_name=collection_name,
+            **snapshot_options,
+            **self.vector_db_options
         )
 
+        # 추출된 페이지 텍스트 캐시 (청킹 파라미터 변경 시 PDF 재파싱 생략)
+        self.parsed_text_cache_dir = None
+        if settings.rag_parsed_text_cache and not self.read_only:
+            self.parsed_text_cache_dir = (parsed_text_cache_dir or settings.rag_parsed_text_cache_dir
+                                          or os.path.join(self.persist_directory, "parsed_text"))
+
         self.document_processor = DocumentProcessor(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            parsed_text_cache=ParsedTextCache(self.parsed_text_cache_dir) if self.parsed_text_cache_dir else None,
+            fast_loaders=settings.rag_fast_loaders
+        )
+
+        # 인덱싱된 파일 매니페스트 (content hash, mtime, size 기반 증분 인덱싱)
+        self.manifest = IndexManifest(
+            os.path.join(self.persist_directory, f"{collection_name}_manifest.json")
+        )
+
+        # 고정된 질의 집합의 검색 결과 사전 계산 캐시 (매니페스트 변경 시 무효화)
+        self.retrieval_cache = RetrievalCache(
+            os.path.join(self.persist_directory, f"{collection_name}_retrieval_cache.json")
         )
+        # BM25 희소 인덱스 (Chroma 컬렉션과 함께 갱신, dense 검색 결과와 RRF로 결합)
+        self.hybrid = settings.rag_hybrid_search if hybrid is None else hybrid
+        self.sparse_weight = settings.rag_sparse_weight
+        self.sparse_index = SparseIndex(
+            os.path.join(self.persist_directory, f"{collection_name}_sparse.npz")
+        )
+        # 희소 인덱스가 매니페스트와 일치하는지 여부 (일치할 때만 저장 시 매니페스트 지문을 기록)
+        self._sparse_synced = False
+        self._sync_sparse_index()
+
+        # 컬렉션 전체 기준 중복(content hash)/유사 중복(SimHash) 청크 제거 인덱스 (인덱싱 시에만 사용)
+        self.deduplicator = None
+        if settings.rag_dedup and not self.read_only:
+            self.deduplicator = ChunkDeduplicator(
+                os.path.join(self.persist_directory, f"{collection_name}_dedup.npz"),
+                hamming_threshold=settings.rag_dedup_hamming_threshold
+            )
+            self._sync_dedup_index()
+        self.filter_references = settings.rag_filter_references
+
+        # 문서 단위 요약 벡터 컬렉션 (상위 문서 선택 → 해당 문서 안에서 청크 검색)
+        self.hierarchical = settings.rag_hierarchical_search if hierarchical is None else hierarchical
+        self.top_documents = settings.rag_hierarchical_top_documents
+        self.summary_db = None
+        if self.hierarchical:
+            self.summary_db = create_vector_db(
+                self.vector_backend,
+                persist_directory=self.persist_directory,
+                collection_name=f"{collection_name}_summaries",
+                embeddings=self.vector_db.embeddings,
+                **self.vector_db_options
+            )
+            self._sync_summaries()
+
+        self.precomputed_queries: Dict[str, List[str]] = {}
+        self.precomputed_k = 10
+        self.precomputed_top_n: Optional[int] = None
+        logger.info(f"RAG Engine initialized: {self.persist_directory} ({len(self.manifest)} files in manifest"
+                    f"{f', snapshot {self.snapshot.version}, read-only' if self.read_only else ''})")
+
+    def _reject_if_read_only(self, action: str) -> bool:
+        """스냅샷을 마운트한 엔진이면 변경 작업을 거부"""
+        if self.read_only:
+            logger.warning(f"Index snapshot {self.snapshot.version} is mounted read-only, ignoring {action}")
+        return self.read_only
+
+    def add_document(self, file_path: str,
+                     progress_callback: Optional[Callable[[IngestionProgress], None]] = None) -> bool:
+        """단일 문서 추가 (변경되지 않은 파일은 건너뜀)"""
+        if self._reject_if_read_only("add_document"):
+            return False
+        result = self._index_file(file_path, progress_callback)
+        self._save_indexes()
+        self.refresh_retrieval_cache()
+        return result.success
+
+    def _pending_index(self, file_path: str) -> Optional[Tuple[str, os.stat_result, str, Optional[ManifestEntry]]]:
+        """인덱싱이 필요하면 (file_id, stat, content_hash, 기존 항목) 반환, 최신 상태면 None"""
+        file_id = self._generate_file_id(file_path)
+        stat = os.stat(file_path)
+        entry = self.manifest.get(file_id)
+
+        # mtime, size, 청킹 설정이 같으면 해시 계산 없이 건너뜀 (중복 원본 파일이 바뀐 항목은 항상 재인덱싱)
+        current = entry is not None and entry.chunking == self.chunking and not entry.stale
+        if current and entry.matches_stat(stat):
+            logger.info(f"Already indexed: {file_path}")
+            return None
+
+        # 내용이 같으면 stat 정보만 갱신
+        content_hash = file_content_hash(file_path)
+        if current and entry.content_hash == content_hash:
+            entry.mtime, entry.size = stat.st_mtime, stat.st_size
+            self.manifest.update(entry)
+            logger.info(f"Unchanged content, refreshed stat: {file_path}")
+            return None
+
+        return file_id, stat, content_hash, entry
 
-        self.indexed_files = set()
-        logger.info(f"RAG Engine initialized: {persist_directory}")
+    def _index_file(self, file_path: str,
+                    progress_callback: Optional[Callable[[IngestionProgress], None]] = None) -> IngestionResult:
+        """매니페스트와 비교하여 신규/변경 파일만 인덱싱
 
-    def add_document(self, file_path: str) -> bool:
-        """단일 문서 추가"""
+        로드 → 청킹 → 임베딩 → 저장을 페이지 배치 단위로 스트리밍하므로, 메모리 사용량은
+        문서 크기와 관계없이 청크 insert_batch_size개와 페이지 배치 하나로 제한됨
+        """
+        start = time.perf_counter()
+        pending = None
         try:
             if not os.path.exists(file_path):
                 logger.error(f"File not found: {file_path}")
-                return False
+                return IngestionResult(file_path=file_path, success=False, error="File not found")
 
-            # 이미 인덱싱된 파일인지 확인
-            file_id = self._generate_file_id(file_path)
-            if file_id in self.indexed_files:
-                logger.info(f"Already indexed: {file_path}")
-                return True
+            pending = self._pending_index(file_path)
+            if pending is None:
+                return IngestionResult(file_path=file_path, success=True, skipped=True)
 
-            # 문서 처리
-            chunks = self.document_processor.process_document(file_path)
+            # 변경되었거나 매니페스트 이전에 인덱싱된 기존 청크 삭제
+            file_id = pending[0]
+            self._remove_chunks([file_id])
 
-            if not chunks:
+            buffer: List[Document] = []
+            head: List[str] = []  # 문서 요약 벡터용 앞부분 텍스트
+            pages = produced = chunk_count = batch_index = 0
+            reference_filter = ReferenceSectionFilter() if self.filter_references else None
+            duplicate_owners: Set[str] = set()
+
+            def flush():
+                nonlocal buffer, chunk_count, batch_index
+                kept = self._filter_chunks(buffer, reference_filter, duplicate_owners)
+                if kept:
+                    self._add_chunks(kept)
+                chunk_count += len(kept)
+                self._report_progress(progress_callback, IngestionProgress(
+                    file_path=file_path, batch_index=batch_index, batch_chunks=len(kept),
+                    chunks=chunk_count, pages=pages, elapsed=time.perf_counter() - start
+                ))
+                batch_index += 1
+                buffer = []
+
+            # 다음 페이지 배치는 이전 배치가 저장된 뒤에 읽음 (backpressure)
+            batches = self.document_processor.iter_chunk_batches(file_path, pending[2], self.stream_batch_pages)
+            for page_count, chunks in batches:
+                # 청크 ID는 제외된 청크를 포함한 원래 순번을 유지
+                self._annotate_chunks(file_path, file_id, chunks, start_index=produced)
+                produced += len(chunks)
+                head = summary_source(head + [chunk.page_content for chunk in chunks])
+                buffer.extend(chunks)
+                pages += page_count
+                if len(buffer) >= self.insert_batch_size:
+                    flush()
+            if buffer:
+                flush()
+
+            elapsed = time.perf_counter() - start
+            if not produced:
                 logger.warning(f"No chunks created for: {file_path}")
-                return False
+                self.manifest.remove(file_id)
+                return IngestionResult(file_path=file_path, success=False, elapsed=elapsed,
+                                       error="No chunks created")
+
+            if chunk_count:
+                self._add_summaries([(file_id, file_path, head)])
+            return self._record_indexed(file_path, pending, chunk_count, elapsed, produced - chunk_count,
+                                        duplicate_owners)
+
+        except Exception as e:
+            logger.error(f"Failed to add document {file_path}: {e}")
+            if pending is not None:
+                # 일부 배치만 저장된 상태를 남기지 않도록 파일 전체 정리 (다음 실행에서 재인덱싱)
+                self._purge_file(pending[0])
+            return IngestionResult(file_path=file_path, success=False,
+                                   elapsed=time.perf_counter() - start, error=str(e))
+
+    @staticmethod
+    def _report_progress(progress_callback: Optional[Callable[[IngestionProgress], None]],
+                         progress: IngestionProgress) -> None:
+        if progress_callback is None:
+            return
+        try:
+            progress_callback(progress)
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
+
+    @staticmethod
+    def _annotate_chunks(file_path: str, file_id: str, chunks: List[Document], start_index: int = 0) -> None:
+        """청크에 파일 메타데이터 추가"""
+        for i, chunk in enumerate(chunks, start=start_index):
+            chunk.metadata.update({
+                'file_path': file_path,
+                'file_name': Path(file_path).name,
+                'chunk_id': f"{file_id}_{i}",
+                'file_id': file_id
+            })
 
-            # 메타데이터 추가
-            for i, chunk in enumerate(chunks):
-                chunk.metadata.update({
+    def _filter_chunks(self, chunks: List[Document],
+                       reference_filter: Optional[ReferenceSectionFilter] = None,
+                       duplicate_owners: Optional[Set[str]] = None) -> List[Document]:
+        """참고문헌 청크와 이미 인덱싱된 청크의 중복/유사 중복 제외 (남은 청크는 중복 인덱스에 등록)
+
+        reference_filter는 파일마다 새로 만들어 문서 순서대로 청크를 전달해야 함.
+        duplicate_owners에는 제외된 중복 청크의 원본을 가진 다른 파일의 file_id가 추가됨
+        """
+        kept = []
+        for chunk in chunks:
+            if reference_filter is not None and reference_filter.is_reference(chunk.page_content):
+                continue
+            if self.deduplicator is not None:
+                duplicate_of = self.deduplicator.add_if_unique(
+                    chunk.metadata['chunk_id'], chunk.metadata['file_id'], chunk.page_content
+                )
+                if duplicate_of is not None:
+                    logger.debug(f"Dropped duplicate chunk {chunk.metadata['chunk_id']} (of {duplicate_of})")
+                    owner = duplicate_of.rsplit('_', 1)[0]
+                    if duplicate_owners is not None and owner != chunk.metadata['file_id']:
+                        duplicate_owners.add(owner)
+                    continue
+            kept.append(chunk)
+        return kept
+
+    def _remove_chunks(self, file_ids: List[str]) -> None:
+        """벡터 DB, 희소 인덱스, 중복 인덱스에서 파일들의 청크 삭제
+
+        이 파일들의 청크를 원본으로 중복 청크가 제외된 파일은 다음 동기화에서 재인덱싱되도록 표시
+        """
+        for entry in self.manifest.mark_dependents_stale(file_ids):
+            logger.info(f"Marked for re-indexing (duplicate chunks kept in a removed file): {entry.file_path}")
+        for file_id in file_ids:
+            self.vector_db.delete_documents(where={'file_id': file_id})
+            self.sparse_index.remove_file(file_id)
+            if self.deduplicator is not None:
+                self.deduplicator.remove_file(file_id)
+        if self.summary_db is not None and file_ids:
+            self.summary_db.delete_documents(ids=list(file_ids))
+
+    def _add_summaries(self, items: List[Tuple[str, str, List[str]]]) -> None:
+        """문서별 요약(제목, 주제어, 초록) 벡터 추가 - items: (file_id, file_path, 앞부분 텍스트) 목록"""
+        if self.summary_db is None or not items:
+            return
+        self.summary_db.add_documents(
+            [
+                Document(page_content=build_document_summary(file_path, texts), metadata={
+                    'file_id': file_id,
                     'file_path': file_path,
-                    'file_name': Path(file_path).name,
-                    'chunk_id': f"{file_id}_{i}",
-                    'file_id': file_id
+                    'file_name': Path(file_path).name
                 })
+                for file_id, file_path, texts in items
+            ],
+            ids=[file_id for file_id, _, _ in items]
+        )
 
-            # ChromaDB에 추가
-            chunk_ids = [chunk.metadata['chunk_id'] for chunk in chunks]
-            self.chroma_db.add_documents(chunks, ids=chunk_ids)
+    def _sync_summaries(self) -> None:
+        """매니페스트에 있지만 요약 벡터가 없는 문서는 저장된 청크로 요약을 만들고, 없는 문서의 요약은 삭제"""
+        if self.read_only:
+            return
+        try:
+            indexed = {file_id: entry for file_id, entry in self.manifest.entries.items() if entry.chunk_count}
+            stored = set(self.summary_db.get_documents().get('ids', []))
 
-            self.indexed_files.add(file_id)
-            logger.info(f"Indexed: {file_path} ({len(chunks)} chunks)")
-            return True
+            stale = list(stored - set(indexed))
+            if stale:
+                self.summary_db.delete_documents(ids=stale)
 
+            items = []
+            for file_id in set(indexed) - stored:
+                chunks = self.vector_db.get_documents(where={'file_id': file_id})
+                ordered = sorted(
+                    zip(chunks.get('ids', []), chunks.get('documents', [])),
+                    key=lambda item: int(item[0].rsplit('_', 1)[-1]) if item[0].rsplit('_', 1)[-1].isdigit() else 0
+                )
+                items.append((file_id, indexed[file_id].file_path, summary_source(text for _, text in ordered)))
+            if items:
+                self._add_summaries(items)
+                logger.info(f"Built summary vectors for {len(items)} documents")
         except Exception as e:
-            logger.error(f"Failed to add document {file_path}: {e}")
-            return False
+            logger.error(f"Failed to sync document summaries: {e}")
+
+    def _add_chunks(self, chunks: List[Document]) -> None:
+        """청크를 벡터 DB와 희소 인덱스에 추가"""
+        chunk_ids = [chunk.metadata['chunk_id'] for chunk in chunks]
+        self.vector_db.add_documents(chunks, ids=chunk_ids)
+        self.sparse_index.add(
+            chunk_ids,
+            [chunk.metadata['file_id'] for chunk in chunks],
+            [chunk.page_content for chunk in chunks]
+        )
+
+    def _record_indexed(self, file_path: str, pending: Tuple, chunk_count: int, elapsed: float,
+                        dropped_chunks: int = 0, duplicate_owners: Optional[Set[str]] = None) -> IngestionResult:
+        """인덱싱 완료된 파일을 매니페스트에 기록"""
+        file_id, stat, content_hash, entry = pending
+        self.manifest.update(ManifestEntry(
+            file_id=file_id,
+            file_path=file_path,
+            content_hash=content_hash,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            chunk_count=chunk_count,
+            chunking=self.chunking,
+            dropped_chunks=dropped_chunks,
+            duplicate_owners=sorted(duplicate_owners or ())
+        ))
+        action = "Re-indexed" if entry else "Indexed"
+        dropped = f", {dropped_chunks} duplicate/reference chunks dropped" if dropped_chunks else ""
+        logger.info(f"{action}: {file_path} ({chunk_count} chunks{dropped}, {elapsed:.2f}s)")
+        return IngestionResult(file_path=file_path, success=True, chunk_count=chunk_count, elapsed=elapsed,
+                               dropped_chunks=dropped_chunks)
+
+    def _index_files_parallel(self, file_paths: List[str], workers: int,
+                              progress_callback: Optional[Callable[[IngestionProgress], None]] = None
+                              ) -> List[IngestionResult]:
+        """프로세스 풀에서 파싱/청킹하고, 워커가 페이지 배치 단위로 보내는 청크를 메인 프로세스에서 임베딩 및 추가
+
+        워커는 파일 전체가 아닌 stream_batch_pages 페이지 분량의 청크를 큐로 보내고, 큐(workers * 2 배치)가
+        가득 차면 대기하므로 (backpressure) 메모리에는 페이지 배치 몇 개와 저장 대기 청크 insert_batch_size개만 남음
+        """
+        results = []
+        pending_files = {}
+        for file_path in file_paths:
+            try:
+                pending = self._pending_index(file_path)
+            except Exception as e:
+                logger.error(f"Failed to check {file_path}: {e}")
+                results.append(IngestionResult(file_path=file_path, success=False, error=str(e)))
+                continue
+            if pending is None:
+                results.append(IngestionResult(file_path=file_path, success=True, skipped=True))
+            else:
+                pending_files[file_path] = pending
+
+        if not pending_files:
+            return results
+
+        logger.info(f"Parsing {len(pending_files)} files with {workers} workers")
+        context = multiprocessing.get_context()
+        batch_queue = context.Queue(maxsize=workers * 2)
+        streams: Dict[str, _FileStream] = {}
+        buffer: List[Tuple[str, List[Document]]] = []  # (file_path, 필터링된 청크) - 아직 저장되지 않은 배치
+        queued = iter(pending_files.items())
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=init_document_worker,
+                initargs=(self.document_processor.chunk_size, self.document_processor.chunk_overlap,
+                          self.parsed_text_cache_dir, self.document_processor.fast_loaders, batch_queue)
+        ) as executor:
+
+            def submit_next() -> None:
+                for file_path, pending in queued:
+                    # 변경되었거나 매니페스트 이전에 인덱싱된 기존 청크 삭제 후 스트리밍 시작
+                    stream = _FileStream(pending, self.filter_references)
+                    try:
+                        self._remove_chunks([pending[0]])
+                        stream.future = executor.submit(stream_document_task, file_path, pending[2],
+                                                        self.stream_batch_pages)
+                    except Exception as e:
+                        results.append(self._finish_stream(file_path, stream, str(e)))
+                        continue
+                    streams[file_path] = stream
+                    return
+
+            for _ in range(workers):
+                submit_next()
+
+            while streams:
+                try:
+                    file_path, page_count, chunks, done, error = batch_queue.get(timeout=1.0)
+                except queue.Empty:
+                    # 워커 프로세스가 비정상 종료하면 완료 메시지가 오지 않음
+                    for file_path, stream in list(streams.items()):
+                        if stream.future.done() and stream.future.exception() is not None:
+                            buffer = self._drop_buffered(buffer, file_path)
+                            results.append(self._finish_stream(file_path, streams.pop(file_path),
+                                                               str(stream.future.exception())))
+                            submit_next()
+                    continue
+
+                stream = streams.get(file_path)
+                if stream is None:
+                    continue
+                if not done:
+                    if stream.error is None:
+                        buffer.append((file_path, self._stream_chunks(file_path, stream, page_count, chunks)))
+                        if sum(len(kept) for _, kept in buffer) >= self.insert_batch_size:
+                            self._store_stream_batch(buffer, streams, progress_callback)
+                            buffer = []
+                    continue
+
+                if error is None and any(path == file_path for path, _ in buffer):
+                    self._store_stream_batch(buffer, streams, progress_callback)
+                    buffer = []
+                buffer = self._drop_buffered(buffer, file_path)
+                results.append(self._finish_stream(file_path, streams.pop(file_path), error))
+                submit_next()
+
+        return results
+
+    def _stream_chunks(self, file_path: str, stream: "_FileStream", page_count: int,
+                       chunks: List[Document]) -> List[Document]:
+        """워커가 보낸 페이지 배치 청크에 메타데이터를 붙이고 참고문헌/중복 청크 제외"""
+        # 청크 ID는 제외된 청크를 포함한 원래 순번을 유지
+        self._annotate_chunks(file_path, stream.pending[0], chunks, start_index=stream.produced)
+        stream.produced += len(chunks)
+        stream.pages += page_count
+        stream.head = summary_source(stream.head + [chunk.page_content for chunk in chunks])
+        return self._filter_chunks(chunks, stream.reference_filter, stream.duplicate_owners)
+
+    def _store_stream_batch(self, buffer: List[Tuple[str, List[Document]]], streams: Dict[str, "_FileStream"],
+                            progress_callback: Optional[Callable[[IngestionProgress], None]]) -> None:
+        """여러 파일의 청크 배치를 한 번에 벡터 DB에 추가하고 파일별 진행 상황 전달"""
+        chunks = [chunk for _, kept in buffer for chunk in kept]
+        try:
+            if chunks:
+                self._add_chunks(chunks)
+        except Exception as e:
+            logger.error(f"Failed to store {len(chunks)} chunks: {e}")
+            for file_path, _ in buffer:
+                streams[file_path].error = str(e)
+            return
+
+        stored: Dict[str, int] = {}
+        for file_path, kept in buffer:
+            stored[file_path] = stored.get(file_path, 0) + len(kept)
+        for file_path, count in stored.items():
+            stream = streams[file_path]
+            stream.stored += count
+            self._report_progress(progress_callback, IngestionProgress(
+                file_path=file_path, batch_index=stream.batch_index, batch_chunks=count, chunks=stream.stored,
+                pages=stream.pages, elapsed=time.perf_counter() - stream.start
+            ))
+            stream.batch_index += 1
 
-    def add_documents_from_directory(self, directory_path: str) -> Dict[str, int]:
-        """디렉토리의 모든 지원 문서 추가"""
+    @staticmethod
+    def _drop_buffered(buffer: List[Tuple[str, List[Document]]], file_path: str) -> List[Tuple[str, List[Document]]]:
+        return [(path, kept) for path, kept in buffer if path != file_path]
+
+    def _finish_stream(self, file_path: str, stream: "_FileStream", error: Optional[str]) -> IngestionResult:
+        """스트리밍이 끝난 파일의 요약 벡터 추가 및 매니페스트 기록 (실패 시 저장된 배치 정리)"""
+        elapsed = time.perf_counter() - stream.start
+        error = error or stream.error or (None if stream.produced else "No chunks created")
+        if error is None:
+            try:
+                if stream.stored:
+                    self._add_summaries([(stream.pending[0], file_path, stream.head)])
+                return self._record_indexed(file_path, stream.pending, stream.stored, elapsed,
+                                            stream.produced - stream.stored, stream.duplicate_owners)
+            except Exception as e:
+                error = str(e)
+
+        logger.error(f"Failed to process {file_path}: {error}")
+        # 일부 배치만 저장된 상태를 남기지 않도록 파일 전체 정리 (다음 실행에서 재인덱싱)
+        self._purge_file(stream.pending[0])
+        return IngestionResult(file_path=file_path, success=False, elapsed=elapsed, error=error)
+
+    def add_documents_from_directory(self, directory_path: str, workers: Optional[int] = None,
+                                     progress_callback: Optional[Callable[[IngestionProgress], None]] = None
+                                     ) -> Dict[str, Any]:
+        """디렉토리의 모든 지원 문서 추가 및 삭제된 파일 정리
+
+        Args:
+            directory_path: 문서 디렉토리
+            workers: 파싱 프로세스 수 (None이면 엔진 설정값, 1이면 순차 처리)
+            progress_callback: 청크 배치가 저장될 때마다 IngestionProgress로 호출
+        """
+        if self._reject_if_read_only("add_documents_from_directory"):
+            return {'success': 0, 'failed': 0, 'removed': 0, 'dropped_chunks': 0, 'files': []}
         if not os.path.exists(directory_path):
             logger.error(f"Directory not found: {directory_path}")
-            return {'success': 0, 'failed': 0}
+            return {'success': 0, 'failed': 0, 'removed': 0, 'dropped_chunks': 0, 'files': []}
 
-        success_count = 0
-        failed_count = 0
+        workers = workers or self.workers
+        start = time.perf_counter()
 
         # 지원되는 파일들 찾기
         supported_files = []
@@ -100,26 +617,46 @@ class RAGEngine:
         logger.info(f"Found {len(supported_files)} supported files")
 
         # 각 파일 처리
-        for file_path in supported_files:
-            if self.add_document(file_path):
-                success_count += 1
-            else:
-                failed_count += 1
+        if workers > 1 and len(supported_files) > 1:
+            results = self._index_files_parallel(supported_files, workers, progress_callback)
+        else:
+            results = [self._index_file(file_path, progress_callback) for file_path in supported_files]
+
+        success_count = sum(1 for result in results if result.success)
+        failed_count = len(results) - success_count
+        dropped_count = sum(result.dropped_chunks for result in results)
 
-        logger.info(f"Indexing complete: {success_count} success, {failed_count} failed")
-        return {'success': success_count, 'failed': failed_count}
+        # 디렉토리에서 삭제된 파일의 청크 정리
+        found_ids = {self._generate_file_id(file_path) for file_path in supported_files}
+        removed_count = 0
+        for entry in self.manifest.files_under(directory_path):
+            if entry.file_id not in found_ids and self._purge_file(entry.file_id):
+                removed_count += 1
+
+        self._save_indexes()
+        self.refresh_retrieval_cache()
+        for result in results:
+            if not result.success:
+                logger.warning(f"Failed: {result.file_path} ({result.error})")
+        logger.info(f"Indexing complete in {time.perf_counter() - start:.2f}s: "
+                    f"{success_count} success, {failed_count} failed, {removed_count} removed, "
+                    f"{dropped_count} chunks dropped")
+        return {'success': success_count, 'failed': failed_count, 'removed': removed_count,
+                'dropped_chunks': dropped_count, 'files': results}
 
     def search(self, query: str, k: int = 5) -> List[DocumentSearchResult]:
         """문서 검색"""
         try:
-            results = self.chroma_db.similarity_search_with_score(query, k=k)
+            results = self.vector_db.similarity_search_with_score(
+                query, k=k, filter_dict=self._document_filter(self._candidate_files([query]))
+            )
 
             search_results = []
             for doc, score in results:
                 result = DocumentSearchResult(
                     file_path=doc.metadata.get('file_path', ''),
                     content=doc.page_content,
-                    score=1.0 - score,  # 거리를 유사도로 변환
+                    score=self.vector_db.relevance_score(score),  # 컬렉션 metric에 맞게 거리를 유사도로 변환
                     metadata=doc.metadata
                 )
                 search_results.append(result)
@@ -130,55 +667,484 @@ class RAGEngine:
             logger.error(f"Search failed: {e}")
             return []
 
-    def get_documents_count(self) -> int:
-        """인덱싱된 문서 개수"""
+    def hybrid_search(self, query: str, k: int = 10) -> List[DocumentSearchResult]:
+        """Dense + BM25 검색 결과를 reciprocal-rank fusion으로 결합"""
+        return self.multi_query_search([query], k=k)
+
+    def _sparse_ranked_lists(self, queries: List[str], k: int, known: Dict[str, Document],
+                             file_ids: Optional[List[str]] = None) -> List[List[Tuple[Document, float]]]:
+        """질의별 BM25 검색 결과 (dense 결과에 없는 청크는 벡터 DB에서 한 번에 조회)"""
+        sparse_hits = [self.sparse_index.search(query, k=k, file_ids=file_ids) for query in queries]
+
+        missing_ids = list({chunk_id for hits in sparse_hits for chunk_id, _ in hits} - set(known))
+        if missing_ids:
+            fetched = self.vector_db.get_documents(ids=missing_ids)
+            for chunk_id, content, metadata in zip(
+                    fetched.get('ids', []), fetched.get('documents', []), fetched.get('metadatas', [])
+            ):
+                known[chunk_id] = Document(page_content=content, metadata=metadata or {})
+
+        return [
+            [(known[chunk_id], score) for chunk_id, score in hits if chunk_id in known]
+            for hits in sparse_hits
+        ]
+
+    def _sync_sparse_index(self) -> None:
+        """희소 인덱스가 매니페스트와 맞지 않으면 벡터 DB의 청크로 재구축"""
+        fingerprint = self.manifest.fingerprint()
+        self._sparse_synced = self.sparse_index.manifest_fingerprint == fingerprint
+        if not self.hybrid or self._sparse_synced:
+            return
+
         try:
-            all_docs = self.chroma_db.get_documents()
-            return len(all_docs.get('ids', []))
+            stored = self.vector_db.get_documents()
+            self.sparse_index.clear()
+            self.sparse_index.add(
+                stored.get('ids', []),
+                [(metadata or {}).get('file_id', '') for metadata in stored.get('metadatas', [])],
+                stored.get('documents', [])
+            )
+            self.sparse_index.save(fingerprint)
+            self._sparse_synced = True
+            logger.info(f"Rebuilt sparse index from vector store ({len(self.sparse_index)} chunks)")
         except Exception as e:
-            logger.error(f"Failed to get document count: {e}")
-            return 0
+            logger.error(f"Failed to rebuild sparse index: {e}")
+
+    def _sync_dedup_index(self) -> None:
+        """중복 인덱스가 매니페스트와 맞지 않으면 벡터 DB의 청크로 재구축"""
+        fingerprint = self.manifest.fingerprint()
+        if self.deduplicator.manifest_fingerprint == fingerprint:
+            return
 
-    def delete_document(self, file_path: str) -> bool:
-        """문서 삭제"""
         try:
-            file_id = self._generate_file_id(file_path)
+            stored = self.vector_db.get_documents()
+            self.deduplicator.clear()
+            for chunk_id, metadata, text in zip(stored.get('ids', []), stored.get('metadatas', []),
+                                                stored.get('documents', [])):
+                self.deduplicator.add(chunk_id, (metadata or {}).get('file_id', ''), text)
+            self.deduplicator.save(fingerprint)
+            logger.info(f"Rebuilt dedup index from vector store ({len(self.deduplicator)} chunks)")
+        except Exception as e:
+            logger.error(f"Failed to rebuild dedup index: {e}")
+
+    def _save_indexes(self) -> None:
+        """매니페스트, 희소 인덱스, 중복 인덱스를 함께 저장"""
+        self.manifest.save()
+        # 재구축되지 않은 희소 인덱스(하이브리드 비활성 시)에 지문을 찍으면 다음 활성화 때 재구축이 생략됨
+        if self._sparse_synced:
+            self.sparse_index.save(self.manifest.fingerprint())
+        if self.deduplicator is not None:
+            self.deduplicator.save(self.manifest.fingerprint())
 
-            # 해당 파일의 모든 청크 삭제
-            self.chroma_db.delete_documents(where={'file_id': file_id})
+    def multi_query_search(self, queries: List[str], k: int = 10, top_n: Optional[int] = None,
+                           cache_key: Optional[str] = None) -> List[DocumentSearchResult]:
+        """여러 질의를 한 번에 임베딩/검색하고 reciprocal-rank fusion으로 병합 (chunk_id 기준 중복 제거)
 
-            self.indexed_files.discard(file_id)
+        Args:
+            queries: 검색 질의 목록
+            k: 질의별 검색 개수
+            top_n: 병합 후 반환할 최대 개수 (기본값: k)
+            cache_key: 사전 계산된 검색 결과 키 (유효한 캐시가 있으면 임베딩/검색 생략)
+        """
+        try:
+            fused = None
+            if cache_key is not None:
+                fused = self.retrieval_cache.get(
+                    self._retrieval_entry_key(cache_key, queries, k, top_n),
+                    self.manifest.fingerprint(), self._retrieval_params_fingerprint()
+                )
+            if fused is None:
+                fused = self._fused_search(queries, k)[:top_n or k]
+            else:
+                logger.debug(f"Retrieval cache hit: {cache_key}")
+
+            return [
+                DocumentSearchResult(
+                    file_path=doc.metadata.get('file_path', ''),
+                    content=doc.page_content,
+                    score=score,  # RRF 점수
+                    metadata=doc.metadata
+                )
+                for doc, score in fused
+            ]
+
+        except Exception as e:
+            logger.error(f"Multi-query search failed: {e}")
+            return []
+
+    async def amulti_query_search(self, queries: List[str], k: int = 10, top_n: Optional[int] = None,
+                                  cache_key: Optional[str] = None) -> List[DocumentSearchResult]:
+        """이벤트 루프를 막지 않는 multi_query_search (임베딩/벡터 검색은 워커 스레드에서 실행)"""
+        return await asyncio.to_thread(self.multi_query_search, queries, k, top_n, cache_key)
+
+    def _fused_search(self, queries: List[str], k: int) -> List[Tuple[Document, float]]:
+        """질의 배치의 dense (+ sparse) 검색 결과를 하나의 순위로 결합
+
+        계층 검색이 켜져 있으면 요약 벡터로 고른 상위 문서 안에서만 청크를 검색
+        """
+        file_ids = self._candidate_files(queries)
+        dense_lists = self.vector_db.similarity_search_batch(
+            queries, k=k, filter_dict=self._document_filter(file_ids)
+        )
+        return self._fuse(dense_lists, self._sparse_lists_for(queries, k, dense_lists, file_ids))
+
+    def _candidate_files(self, queries: List[str]) -> Optional[List[str]]:
+        """요약 벡터 검색으로 고른 상위 top_documents개 문서의 file_id (계층 검색을 쓰지 않으면 None)"""
+        if self.summary_db is None or len(self.manifest) <= self.top_documents:
+            return None
+
+        summary_lists = self.summary_db.similarity_search_batch(queries, k=self.top_documents)
+        ranked = reciprocal_rank_fusion(
+            summary_lists, key_fn=lambda doc: doc.metadata.get('file_id', '')
+        )[:self.top_documents]
+        file_ids = [doc.metadata.get('file_id') for doc, _ in ranked if doc.metadata.get('file_id')]
+        return file_ids or None
+
+    @staticmethod
+    def _document_filter(file_ids: Optional[List[str]]) -> Optional[Dict]:
+        return {'file_id': {'$in': file_ids}} if file_ids else None
+
+    def _sparse_lists_for(self, queries: List[str], k: int,
+                          dense_lists: List[List[Tuple[Document, float]]],
+                          file_ids: Optional[List[str]] = None) -> List[List[Tuple[Document, float]]]:
+        if not self.hybrid or not len(self.sparse_index):
+            return [[] for _ in queries]
+        known = {document_key(doc): doc for hits in dense_lists for doc, _ in hits}
+        return self._sparse_ranked_lists(queries, k, known, file_ids)
+
+    def _fuse(self, dense_lists: List[List[Tuple[Document, float]]],
+              sparse_lists: List[List[Tuple[Document, float]]]) -> List[Tuple[Document, float]]:
+        weights = [1.0] * len(dense_lists) + [self.sparse_weight] * len(sparse_lists)
+        return reciprocal_rank_fusion(list(dense_lists) + list(sparse_lists), weights=weights)
+
+    def set_precomputed_queries(self, query_sets: Dict[str, List[str]], k: int = 10,
+                                top_n: Optional[int] = None) -> None:
+        """인덱싱 시점에 검색 결과를 미리 계산할 질의 집합 등록 (key -> 질의 목록)"""
+        self.precomputed_queries = query_sets
+        self.precomputed_k = k
+        self.precomputed_top_n = top_n
+
+    @staticmethod
+    def _retrieval_entry_key(cache_key: str, queries: List[str], k: int, top_n: Optional[int]) -> str:
+        """사전 계산 캐시 항목 키 - 같은 cache_key라도 질의/k/top_n이 다르면 다른 항목"""
+        request = json.dumps([list(queries), k, top_n or k], ensure_ascii=False)
+        return f"{cache_key}:{hashlib.sha256(request.encode()).hexdigest()[:16]}"
+
+    def _retrieval_params_fingerprint(self) -> str:
+        """등록된 질의 집합과 검색 결과에 영향을 주는 설정(하이브리드, 계층 검색, 벡터 DB, 임베딩 모델)의 해시"""
+        vector_db_params = {
+            name: getattr(self.vector_db, name)
+            for name in ("distance_metric", "hnsw_m", "hnsw_construction_ef", "hnsw_search_ef",
+                         "quantization", "pca_dims", "rescore_factor")
+            if hasattr(self.vector_db, name)
+        }
+        params = {
+            "queries": self.precomputed_queries,
+            "k": self.precomputed_k,
+            "top_n": self.precomputed_top_n,
+            "hybrid": self.hybrid,
+            "sparse_weight": self.sparse_weight,
+            "hierarchical": self.summary_db is not None,
+            "top_documents": self.top_documents,
+            "vector_backend": self.vector_backend,
+            "vector_db": vector_db_params,
+            "embedding_model": self.vector_db.embedding_model,
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def refresh_retrieval_cache(self) -> bool:
+        """등록된 질의 집합의 검색 결과를 다시 계산 (캐시가 최신이면 생략)
+
+        Returns:
+            캐시를 다시 계산했으면 True
+        """
+        if not self.precomputed_queries:
+            return False
+
+        manifest_fingerprint = self.manifest.fingerprint()
+        params_fingerprint = self._retrieval_params_fingerprint()
+        if self.retrieval_cache.is_valid(manifest_fingerprint, params_fingerprint):
+            return False
+
+        try:
+            start = time.perf_counter()
+            keys = list(self.precomputed_queries)
+            all_queries = [query for key in keys for query in self.precomputed_queries[key]]
+            k, top_n = self.precomputed_k, self.precomputed_top_n or self.precomputed_k
+
+            if self.summary_db is not None:
+                # 계층 검색은 질의 집합마다 후보 문서가 달라 집합 단위로 검색
+                entries = {
+                    self._retrieval_entry_key(key, self.precomputed_queries[key], k, top_n):
+                        self._fused_search(self.precomputed_queries[key], k)[:top_n]
+                    for key in keys
+                }
+            else:
+                dense_lists = self.vector_db.similarity_search_batch(all_queries, k=k)
+                sparse_lists = self._sparse_lists_for(all_queries, k, dense_lists)
+
+                entries, offset = {}, 0
+                for key in keys:
+                    queries = self.precomputed_queries[key]
+                    fused = self._fuse(dense_lists[offset:offset + len(queries)],
+                                       sparse_lists[offset:offset + len(queries)])
+                    entries[self._retrieval_entry_key(key, queries, k, top_n)] = fused[:top_n]
+                    offset += len(queries)
+
+            self.retrieval_cache.replace(manifest_fingerprint, params_fingerprint, entries)
+            logger.info(f"Precomputed retrievals for {len(keys)} query sets "
+                        f"({len(all_queries)} queries) in {time.perf_counter() - start:.2f}s")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to precompute retrievals: {e}")
+            self.retrieval_cache.invalidate()
+            return False
+
+    def get_documents_count(self) -> int:
+        """인덱싱된 청크 개수 (벡터 DB 네이티브 count, 컬렉션 크기와 무관하게 O(1))"""
+        return self.vector_db.count()
+
+    def get_statistics(self) -> IndexStatistics:
+        """인덱스 통계 - 청크 수는 벡터 DB count, 파일별 청크 수는 매니페스트에서 조회"""
+        entries = list(self.manifest.entries.values())
+        return IndexStatistics(
+            collection_name=self.collection_name,
+            vector_backend=self.vector_backend,
+            chunk_count=self.vector_db.count(),
+            file_count=len(entries),
+            manifest_chunk_count=self.manifest.total_chunks(),
+            dropped_chunks=sum(entry.dropped_chunks for entry in entries),
+            files={entry.file_path: entry.chunk_count for entry in entries}
+        )
+
+    def delete_document(self, file_path: str) -> bool:
+        """문서 삭제"""
+        if self._reject_if_read_only("delete_document"):
+            return False
+        if self._purge_file(self._generate_file_id(file_path)):
+            self._save_indexes()
+            self.refresh_retrieval_cache()
             logger.info(f"Deleted document: {file_path}")
             return True
+        return False
 
+    def _purge_file(self, file_id: str) -> bool:
+        """파일의 모든 청크와 매니페스트 항목 삭제"""
+        try:
+            self._remove_chunks([file_id])
+            entry = self.manifest.remove(file_id)
+            if entry:
+                logger.info(f"Purged chunks of {entry.file_path}")
+            return True
         except Exception as e:
-            logger.error(f"Failed to delete document {file_path}: {e}")
+            logger.error(f"Failed to purge file {file_id}: {e}")
             return False
 
     def reset(self) -> bool:
         """모든 데이터 초기화"""
+        if self._reject_if_read_only("reset"):
+            return False
         try:
-            self.chroma_db.reset_collection()
-            self.indexed_files.clear()
+            self.vector_db.reset_collection()
+            self.sparse_index.clear()
+            self._sparse_synced = True
+            if self.deduplicator is not None:
+                self.deduplicator.clear()
+            if self.summary_db is not None:
+                self.summary_db.reset_collection()
+            self.manifest.clear()
+            self._save_indexes()
             logger.info("RAG Engine reset completed")
             return True
         except Exception as e:
             logger.error(f"Reset failed: {e}")
             return False
 
-    def as_retriever(self):
-        """LangChain retriever로 변환"""
-        return self.chroma_db.as_retriever()
+    def export_snapshot(self, archive_path: str, version: str, compress: bool = False) -> SnapshotInfo:
+        """현재 인덱스(벡터 DB, 희소/중복 인덱스, 매니페스트, 사전 계산 캐시)를 버전과 체크섬이 담긴 tar로 내보냄
+
+        임베딩/파싱 캐시는 제외하며, persist_directory 전체를 담으므로 전용 디렉토리에서 만든 인덱스를 내보냅니다.
+        """
+        self._save_indexes()
+        info = SnapshotInfo(
+            version=version,
+            collection_name=self.collection_name,
+            vector_backend=self.vector_backend,
+            embedding_model=self.vector_db.embedding_model,
+            chunking=self.chunking,
+            hybrid=self.hybrid,
+            hierarchical=self.hierarchical,
+            manifest_fingerprint=self.manifest.fingerprint(),
+            file_count=len(self.manifest),
+            chunk_count=self.vector_db.count()
+        )
+        return export_snapshot(self.persist_directory, archive_path, info, compress=compress)
+
+    def as_retriever(self, search_kwargs: Optional[Dict] = None):
+        """LangChain retriever로 변환 (hybrid/계층 검색 설정 시 RAGEngine 검색 기반 retriever)"""
+        search_kwargs = search_kwargs or {"k": settings.rag_retriever_k}
+        if self.hybrid or self.hierarchical:
+            return HybridRetriever(engine=self, k=search_kwargs.get("k", settings.rag_retriever_k))
+        return self.vector_db.as_retriever(search_kwargs=search_kwargs)
 
     def _generate_file_id(self, file_path: str) -> str:
         """파일 경로 기반 ID 생성"""
         return hashlib.md5(file_path.encode()).hexdigest()[:12]
 
 
-# 싱글톤 인스턴스
-from config import settings
-rag_engine = RAGEngine(persist_directory=settings.chroma_path)
-rag_engine.add_documents_from_directory(f"{settings.data_path}/documents")
+class HybridRetriever(BaseRetriever):
+    """RAGEngine.hybrid_search 기반 LangChain retriever"""
+
+    engine: Any
+    k: int = 10
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [
+            Document(page_content=result.content, metadata=result.metadata)
+            for result in self.engine.hybrid_search(query, k=self.k)
+        ]
+
+
+class LazyRAGEngine:
+    """RAGEngine 지연 초기화 래퍼
+
+    임베딩 모델 로딩과 문서 인덱싱을 import 시점이 아닌 첫 사용 시점(또는 백그라운드 warm-up)으로 미룹니다.
+    속성 접근은 실제 RAGEngine으로 위임되며, 필요한 경우 생성이 끝날 때까지 대기합니다.
+    생성 실패는 기록되며, 재시도 대기 시간(연속 실패마다 두 배) 동안은 factory를 다시 실행하지 않고 즉시 실패합니다.
+
+    Args:
+        factory: RAGEngine 생성 함수
+        retry_backoff: 첫 실패 후 재시도까지 대기 시간(초)
+        max_retry_backoff: 재시도 대기 시간 상한(초)
+    """
+
+    def __init__(self, factory: Callable[[], RAGEngine], retry_backoff: float = 5.0,
+                 max_retry_backoff: float = 300.0):
+        self._factory = factory
+        self._engine: Optional[RAGEngine] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        # 마지막 생성 실패와 다음 재시도 가능 시각 (time.monotonic 기준)
+        self._error: Optional[Exception] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def get(self) -> RAGEngine:
+        """RAGEngine 반환 (없으면 현재 스레드에서 생성, 재시도 대기 중이면 마지막 실패를 즉시 발생)"""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._raise_if_backing_off()
+                    start = time.perf_counter()
+                    try:
+                        self._engine = self._factory()
+                    except Exception as e:
+                        self._record_failure(e)
+                        raise
+                    self._error, self._failures = None, 0
+                    logger.info(f"RAG Engine ready in {time.perf_counter() - start:.2f}s")
+        return self._engine
+
+    def _raise_if_backing_off(self) -> None:
+        remaining = self._retry_at - time.monotonic()
+        if self._error is not None and remaining > 0:
+            raise RuntimeError(
+                f"retrying in {remaining:.0f}s after {self._failures} failed attempt(s): {self._error}"
+            ) from self._error
+
+    def _record_failure(self, error: Exception) -> None:
+        self._failures += 1
+        delay = min(self.retry_backoff * 2 ** (self._failures - 1), self.max_retry_backoff)
+        self._error, self._retry_at = error, time.monotonic() + delay
+
+    def warm_up(self, background: bool = True) -> None:
+        """RAGEngine 미리 생성 (background=True면 데몬 스레드에서 실행)"""
+        if self._engine is not None or (self._thread and self._thread.is_alive()):
+            return
+        if not background:
+            self.get()
+            return
+
+        self._thread = threading.Thread(target=self._warm_up, name="rag-warm-up", daemon=True)
+        self._thread.start()
+
+    def _warm_up(self) -> None:
+        try:
+            self.get()
+        except Exception as e:
+            logger.error(f"RAG Engine warm-up failed: {e}")
+
+    def is_ready(self) -> bool:
+        return self._engine is not None
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """RAGEngine 준비까지 대기 (warm-up이 시작되지 않았다면 직접 생성)"""
+        if self._engine is not None:
+            return True
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+            return self.is_ready()
+
+        try:
+            self.get()
+        except Exception as e:
+            logger.error(f"RAG Engine initialization failed: {e}")
+        return self.is_ready()
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """이벤트 루프를 막지 않고 RAGEngine 준비까지 대기"""
+        if self._engine is not None:
+            return True
+        return await asyncio.to_thread(self.wait_until_ready, timeout)
+
+    def as_retriever(self, search_kwargs: Optional[Dict] = None) -> BaseRetriever:
+        """RAGEngine 생성 전에도 사용할 수 있는 retriever 반환"""
+        return LazyRetriever(engine=self, search_kwargs=search_kwargs or {})
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+class LazyRetriever(BaseRetriever):
+    """첫 검색 시 RAGEngine 준비를 기다린 뒤 실제 retriever로 위임"""
+
+    engine: Any
+    search_kwargs: Dict = {}
+    _retriever: Optional[BaseRetriever] = PrivateAttr(default=None)
+
+    def _resolve(self) -> BaseRetriever:
+        if self._retriever is None:
+            self._retriever = self.engine.get().as_retriever(search_kwargs=self.search_kwargs or None)
+        return self._retriever
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        self.engine.wait_until_ready()
+        return self._resolve().invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(
+            self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        await self.engine.wait_ready()
+        return await self._resolve().ainvoke(query, config={"callbacks": run_manager.get_child()})
+
+
+def _build_default_engine() -> RAGEngine:
+    engine = RAGEngine(persist_directory=settings.chroma_path)
+    # RAG 분석 노드가 사용할 수 있는 모든 태그 조합의 검색 결과를 인덱싱 시점에 사전 계산
+    engine.set_precomputed_queries(rag_analysis_query_sets(), k=10)
+    if engine.read_only:
+        # 스냅샷에 함께 담긴 인덱스와 사전 계산 결과를 그대로 사용 (인덱싱/재계산 없음)
+        return engine
+    engine.add_documents_from_directory(f"{settings.data_path}/documents")
+    return engine
+
+
+# 싱글톤 인스턴스 (지연 초기화)
+rag_engine = LazyRAGEngine(_build_default_engine)
 
 if __name__ == '__main__':
     rag_engine.add_documents_from_directory("C:/Users/Administrator/Desktop/Aircok/ffdm-be/storage/documents")
@@ -0,0 +1,126 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+from typing import Any, Dict, Optional, Tuple
+
+# Third-party imports
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import Checkpoint, ChannelVersions, copy_checkpoint, empty_checkpoint
+from langgraph.checkpoint.base.id import uuid6
+
+# Custom imports
+from mcp_agent.engine.sqlite_checkpointer import SQLiteCheckpointer
+
+
+def thread_config(thread_id: str, checkpoint_id: Optional[str] = None) -> RunnableConfig:
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def next_checkpoint(saver: SQLiteCheckpointer, previous: Optional[Checkpoint], step: int,
+                    values: Dict[str, Any]) -> Tuple[Checkpoint, ChannelVersions]:
+    """Checkpoint after previous with the given channels bumped to a new version"""
+    checkpoint = empty_checkpoint() if previous is None else copy_checkpoint(previous)
+    checkpoint["id"] = str(uuid6(clock_seq=step))
+    new_versions = {}
+    for channel, value in values.items():
+        version = saver.get_next_version(checkpoint["channel_versions"].get(channel), None)
+        checkpoint["channel_versions"][channel] = version
+        checkpoint["channel_values"][channel] = value
+        new_versions[channel] = version
+    return checkpoint, new_versions
+
+
+def put_steps(saver: SQLiteCheckpointer, thread_id: str, steps: int, with_writes: bool = False) -> list:
+    """steps checkpoints chained by parent; "title" is written once, "messages" on every step"""
+    configs, checkpoint, config = [], None, thread_config(thread_id)
+    for step in range(steps):
+        values = {"messages": [f"message {step}"]}
+        if step == 0:
+            values["title"] = "title"
+        checkpoint, new_versions = next_checkpoint(saver, checkpoint, step, values)
+        config = saver.put(config, checkpoint, {"source": "loop", "step": step}, new_versions)
+        if with_writes:
+            saver.put_writes(config, [("messages", [f"pending {step}"])], task_id="task")
+        configs.append(config)
+    return configs
+
+
+def blob_versions(saver: SQLiteCheckpointer, thread_id: str, channel: str) -> set:
+    rows = saver._conn.execute(
+        "SELECT version FROM blobs WHERE thread_id = ? AND channel = ?", (thread_id, channel)
+    ).fetchall()
+    return {version for version, in rows}
+
+
+def test_put_writes_get_tuple_and_list_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteCheckpointer(path, keep_last=0)
+    configs = put_steps(saver, "thread", 3)
+    saver.put_writes(configs[-1], [("messages", ["pending"]), ("title", "new title")], task_id="task")
+    saver.close()
+
+    # Everything is read back from the file by a new connection
+    saver = SQLiteCheckpointer(path, keep_last=0)
+    latest = saver.get_tuple(thread_config("thread"))
+    assert latest.config == configs[-1]
+    assert latest.parent_config == configs[-2]
+    assert latest.checkpoint["channel_values"] == {"messages": ["message 2"], "title": "title"}
+    assert latest.metadata["step"] == 2
+    assert latest.pending_writes == [("task", "messages", ["pending"]), ("task", "title", "new title")]
+
+    first = saver.get_tuple(configs[0])
+    assert first.checkpoint["channel_values"] == {"messages": ["message 0"], "title": "title"}
+    assert first.parent_config is None
+    assert first.pending_writes == []
+
+    listed = list(saver.list(thread_config("thread")))
+    assert [item.config for item in listed] == configs[::-1]
+    assert [item.config for item in saver.list(thread_config("thread"), limit=2)] == configs[:0:-1]
+    assert [item.config for item in saver.list(thread_config("thread"), before=configs[-1])] == configs[-2::-1]
+    assert [item.metadata["step"] for item in saver.list(None, filter={"step": 1})] == [1]
+    assert saver.get_tuple(thread_config("other")) is None
+    saver.close()
+
+
+def test_retention_keeps_keep_last_and_deletes_only_unreferenced_blobs(tmp_path):
+    saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.sqlite"), keep_last=3, compact_slack=0)
+    configs = put_steps(saver, "thread", 6, with_writes=True)
+    put_steps(saver, "other", 2, with_writes=True)
+
+    retained = list(saver.list(thread_config("thread")))
+    assert [item.config for item in retained] == configs[:2:-1]
+
+    # Only the retained message versions are left; the title blob from step 0 is still referenced
+    assert blob_versions(saver, "thread", "messages") == {
+        item.checkpoint["channel_versions"]["messages"] for item in retained
+    }
+    assert len(blob_versions(saver, "thread", "title")) == 1
+    assert all(item.checkpoint["channel_values"]["title"] == "title" for item in retained)
+
+    # Pending writes of deleted checkpoints are deleted with them
+    writes = saver._conn.execute("SELECT checkpoint_id FROM writes WHERE thread_id = 'thread'").fetchall()
+    assert sorted(writes) == [(config["configurable"]["checkpoint_id"],) for config in configs[3:]]
+    assert retained[0].pending_writes == [("task", "messages", ["pending 5"])]
+    # Other threads are untouched
+    assert len(list(saver.list(thread_config("other")))) == 2
+    saver.close()
+
+
+def test_compact_applies_retention_to_every_thread(tmp_path):
+    saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.sqlite"), keep_last=2, compact_slack=10)
+    first = put_steps(saver, "first", 5)
+    second = put_steps(saver, "second", 4)
+    # Within the slack, puts do not delete anything yet
+    assert saver.stats() == {"checkpoints": 9, "blobs": 11, "writes": 0, "threads": 2}
+
+    assert saver.compact() == 5
+    assert saver.compact_slack == 10
+    assert [item.config for item in saver.list(thread_config("first"))] == first[:2:-1]
+    assert [item.config for item in saver.list(thread_config("second"))] == second[:1:-1]
+    # Two message versions per thread plus each thread's shared title blob
+    assert saver.stats() == {"checkpoints": 4, "blobs": 6, "writes": 0, "threads": 2}
+    assert saver.compact() == 0
+    saver.close()
@@ -0,0 +1,72 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import asyncio
+from typing import Any, Iterator, List, Optional
+
+# Third-party imports
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Custom imports
+from config import settings
+from mcp_agent.engine import base as base_module
+from utils.prompts import TITLE_PROMPT
+
+TITLE = "TITLEWORD"
+ANSWER = "answer tokens only"
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Answers title prompts with TITLE and everything else with ANSWER, streamed word by word"""
+
+    model: str = "fake"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @staticmethod
+    def _reply(messages: List[BaseMessage]) -> str:
+        is_title = TITLE_PROMPT.split("{")[0].strip()[:40] in str(messages[-1].content)
+        return TITLE if is_title else ANSWER
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        words = self._reply(messages).split(" ")
+        for index, word in enumerate(words):
+            token = word if index == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def test_stream_generate_langchain_streams_only_answer_tokens(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "rag_background_warm_up", False)
+    monkeypatch.setattr(settings, "chat_path", str(tmp_path))
+    monkeypatch.setattr(settings, "agent_checkpoint_path", str(tmp_path / "checkpoints.sqlite"))
+
+    engine = base_module.BaseEngine(FakeStreamingChatModel, "fake", {})
+
+    async def collect():
+        return [chunk async for chunk in engine.stream_generate_langchain("분기별 매출 분석")]
+
+    try:
+        streamed = "".join(content for _, content in asyncio.run(collect()) if isinstance(content, str))
+
+        assert streamed == ANSWER
+        assert TITLE not in streamed
+        # The title is still generated, just not streamed
+        assert engine.get_conversation_stats()["title"] == TITLE
+    finally:
+        engine.close()
@@ -1,2 +1,3 @@
 from .file_utils import FileUtils
 from .path_utils import PathUtils
+from .token_utils import TokenUtils
@@ -1,7 +1,8 @@
 __author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
 
 # Standard imports
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+from itertools import combinations
 import json
 
 # Third-party imports
@@ -188,6 +189,51 @@ RAG_PROMPT = """
 답변을 한국어로 제공해 주세요.
 """
 
+# Analysis tags detected from conversation keywords (see BaseEngine._extract_data_summary)
+RAG_ANALYSIS_TAGS = {
+    "correlation_analysis": ["correlation", "상관관계", "relationship"],
+    "causal_inference": ["causation", "인과관계", "causal"],
+    "variable_analysis": ["variable", "변수", "factor"],
+    "impact_analysis": ["impact", "영향", "effect"],
+    "trend_analysis": ["trend", "추세", "pattern"],
+    "predictive_analysis": ["prediction", "예측", "forecast"],
+}
+
+DEFAULT_RAG_ANALYSIS_SUMMARY = "general causal relationship analysis"
+
+# Retrieval queries issued by the RAG analysis node
+RAG_ANALYSIS_QUERIES = [
+    "Causal inference methodology statistical analysis {data_summary}",
+    "Variable correlation causation relationship {data_summary}",
+    "Data-driven causal mechanism discovery {data_summary}",
+    "Statistical validation causal relationships {data_summary}",
+]
+
+
+#####################
+# RAG query helpers #
+#####################
+def rag_analysis_summary(tags: Iterable[str]) -> str:
+    """태그 집합을 정렬된 canonical 요약 문자열로 변환"""
+    unique_tags = sorted(set(tags))
+    return " ".join(unique_tags) if unique_tags else DEFAULT_RAG_ANALYSIS_SUMMARY
+
+
+def rag_analysis_queries(data_summary: str) -> List[str]:
+    """RAG 분석 노드의 검색 질의 목록"""
+    return [template.format(data_summary=data_summary) for template in RAG_ANALYSIS_QUERIES]
+
+
+def rag_analysis_query_sets() -> Dict[str, List[str]]:
+    """가능한 모든 태그 조합별 검색 질의 (사전 계산용)"""
+    tags = list(RAG_ANALYSIS_TAGS)
+    summaries = [DEFAULT_RAG_ANALYSIS_SUMMARY] + [
+        rag_analysis_summary(combination)
+        for size in range(1, len(tags) + 1)
+        for combination in combinations(tags, size)
+    ]
+    return {summary: rag_analysis_queries(summary) for summary in summaries}
+
 
 ##################################
 # Topic selection system prompts #
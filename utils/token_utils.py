@@ -0,0 +1,40 @@
+__author__ = "Se Hoon Kim(sehoon787@korea.ac.kr)"
+
+# Standard imports
+import re
+
+# Hangul/CJK syllables are roughly one BPE token each; latin text averages ~4 characters per token
+_CJK_PATTERN = re.compile(r"[가-힣ㄱ-ㆎ぀-ヿ一-鿿]")
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+_SYMBOL_PATTERN = re.compile(r"[^\sA-Za-z0-9가-힣ㄱ-ㆎ぀-ヿ一-鿿]")
+
+
+class TokenUtils:
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Fast local token estimate (no tokenizer load), slightly pessimistic for mixed Korean/English"""
+        if not text:
+            return 0
+        cjk = len(_CJK_PATTERN.findall(text))
+        words = sum((len(word) + 3) // 4 for word in _WORD_PATTERN.findall(text))
+        symbols = len(_SYMBOL_PATTERN.findall(text))
+        return cjk + words + symbols
+
+    @staticmethod
+    def truncate_to_tokens(text: str, max_tokens: int) -> str:
+        """Cut text so that its estimate fits max_tokens, preferring a whitespace boundary"""
+        if max_tokens <= 0:
+            return ""
+        if TokenUtils.estimate_tokens(text) <= max_tokens:
+            return text
+
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if TokenUtils.estimate_tokens(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        cut = text[:low]
+        boundary = cut.rfind(" ")
+        return cut[:boundary] if boundary > low // 2 else cut